@@ -0,0 +1,8 @@
+'''__init__.py: The benchmark suite for measuring the throughput of the Python FIT SDK'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
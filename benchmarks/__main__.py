@@ -0,0 +1,15 @@
+'''__main__.py: Runs the benchmark suite with python -m benchmarks'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import sys
+
+from benchmarks.run import main
+
+sys.exit(main())
@@ -0,0 +1,289 @@
+'''corpus.py: Generates the deterministic synthetic activity files used by the benchmarks'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import math
+import os
+import random
+
+from garmin_fit_sdk import Encoder
+from garmin_fit_sdk.fit import BASE_TYPE
+from garmin_fit_sdk.profile import Profile
+
+MEGABYTE = 1024 * 1024
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.corpus')
+
+# Fixed start time, so the generated files are identical from run to run
+_START_TIME = 1000000000
+_SEMICIRCLES_PER_METER = 107.173
+_HR_EVENTS_PER_MESG = 8
+_SAMPLE_RECORDS = 1000
+
+_POWER_KEY = 0
+_DOUGHNUTS_EARNED_KEY = 1
+
+
+class CorpusOptions:
+    '''
+    The options used to generate a synthetic activity.
+
+    Attributes:
+        size_mb: The approximate size of the encoded file in megabytes.
+        record_interval: The number of seconds between record messages.
+        developer_fields: Whether the record and session messages have developer fields.
+        hr_mesgs: Whether HR messages are written, for merging heart rates into the records.
+        component_fields: Whether the records use speed and altitude, which expand into components.
+        seed: The seed of the random number generator.
+    '''
+    def __init__(self, size_mb, record_interval=1, developer_fields=True, hr_mesgs=True, component_fields=True, seed=0):
+        self.size_mb = size_mb
+        self.record_interval = record_interval
+        self.developer_fields = developer_fields
+        self.hr_mesgs = hr_mesgs
+        self.component_fields = component_fields
+        self.seed = seed
+
+    def get_dict(self):
+        return {
+            "size_mb": self.size_mb,
+            "record_interval": self.record_interval,
+            "developer_fields": self.developer_fields,
+            "hr_mesgs": self.hr_mesgs,
+            "component_fields": self.component_fields,
+            "seed": self.seed,
+        }
+
+    def file_name(self):
+        '''Returns a file name which is unique to these options.'''
+        return (f"activity-{self.size_mb}mb-{self.record_interval}s"
+                f"-dev{int(self.developer_fields)}-hr{int(self.hr_mesgs)}-comp{int(self.component_fields)}"
+                f"-seed{self.seed}.fit")
+
+
+def _field_descriptions():
+    developer_data_id_mesg = {
+        'mesg_num': Profile['mesg_num']['DEVELOPER_DATA_ID'],
+        'application_id': [0] * 16,
+        'application_version': 1,
+        'developer_data_index': 0,
+    }
+
+    return {
+        _POWER_KEY: {
+            'developer_data_id_mesg': developer_data_id_mesg,
+            'field_description_mesg': {
+                'mesg_num': Profile['mesg_num']['FIELD_DESCRIPTION'],
+                'developer_data_index': 0,
+                'field_definition_number': 0,
+                'fit_base_type_id': BASE_TYPE['UINT16'],
+                'field_name': 'Estimated Power',
+                'units': 'watts',
+                'native_mesg_num': Profile['mesg_num']['RECORD'],
+            },
+        },
+        _DOUGHNUTS_EARNED_KEY: {
+            'developer_data_id_mesg': developer_data_id_mesg,
+            'field_description_mesg': {
+                'mesg_num': Profile['mesg_num']['FIELD_DESCRIPTION'],
+                'developer_data_index': 0,
+                'field_definition_number': 1,
+                'fit_base_type_id': BASE_TYPE['FLOAT32'],
+                'field_name': 'Doughnuts Earned',
+                'units': 'doughnuts',
+                'native_mesg_num': Profile['mesg_num']['SESSION'],
+            },
+        },
+    }
+
+
+def _generate_mesgs(options, num_records):
+    rng = random.Random(options.seed)
+    field_descriptions = _field_descriptions() if options.developer_fields else None
+
+    mesgs = []
+    if field_descriptions is not None:
+        developer_data_id_mesg = field_descriptions[_POWER_KEY]['developer_data_id_mesg']
+        mesgs.append(developer_data_id_mesg)
+        for description in field_descriptions.values():
+            mesgs.append(description['field_description_mesg'])
+
+    mesgs.append({
+        'mesg_num': Profile['mesg_num']['FILE_ID'],
+        'type': 'activity',
+        'manufacturer': 'development',
+        'product': 0,
+        'time_created': _START_TIME,
+        'serial_number': 1234,
+    })
+
+    mesgs.append({
+        'mesg_num': Profile['mesg_num']['EVENT'],
+        'timestamp': _START_TIME,
+        'event': 'timer',
+        'event_type': 'start',
+    })
+
+    hr_event_time = 0.0
+    hr_filtered_bpm = []
+    hr_event_timestamps = []
+    first_hr_mesg = True
+
+    distance = 0.0
+    timestamp = _START_TIME
+    for i in range(num_records):
+        speed = 3.0 + math.sin(i / 60.0) + rng.random() * 0.5
+        altitude = 250.0 + 50.0 * math.sin(i / 600.0)
+        heart_rate = 120 + int(30 * math.sin(i / 300.0)) + rng.randint(-3, 3)
+        distance += speed * options.record_interval
+
+        record = {
+            'mesg_num': Profile['mesg_num']['RECORD'],
+            'timestamp': timestamp,
+            'position_lat': int(i * 3 * _SEMICIRCLES_PER_METER) % (1 << 30),
+            'position_long': int(i * 2 * _SEMICIRCLES_PER_METER) % (1 << 30),
+            'distance': distance,
+            'cadence': 80 + rng.randint(0, 15),
+            'power': 150 + rng.randint(0, 100),
+        }
+
+        if options.component_fields:
+            record['speed'] = speed
+            record['altitude'] = altitude
+        else:
+            record['enhanced_speed'] = speed
+            record['enhanced_altitude'] = altitude
+
+        if options.hr_mesgs is False:
+            record['heart_rate'] = heart_rate
+
+        if field_descriptions is not None:
+            record['developer_fields'] = {_POWER_KEY: record['power'] + rng.randint(-10, 10)}
+
+        mesgs.append(record)
+
+        # One heart beat sample per second, batched into HR messages like a heart rate monitor plugin
+        if options.hr_mesgs:
+            for _ in range(options.record_interval):
+                if first_hr_mesg:
+                    mesgs.append({
+                        'mesg_num': Profile['mesg_num']['HR'],
+                        'timestamp': timestamp,
+                        'fractional_timestamp': 0.0,
+                        'event_timestamp': hr_event_time,
+                        'filtered_bpm': heart_rate,
+                    })
+                    first_hr_mesg = False
+                else:
+                    hr_filtered_bpm.append(heart_rate)
+                    hr_event_timestamps.append(round(hr_event_time * 1024) / 1024)
+
+                    if len(hr_filtered_bpm) == _HR_EVENTS_PER_MESG:
+                        mesgs.append({
+                            'mesg_num': Profile['mesg_num']['HR'],
+                            'filtered_bpm': hr_filtered_bpm,
+                            'event_timestamp': hr_event_timestamps,
+                        })
+                        hr_filtered_bpm = []
+                        hr_event_timestamps = []
+
+                hr_event_time += 0.9 + rng.random() * 0.2
+
+        timestamp += options.record_interval
+
+    mesgs.append({
+        'mesg_num': Profile['mesg_num']['EVENT'],
+        'timestamp': timestamp,
+        'event': 'timer',
+        'event_type': 'stop',
+    })
+
+    elapsed_time = timestamp - _START_TIME
+    mesgs.append({
+        'mesg_num': Profile['mesg_num']['LAP'],
+        'message_index': 0,
+        'timestamp': timestamp,
+        'start_time': _START_TIME,
+        'total_elapsed_time': elapsed_time,
+        'total_timer_time': elapsed_time,
+        'total_distance': distance,
+    })
+
+    session = {
+        'mesg_num': Profile['mesg_num']['SESSION'],
+        'message_index': 0,
+        'timestamp': timestamp,
+        'start_time': _START_TIME,
+        'total_elapsed_time': elapsed_time,
+        'total_timer_time': elapsed_time,
+        'total_distance': distance,
+        'sport': 'cycling',
+        'sub_sport': 'generic',
+        'first_lap_index': 0,
+        'num_laps': 1,
+    }
+    if field_descriptions is not None:
+        session['developer_fields'] = {_DOUGHNUTS_EARNED_KEY: elapsed_time / 1200.0}
+    mesgs.append(session)
+
+    mesgs.append({
+        'mesg_num': Profile['mesg_num']['ACTIVITY'],
+        'timestamp': timestamp,
+        'num_sessions': 1,
+        'local_timestamp': timestamp,
+        'total_timer_time': elapsed_time,
+    })
+
+    return mesgs, field_descriptions
+
+
+def encode_mesgs(mesgs, field_descriptions):
+    '''Encodes the messages and returns the bytes of the FIT file.'''
+    encoder = Encoder(field_descriptions=field_descriptions)
+    for mesg in mesgs:
+        encoder.write_mesg(mesg)
+    return encoder.close()
+
+
+def generate_activity_mesgs(options):
+    '''
+    Returns the messages of a synthetic activity of approximately options.size_mb
+    megabytes, along with the developer field descriptions needed to encode them.
+    The same options always generate the same messages.
+    '''
+    # Encode a small activity to find the number of bytes each record adds to the file
+    sample_options = CorpusOptions(0, options.record_interval, options.developer_fields,
+                                   options.hr_mesgs, options.component_fields, options.seed)
+    empty_size = len(encode_mesgs(*_generate_mesgs(sample_options, 0)))
+    sample_size = len(encode_mesgs(*_generate_mesgs(sample_options, _SAMPLE_RECORDS)))
+    bytes_per_record = (sample_size - empty_size) / _SAMPLE_RECORDS
+
+    num_records = max(1, int((options.size_mb * MEGABYTE - empty_size) / bytes_per_record))
+    return _generate_mesgs(options, num_records)
+
+
+def load_corpus_file(options, corpus_dir=DEFAULT_CORPUS_DIR):
+    '''
+    Returns the path of the synthetic activity file for the given options, generating
+    the file and storing it in corpus_dir if it does not exist yet.
+    '''
+    path = os.path.join(corpus_dir, options.file_name())
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    data = encode_mesgs(*generate_activity_mesgs(options))
+
+    # Write to a temporary file first, so an interrupted run never leaves a partial file behind
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(data)
+    os.replace(temp_path, path)
+
+    return path
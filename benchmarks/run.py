@@ -0,0 +1,357 @@
+'''run.py: Runs the benchmarks and compares their results against a baseline'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+import garmin_fit_sdk
+from garmin_fit_sdk import Decoder, Stream
+from garmin_fit_sdk.hr_mesg_utils import merge_heart_rates
+
+from benchmarks.corpus import (DEFAULT_CORPUS_DIR, MEGABYTE, CorpusOptions, encode_mesgs,
+                               generate_activity_mesgs, load_corpus_file)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_SIZES = [1, 10]
+DEFAULT_THRESHOLD = 0.10
+_ALLOCATION_SAMPLE_MESGS = 5000
+
+
+def _count_mesgs(messages):
+    return sum(len(mesgs) for mesgs in messages.values())
+
+
+def _decode(data, **read_options):
+    messages, errors = Decoder(Stream.from_byte_array(data)).read(**read_options)
+    if len(errors) > 0:
+        raise errors[0]
+    return messages
+
+
+def _bench_decode(options, corpus_dir, repeat):
+    with open(load_corpus_file(options, corpus_dir), 'rb') as file:
+        data = file.read()
+
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        messages = _decode(data)
+        timings.append(perf_counter() - start)
+
+    return timings, _count_mesgs(messages), len(data)
+
+
+def _bench_decode_allocations(options, corpus_dir, repeat):
+    with open(load_corpus_file(options, corpus_dir), 'rb') as file:
+        data = file.read()
+
+    transient_bytes = 0
+    num_sampled_mesgs = 0
+
+    def mesg_listener(mesg_num, message):
+        # The memory freed between the peak and now was allocated and released while decoding the message
+        nonlocal transient_bytes, num_sampled_mesgs
+        if num_sampled_mesgs == _ALLOCATION_SAMPLE_MESGS:
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        transient_bytes += peak - current
+        num_sampled_mesgs += 1
+        if num_sampled_mesgs == _ALLOCATION_SAMPLE_MESGS:
+            # Tracing slows decoding several times over, so only the first messages are sampled
+            tracemalloc.stop()
+        else:
+            tracemalloc.reset_peak()
+
+    timings = []
+    for _ in range(repeat):
+        transient_bytes = 0
+        num_sampled_mesgs = 0
+        tracemalloc.start()
+        start = perf_counter()
+        messages = _decode(data, mesg_listener=mesg_listener)
+        timings.append(perf_counter() - start)
+        tracemalloc.stop()
+
+    return timings, _count_mesgs(messages), len(data), {
+        "sampled_messages": num_sampled_mesgs,
+        "transient_bytes_per_message": transient_bytes / num_sampled_mesgs if num_sampled_mesgs > 0 else None,
+    }
+
+
+def _time_decode(data, **decoder_options):
+    '''Returns the time to decode the data with the given Decoder class attributes set.'''
+    defaults = {name: getattr(Decoder, name) for name in decoder_options}
+    for name, value in decoder_options.items():
+        setattr(Decoder, name, value)
+    try:
+        start = perf_counter()
+        _decode(data)
+        return perf_counter() - start
+    finally:
+        for name, value in defaults.items():
+            setattr(Decoder, name, value)
+
+
+def _bench_decode_simple(options, corpus_dir, repeat):
+    # Without developer fields, HR messages or component fields, every message definition has a simple decode plan
+    simple_options = CorpusOptions(options.size_mb, options.record_interval, False, False, False, options.seed)
+    with open(load_corpus_file(simple_options, corpus_dir), 'rb') as file:
+        data = file.read()
+
+    timings = []
+    simple_plan_timings = []
+    general_timings = []
+    for _ in range(repeat):
+        timings.append(_time_decode(data))
+        simple_plan_timings.append(_time_decode(data, _use_mesg_decoders=False))
+        general_timings.append(_time_decode(data, _use_simple_decode_plans=False))
+
+    seconds = min(timings)
+    return timings, _count_mesgs(_decode(data)), len(data), {
+        "simple_plan_seconds": min(simple_plan_timings),
+        "general_seconds": min(general_timings),
+        "speedup": min(general_timings) / seconds if seconds > 0 else None,
+    }
+
+
+def _bench_encode(options, corpus_dir, repeat):
+    mesgs, field_descriptions = generate_activity_mesgs(options)
+
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        data = encode_mesgs(mesgs, field_descriptions)
+        timings.append(perf_counter() - start)
+
+    return timings, len(mesgs), len(data)
+
+
+def _bench_round_trip(options, corpus_dir, repeat):
+    mesgs, field_descriptions = generate_activity_mesgs(options)
+
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        data = encode_mesgs(mesgs, field_descriptions)
+        _decode(data)
+        timings.append(perf_counter() - start)
+
+    return timings, len(mesgs), len(data)
+
+
+def _bench_check_integrity(options, corpus_dir, repeat):
+    with open(load_corpus_file(options, corpus_dir), 'rb') as file:
+        data = file.read()
+
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        if Decoder(Stream.from_byte_array(data)).check_integrity() is False:
+            raise RuntimeError("The corpus file failed the integrity check")
+        timings.append(perf_counter() - start)
+
+    return timings, None, len(data)
+
+
+def _bench_hr_merge(options, corpus_dir, repeat):
+    with open(load_corpus_file(options, corpus_dir), 'rb') as file:
+        data = file.read()
+
+    messages = _decode(data, merge_heart_rates=False)
+    hr_mesgs = messages.get('hr_mesgs', [])
+    record_mesgs = messages.get('record_mesgs', [])
+
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        merge_heart_rates(hr_mesgs, record_mesgs)
+        timings.append(perf_counter() - start)
+
+    return timings, len(hr_mesgs) + len(record_mesgs), None
+
+
+BENCHMARKS = {
+    'decode': _bench_decode,
+    'decode_allocations': _bench_decode_allocations,
+    'decode_simple': _bench_decode_simple,
+    'encode': _bench_encode,
+    'round_trip': _bench_round_trip,
+    'check_integrity': _bench_check_integrity,
+    'hr_merge': _bench_hr_merge,
+}
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak_rss / MEGABYTE if sys.platform == 'darwin' else peak_rss / 1024
+
+
+def _run_benchmark(name, options, corpus_dir, repeat):
+    '''Runs a single benchmark. Called in a new process, so the peak RSS is that of this benchmark alone.'''
+    timings, num_mesgs, num_bytes, *metrics = BENCHMARKS[name](options, corpus_dir, repeat)
+    seconds = min(timings)
+
+    result = {
+        "benchmark": name,
+        "size_mb": options.size_mb,
+        "seconds": seconds,
+        "all_seconds": timings,
+        "messages": num_mesgs,
+        "bytes": num_bytes,
+        "messages_per_second": num_mesgs / seconds if num_mesgs is not None and seconds > 0 else None,
+        "mb_per_second": num_bytes / MEGABYTE / seconds if num_bytes is not None and seconds > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    # Benchmarks can report their own metrics along with the timings
+    for benchmark_metrics in metrics:
+        result.update(benchmark_metrics)
+
+    return result
+
+
+def run_benchmarks(names, corpus_options, corpus_dir=DEFAULT_CORPUS_DIR, repeat=3):
+    '''
+    Runs each of the named benchmarks against the corpus file of each of the corpus options,
+    and returns the results as a dictionary which can be saved as JSON.
+    '''
+    # Generate the corpus files up front, so generating them is not part of any measurement
+    for options in corpus_options:
+        print(f"Preparing {options.file_name()}", file=sys.stderr)
+        load_corpus_file(options, corpus_dir)
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for options in corpus_options:
+        for name in names:
+            print(f"Running {name} on {options.size_mb} MB", file=sys.stderr)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results.append(executor.submit(_run_benchmark, name, options, corpus_dir, repeat).result())
+
+    return {
+        "sdk_version": garmin_fit_sdk.__version__,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "accelerated": garmin_fit_sdk.is_accelerated(),
+        "repeat": repeat,
+        "corpus": [options.get_dict() for options in corpus_options],
+        "results": results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    '''
+    Compares the timings of two sets of benchmark results. Returns a list with a row for each
+    benchmark found in both sets, and whether any benchmark is slower than the baseline by
+    more than the threshold, a fraction of the baseline time.
+    '''
+    baseline_results = {(result["benchmark"], result["size_mb"]): result for result in baseline["results"]}
+
+    rows = []
+    has_regression = False
+    for result in current["results"]:
+        baseline_result = baseline_results.get((result["benchmark"], result["size_mb"]))
+        if baseline_result is None:
+            continue
+
+        ratio = result["seconds"] / baseline_result["seconds"] if baseline_result["seconds"] > 0 else float('inf')
+        is_regression = ratio > 1 + threshold
+        has_regression = has_regression or is_regression
+
+        rows.append({
+            "benchmark": result["benchmark"],
+            "size_mb": result["size_mb"],
+            "baseline_seconds": baseline_result["seconds"],
+            "seconds": result["seconds"],
+            "ratio": ratio,
+            "is_regression": is_regression,
+        })
+
+    return rows, has_regression
+
+
+def _print_comparison(rows, threshold, file=None):
+    print(f"{'benchmark':<16} {'size_mb':>8} {'baseline_s':>11} {'current_s':>11} {'ratio':>7}", file=file)
+    for row in rows:
+        flag = "  REGRESSION" if row["is_regression"] else ""
+        print(f"{row['benchmark']:<16} {row['size_mb']:>8} {row['baseline_seconds']:>11.4f} "
+              f"{row['seconds']:>11.4f} {row['ratio']:>7.2f}{flag}", file=file)
+    print(f"Regression threshold: {threshold:.0%} slower than the baseline", file=file)
+
+
+def _load_json(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split(': ', 1)[1])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks and write the results as JSON.')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                            help='Sizes of the synthetic activities in MB, for example 1 10 100.')
+    run_parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    run_parser.add_argument('--repeat', type=int, default=3, help='Times to repeat each benchmark. The fastest time is reported.')
+    run_parser.add_argument('--record-interval', type=int, default=1, help='Seconds between record messages.')
+    run_parser.add_argument('--no-developer-fields', action='store_true')
+    run_parser.add_argument('--no-hr-mesgs', action='store_true')
+    run_parser.add_argument('--no-component-fields', action='store_true')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--corpus-dir', default=DEFAULT_CORPUS_DIR, help='Directory the generated activities are kept in.')
+    run_parser.add_argument('--output', help='File to write the results to, instead of stdout.')
+    run_parser.add_argument('--baseline', help='Results of a previous run to compare against.')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two sets of results.')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        rows, has_regression = compare_results(_load_json(args.baseline), _load_json(args.current), args.threshold)
+        _print_comparison(rows, args.threshold)
+        return 1 if has_regression else 0
+
+    corpus_options = [CorpusOptions(size_mb, args.record_interval, not args.no_developer_fields,
+                                    not args.no_hr_mesgs, not args.no_component_fields, args.seed)
+                      for size_mb in args.sizes]
+    results = run_benchmarks(args.benchmarks, corpus_options, args.corpus_dir, args.repeat)
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.baseline is not None:
+        rows, has_regression = compare_results(_load_json(args.baseline), results, args.threshold)
+        # The results may have been written to stdout, so the comparison goes to stderr to keep them valid JSON
+        _print_comparison(rows, args.threshold, file=sys.stderr)
+        return 1 if has_regression else 0
+
+    return 0
@@ -12,15 +12,20 @@
 ############################################################################################
 
 
+from garmin_fit_sdk.accelerator import is_accelerated
 from garmin_fit_sdk.accumulator import Accumulator
 from garmin_fit_sdk.bitstream import BitStream
 from garmin_fit_sdk.crc_calculator import CrcCalculator
+from garmin_fit_sdk.decode_stats import DecodeStats
 from garmin_fit_sdk.decoder import Decoder
+from garmin_fit_sdk.decode_cache import DecodeCache
 from garmin_fit_sdk.encoder import Encoder
 from garmin_fit_sdk.fit import BASE_TYPE, BASE_TYPE_DEFINITIONS
 from garmin_fit_sdk.hr_mesg_utils import expand_heart_rates
+from garmin_fit_sdk.integrity import IntegrityCheck, IntegrityResult, check_integrity_many
+from garmin_fit_sdk.mesg_classes import FitMesg, get_mesg_type
 from garmin_fit_sdk.profile import Profile
 from garmin_fit_sdk.stream import Stream
-from garmin_fit_sdk.util import FIT_EPOCH_S, convert_datetime_to_timestamp, convert_timestamp_to_datetime, BASE_TYPE_TO_FIELD_TYPE, FIELD_TYPE_TO_BASE_TYPE
+from garmin_fit_sdk.util import FIT_EPOCH_S, convert_datetime_to_timestamp, convert_timestamp_to_datetime, convert_timestamps_to_datetimes, BASE_TYPE_TO_FIELD_TYPE, FIELD_TYPE_TO_BASE_TYPE
 
 __version__ = '21.205.0'
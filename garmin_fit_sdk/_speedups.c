@@ -0,0 +1,322 @@
+/*
+ * _speedups.c: Contains the optional compiled implementations of the hot paths of the decoder.
+ *
+ * Copyright 2026 Garmin International, Inc.
+ * Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+ * may not use this file except in compliance with the Flexible and Interoperable Data
+ * Transfer (FIT) Protocol License.
+ *
+ * Each function returns the same results as the pure Python implementation it replaces.
+ * When a function is given arguments it does not handle, such as a buffer with items larger
+ * than a byte or a component wider than 64 bits, it returns NotImplemented and the caller
+ * falls back to the pure Python implementation, so errors are raised by the same code.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+
+static uint16_t byte_crc_table[256];
+
+static void build_byte_crc_table(void)
+{
+    static const uint16_t crc_table[16] = {
+        0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+        0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400
+    };
+
+    for (int value = 0; value < 256; value++) {
+        uint16_t crc = (uint16_t)value;
+        for (int i = 0; i < 2; i++) {
+            crc = (uint16_t)((crc >> 4) ^ crc_table[crc & 0xF]);
+        }
+        byte_crc_table[value] = crc;
+    }
+}
+
+static PyObject *
+update_crc(PyObject *module, PyObject *args)
+{
+    PyObject *buffer;
+    Py_ssize_t start, end;
+    unsigned long crc;
+
+    if (!PyArg_ParseTuple(args, "Onnk", &buffer, &start, &end, &crc)) {
+        PyErr_Clear();
+        Py_RETURN_NOTIMPLEMENTED;
+    }
+
+    Py_buffer view;
+    if (PyObject_GetBuffer(buffer, &view, PyBUF_SIMPLE) != 0) {
+        PyErr_Clear();
+        Py_RETURN_NOTIMPLEMENTED;
+    }
+
+    if (view.itemsize != 1) {
+        PyBuffer_Release(&view);
+        Py_RETURN_NOTIMPLEMENTED;
+    }
+
+    /* The same bounds as slicing the buffer */
+    PySlice_AdjustIndices(view.len, &start, &end, 1);
+
+    const unsigned char *data = (const unsigned char *)view.buf;
+    uint16_t value = (uint16_t)crc;
+    Py_BEGIN_ALLOW_THREADS
+    for (Py_ssize_t i = start; i < end; i++) {
+        value = (uint16_t)((value >> 8) ^ byte_crc_table[(value ^ data[i]) & 0xFF]);
+    }
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&view);
+    return PyLong_FromUnsignedLong(value);
+}
+
+static int
+as_masked_bits(PyObject *element, uint64_t mask, uint64_t *bits)
+{
+    if (!PyLong_Check(element)) {
+        return 0;
+    }
+
+    /* Negative values are masked as two's complement, the same as element & mask */
+    unsigned long long value = PyLong_AsUnsignedLongLongMask(element);
+    if (value == (unsigned long long)-1 && PyErr_Occurred()) {
+        PyErr_Clear();
+        return 0;
+    }
+
+    *bits = (uint64_t)value & mask;
+    return 1;
+}
+
+/* Returns the given number of bits, at most 64, from the bit position of the packed words */
+static uint64_t
+get_bits(const uint64_t *words, Py_ssize_t position, long width)
+{
+    if (width == 0) {
+        return 0;
+    }
+
+    Py_ssize_t word = position / 64;
+    int shift = (int)(position % 64);
+    uint64_t bits = words[word] >> shift;
+    if (shift != 0 && shift + width > 64) {
+        bits |= words[word + 1] << (64 - shift);
+    }
+    return width == 64 ? bits : bits & (((uint64_t)1 << width) - 1);
+}
+
+static PyObject *
+read_bits_list(PyObject *module, PyObject *args)
+{
+    PyObject *data;
+    int bits_per_position;
+    PyObject *bits_to_read;
+
+    if (!PyArg_ParseTuple(args, "OiO", &data, &bits_per_position, &bits_to_read)) {
+        PyErr_Clear();
+        Py_RETURN_NOTIMPLEMENTED;
+    }
+
+    if (bits_per_position <= 0 || bits_per_position > 64) {
+        Py_RETURN_NOTIMPLEMENTED;
+    }
+
+    int is_list = PyList_Check(data);
+    Py_ssize_t num_elements = is_list ? PyList_GET_SIZE(data) : 1;
+    Py_ssize_t total_bits = num_elements * bits_per_position;
+
+    /* The elements are packed LSB first into 64 bit words, with a spare word so a read can always look at the next word */
+    uint64_t *words = PyMem_Calloc((size_t)(total_bits / 64 + 2), sizeof(uint64_t));
+    if (words == NULL) {
+        return PyErr_NoMemory();
+    }
+
+    uint64_t mask = bits_per_position == 64 ? UINT64_MAX : (((uint64_t)1 << bits_per_position) - 1);
+    for (Py_ssize_t i = 0; i < num_elements; i++) {
+        uint64_t bits;
+        if (!as_masked_bits(is_list ? PyList_GET_ITEM(data, i) : data, mask, &bits)) {
+            PyMem_Free(words);
+            Py_RETURN_NOTIMPLEMENTED;
+        }
+
+        Py_ssize_t position = i * bits_per_position;
+        Py_ssize_t word = position / 64;
+        int shift = (int)(position % 64);
+        words[word] |= bits << shift;
+        if (shift != 0 && shift + bits_per_position > 64) {
+            words[word + 1] |= bits >> (64 - shift);
+        }
+    }
+
+    PyObject *widths = PySequence_Fast(bits_to_read, "bits_to_read must be a sequence");
+    if (widths == NULL) {
+        PyErr_Clear();
+        PyMem_Free(words);
+        Py_RETURN_NOTIMPLEMENTED;
+    }
+
+    Py_ssize_t num_widths = PySequence_Fast_GET_SIZE(widths);
+    PyObject **items = PySequence_Fast_ITEMS(widths);
+
+    /* Check the widths first, so nothing is returned for widths the pure Python implementation handles differently */
+    Py_ssize_t position = 0;
+    Py_ssize_t num_values = 0;
+    for (Py_ssize_t i = 0; i < num_widths; i++) {
+        long width = PyLong_Check(items[i]) ? PyLong_AsLong(items[i]) : -1;
+        if (width == -1 && PyErr_Occurred()) {
+            PyErr_Clear();
+        }
+
+        if (width >= 0 && (position >= total_bits || width > total_bits - position)) {
+            break;
+        }
+
+        if (width < 0 || width > 64) {
+            Py_DECREF(widths);
+            PyMem_Free(words);
+            Py_RETURN_NOTIMPLEMENTED;
+        }
+
+        position += width;
+        num_values++;
+    }
+
+    PyObject *values = PyList_New(num_values);
+    if (values == NULL) {
+        Py_DECREF(widths);
+        PyMem_Free(words);
+        return NULL;
+    }
+
+    position = 0;
+    for (Py_ssize_t i = 0; i < num_values; i++) {
+        long width = PyLong_AsLong(items[i]);
+
+        PyObject *item = PyLong_FromUnsignedLongLong(get_bits(words, position, width));
+        if (item == NULL) {
+            Py_DECREF(values);
+            Py_DECREF(widths);
+            PyMem_Free(words);
+            return NULL;
+        }
+        PyList_SET_ITEM(values, i, item);
+        position += width;
+    }
+
+    Py_DECREF(widths);
+    PyMem_Free(words);
+    return values;
+}
+
+/* Unlike PyObject_RichCompareBool, does not treat identical objects as equal, the same as value != invalid */
+static int
+is_not_equal(PyObject *value, PyObject *invalid)
+{
+    PyObject *result = PyObject_RichCompare(value, invalid, Py_NE);
+    if (result == NULL) {
+        return -1;
+    }
+
+    int is_true = PyObject_IsTrue(result);
+    Py_DECREF(result);
+    return is_true;
+}
+
+static PyObject *
+mask_invalid_values(PyObject *module, PyObject *args)
+{
+    PyObject *raw_values;
+    Py_ssize_t start, count;
+    PyObject *invalid;
+
+    if (!PyArg_ParseTuple(args, "O!nnO", &PyList_Type, &raw_values, &start, &count, &invalid)) {
+        PyErr_Clear();
+        Py_RETURN_NOTIMPLEMENTED;
+    }
+
+    if (start < 0 || count < 0 || start + count > PyList_GET_SIZE(raw_values)) {
+        Py_RETURN_NOTIMPLEMENTED;
+    }
+
+    PyObject *values = PyList_New(count);
+    if (values == NULL) {
+        return NULL;
+    }
+
+    int all_invalid = 1;
+    for (Py_ssize_t i = 0; i < count; i++) {
+        PyObject *value = PyList_GET_ITEM(raw_values, start + i);
+        int is_valid = is_not_equal(value, invalid);
+        if (is_valid < 0) {
+            Py_DECREF(values);
+            return NULL;
+        }
+
+        if (is_valid) {
+            all_invalid = 0;
+        }
+        else {
+            value = Py_None;
+        }
+        Py_INCREF(value);
+        PyList_SET_ITEM(values, i, value);
+    }
+
+    if (all_invalid) {
+        Py_DECREF(values);
+        Py_RETURN_NONE;
+    }
+    return values;
+}
+
+static PyObject *
+only_invalid_values(PyObject *module, PyObject *args)
+{
+    PyObject *raw_values;
+    PyObject *invalid;
+
+    if (!PyArg_ParseTuple(args, "O!O", &PyList_Type, &raw_values, &invalid)) {
+        PyErr_Clear();
+        Py_RETURN_NOTIMPLEMENTED;
+    }
+
+    for (Py_ssize_t i = 0; i < PyList_GET_SIZE(raw_values); i++) {
+        int is_valid = is_not_equal(PyList_GET_ITEM(raw_values, i), invalid);
+        if (is_valid < 0) {
+            return NULL;
+        }
+        if (is_valid) {
+            Py_RETURN_FALSE;
+        }
+    }
+    Py_RETURN_TRUE;
+}
+
+static PyMethodDef speedups_methods[] = {
+    {"update_crc", update_crc, METH_VARARGS,
+     "Returns the CRC updated with the bytes of the buffer from start to end, or NotImplemented."},
+    {"read_bits_list", read_bits_list, METH_VARARGS,
+     "Returns a value for each of the bit widths read from the data, or NotImplemented."},
+    {"mask_invalid_values", mask_invalid_values, METH_VARARGS,
+     "Returns the values with the invalid values replaced by None, or None if all of the values are invalid."},
+    {"only_invalid_values", only_invalid_values, METH_VARARGS,
+     "Returns whether all of the values in the list are the invalid value."},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef speedups_module = {
+    PyModuleDef_HEAD_INIT,
+    "_speedups",
+    "The optional compiled implementations of the hot paths of the decoder.",
+    -1,
+    speedups_methods
+};
+
+PyMODINIT_FUNC
+PyInit__speedups(void)
+{
+    build_byte_crc_table();
+    return PyModule_Create(&speedups_module);
+}
@@ -0,0 +1,30 @@
+'''accelerator.py: Loads the optional compiled implementations of the hot paths of the decoder.'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+# ****WARNING****  This file is auto-generated!  Do NOT edit this file.
+# Profile Version = 21.205.0Release
+# Tag = production/release/21.205.0-0-gb3c261eb
+############################################################################################
+
+
+import os
+
+# Set to 1 to use the pure Python implementations even when the compiled module is built
+PURE_PYTHON_ENV = 'GARMIN_FIT_SDK_PURE_PYTHON'
+
+speedups = None
+if os.environ.get(PURE_PYTHON_ENV, '') in ('', '0'):
+    try:
+        from . import _speedups as speedups
+    except ImportError:
+        speedups = None
+
+
+def is_accelerated():
+    '''Returns whether the compiled implementations of the hot paths of the decoder are in use.'''
+    return speedups is not None
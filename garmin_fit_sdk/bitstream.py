@@ -13,6 +13,7 @@
 
 
 from . import fit as FIT
+from .accelerator import speedups as _speedups
 
 
 class BitStream:
@@ -20,104 +21,98 @@ class BitStream:
     A class that represents a stream of binary data from a chunk of data.
 
     Internal state model:
-        _data is set at construction time and holds the raw element list for the
-        lifetime of the object.  _array starts as None and is only initialised
-        lazily the first time a sub-element read (read_bit or a partial
-        read_bits) is required.  While _array is None the fast path in
-        read_bits can service full-element reads directly from _data without
-        decomposing values into individual bytes.
+        At construction time the supplied element(s) are collapsed into a single
+        arbitrary-precision integer, with element 0 occupying the least
+        significant bits.  Every read, regardless of width or alignment, is then
+        a single shift-and-mask against that integer, so partial and
+        cross-element reads cost the same as full-element reads.
 
     Attributes:
-        _data: The raw list of typed elements supplied at construction.
-               Never None after __init__ completes.
-        _array: Alias into _data used by the slow (bit-by-bit) path.
-                None until the first sub-element read triggers lazy
-                initialisation; reset back to None by reset().
-        _current_array_position: Current read index within _array (slow path only).
-        _bits_per_position: Number of bits in each element of _data
+        _value: All of the supplied elements packed LSB first into one integer.
+        _bits_per_position: Number of bits in each element of the data
                             (base_type size × 8).
-        _current_byte: The element currently being consumed bit-by-bit (slow path).
-        _current_bit: Number of bits already consumed from _current_byte (slow path).
-        _bits_available: Remaining number of bits left unread in the stream.
+        _total_bits: Total number of bits held by _value.
+        _bit_position: Number of bits already consumed from _value.
     '''
-    __slots__ = ('_data', '_array', '_current_array_position', '_bits_per_position',
-                 '_current_byte', '_current_bit', '_bits_available')
+    __slots__ = ('_value', '_bits_per_position', '_total_bits', '_bit_position')
     def __init__(self, data, base_type):
-        self._data = None
-        self._array = None
-        self._current_array_position = 0
-        self._bits_per_position = 0
-        self._current_byte = 0
-        self._current_bit = 0
-        self._bits_available = 0
-
-        self._data = data if isinstance(data, list) else [data]
         base_type_size = FIT.BASE_TYPE_DEFINITIONS[base_type]['size']
-        self._bits_per_position = base_type_size * 8
-        self.reset()
+        bits_per_position = base_type_size * 8
+        mask = (1 << bits_per_position) - 1
+
+        if isinstance(data, list):
+            value = 0
+            shift = 0
+            for element in data:
+                value |= (element & mask) << shift
+                shift += bits_per_position
+        else:
+            value = data & mask
+            shift = bits_per_position
+
+        self._value = value
+        self._bits_per_position = bits_per_position
+        self._total_bits = shift
+        self._bit_position = 0
 
     def bits_available(self):
         '''Returns the number of bits left in the data.'''
-        return self._bits_available
+        return self._total_bits - self._bit_position
 
     def has_bits_available(self):
         '''Returns true if the data has bits available.'''
-        return self._bits_available > 0
+        return self._bit_position < self._total_bits
 
     def reset(self):
         '''Resets the bitstream to the start of the data and resets the bits available.'''
-        self._array = None
-        self._current_array_position = 0
-        self._bits_available = self._bits_per_position * len(self._data)
-        self._current_byte = 0
-        self._current_bit = 0
+        self._bit_position = 0
 
     def read_bit(self):
         '''Reads the next bit if possible.'''
-        if self.has_bits_available() is False:
-            self.__raise_error()
-
-        if self._array is None:
-            self._array = self._data
-            self._current_array_position = len(self._data) - (self._bits_available // self._bits_per_position)
-            self.__next_byte()
-
-        if self._current_bit >= self._bits_per_position:
-            self.__next_byte()
-
-        bit = self._current_byte & 0x01
-        self._current_byte = (self._current_byte >> 1)
-        self._current_bit += 1
-        self._bits_available -= 1
-
-        return bit
+        return self.read_bits(1)
 
     def read_bits(self, number_bits_to_read):
         '''Reads the specificed number of bits if possible.'''
-        # Fast path: if reading exactly one value's worth of bits and array hasn't been
-        # initialized yet, index _data directly without decomposing into bytes.
-        if number_bits_to_read == self._bits_per_position and self._array is None:
-            if self._bits_available <= 0:
-                self.__raise_error()
-            index = len(self._data) - (self._bits_available // self._bits_per_position)
-            value = self._data[index] & ((1 << self._bits_per_position) - 1)
-            self._bits_available -= self._bits_per_position
-            return value
+        position = self._bit_position
+        if number_bits_to_read > self._total_bits - position:
+            self.__raise_error()
 
-        value = 0
+        self._bit_position = position + number_bits_to_read
+        return (self._value >> position) & ((1 << number_bits_to_read) - 1)
 
-        for i in range(number_bits_to_read):
-            value |= self.read_bit() << i
+    def read_bits_list(self, bits_to_read):
+        '''
+        Reads a value for each of the given bit widths in order. Reading stops at the
+        first width that exceeds the bits available, or once all bits are consumed.
+        Returns the list of values read.
+        '''
+        value = self._value
+        position = self._bit_position
+        total_bits = self._total_bits
 
-        return value
+        values = []
+        for number_bits_to_read in bits_to_read:
+            if position >= total_bits or number_bits_to_read > total_bits - position:
+                break
 
-    def __next_byte(self):
-        if self._current_array_position >= len(self._array):
-            self.__raise_error()
+            values.append((value >> position) & ((1 << number_bits_to_read) - 1))
+            position += number_bits_to_read
 
-        self._current_byte = self._array[self._current_array_position]
-        self._current_array_position += 1
-        self._current_bit = 0
+        self._bit_position = position
+        return values
 
     def __raise_error(self):
-        raise IndexError('FIT Runtime Error, no bits available.')
\ No newline at end of file
+        raise IndexError('FIT Runtime Error, no bits available.')
+
+
+def _read_bits_list(data, base_type, bits_to_read):
+    '''
+    Returns the same values as BitStream(data, base_type).read_bits_list(bits_to_read), using
+    the compiled implementation when it is available and the data fits in 64 bits.
+    '''
+    if _speedups is not None:
+        values = _speedups.read_bits_list(data, FIT.BASE_TYPE_DEFINITIONS[base_type]['size'] * 8, bits_to_read)
+        if values is not NotImplemented:
+            return values
+
+    return BitStream(data, base_type).read_bits_list(bits_to_read)
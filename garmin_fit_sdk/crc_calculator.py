@@ -12,12 +12,28 @@
 ############################################################################################
 
 
+from .accelerator import speedups as _speedups
+
 _CRC_TABLE = [
     0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
     0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400
 ]
 
 
+def _build_byte_crc_table():
+    table = []
+    for value in range(256):
+        crc = value
+        for _ in range(2):
+            crc = (crc >> 4) ^ _CRC_TABLE[crc & 0xF]
+        table.append(crc)
+    return tuple(table)
+
+
+# One entry per byte value, so the CRC can be updated a whole byte at a time
+_BYTE_CRC_TABLE = _build_byte_crc_table()
+
+
 class CrcCalculator:
     '''A class for calculating the CRC of a given .fit file header or file contents.'''
 
@@ -31,33 +47,29 @@ class CrcCalculator:
         return self._crc
 
     @staticmethod
-    def _update_crc(value, crc):
-        # compute checksum of lower four bits of byte
-        temp = _CRC_TABLE[crc & 0xF]
-        crc = (crc >> 4) & 0x0FFF
-        crc = crc ^ temp ^ _CRC_TABLE[value & 0xF]
+    def _update_crc_bytes(buffer, start, end, crc):
+        if _speedups is not None:
+            updated_crc = _speedups.update_crc(buffer, start, end, crc)
+            if updated_crc is not NotImplemented:
+                return updated_crc
 
-        # compute checksum of upper four bits of byte
-        temp = _CRC_TABLE[crc & 0xF]
-        crc = (crc >> 4) & 0x0FFF
-        crc = crc ^ temp ^ _CRC_TABLE[(value >> 4) & 0xF]
+        table = _BYTE_CRC_TABLE
+        try:
+            view = memoryview(buffer)
+        except TypeError:
+            view = memoryview(bytes(buffer[start:end]))
+            start, end = 0, len(view)
 
+        for value in view[start:end].cast('B'):
+            crc = (crc >> 8) ^ table[(crc ^ value) & 0xFF]
         return crc
 
     def add_bytes(self, buffer, start, end):
         '''Adds another chunk of bytes for calculating the CRC.'''
-        crc = self._crc
-        update = CrcCalculator._update_crc
-        for i in range(start, end):
-            crc = update(buffer[i], crc)
-        self._crc = crc
-        return crc
+        self._crc = CrcCalculator._update_crc_bytes(buffer, start, end, self._crc)
+        return self._crc
 
     @staticmethod
     def calculate_crc(buffer, start: int, end: int):
         '''Calculates the CRC of a given buffer from the given starting index to the ending index.'''
-        crc = 0
-        update = CrcCalculator._update_crc
-        for i in range(start, end):
-            crc = update(buffer[i], crc)
-        return crc
+        return CrcCalculator._update_crc_bytes(buffer, start, end, 0)
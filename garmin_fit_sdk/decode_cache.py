@@ -0,0 +1,170 @@
+'''decode_cache.py: Contains the DecodeCache class which stores decoded messages on disk, keyed by the file contents and read options.'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+# ****WARNING****  This file is auto-generated!  Do NOT edit this file.
+# Profile Version = 21.205.0Release
+# Tag = production/release/21.205.0-0-gb3c261eb
+############################################################################################
+
+
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+
+from .decoder import Decoder
+from .profile import Profile
+from .stream import Stream
+
+# Increment when the format of the cached entries changes
+_CACHE_FORMAT_VERSION = 1
+_CACHE_FILE_EXTENSION = '.pickle'
+
+_UNCACHEABLE_OPTIONS = ('mesg_listener', 'mesg_definition_listener', 'field_description_listener')
+_UNKEYED_OPTIONS = ('self', 'decode_stats')
+
+
+class DecodeCache:
+    '''
+    A cache of decoded messages stored in a local directory. Entries are keyed by a hash of
+    the file contents, the read options and the profile version, so a cache hit skips decoding
+    entirely. When the total size of the entries exceeds max_size_bytes the least recently
+    used entries are removed. Entries are written to a temporary file and renamed into
+    place, so the cache can be shared by concurrent processes.
+
+    The entries are stored with pickle, so the directory must only be writable by trusted users.
+
+    Attributes:
+        directory: The directory the entries are stored in.
+        max_size_bytes: The maximum total size of the entries, or None for no limit.
+    '''
+
+    def __init__(self, directory, max_size_bytes = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def read(self, stream: Stream, **read_options):
+        '''
+        Returns the decoded messages and errors of the stream, the same as Decoder.read, using
+        the cached messages if the same contents were decoded with the same read options before.
+        Listeners are not supported, since they would not be called on a cache hit. Results with
+        errors are not cached.
+        '''
+        for listener in _UNCACHEABLE_OPTIONS:
+            if read_options.get(listener) is not None:
+                raise ValueError(f"{listener} is not supported when reading through a DecodeCache")
+
+        stream.set_crc_calculator(None)
+        stream.seek(0)
+        data = stream.read_bytes(stream.get_length())
+        stream.seek(0)
+
+        path = self.__entry_path(self.get_key(data, **read_options))
+        messages = self.__load(path)
+        if messages is not None:
+            return messages, []
+
+        messages, errors = Decoder(stream).read(**read_options)
+        if len(errors) == 0:
+            self.__store(path, messages)
+
+        return messages, errors
+
+    @staticmethod
+    def get_key(data, **read_options):
+        '''Returns the cache key of the given file contents and read options.'''
+        bound_options = inspect.signature(Decoder.read).bind(None, **read_options)
+        bound_options.apply_defaults()
+        options = sorted((name, repr(value)) for name, value in bound_options.arguments.items()
+                         if name not in _UNKEYED_OPTIONS)
+
+        key = hashlib.blake2b(digest_size=20)
+        key.update(data)
+        key.update(repr((_CACHE_FORMAT_VERSION, Profile['version'], options)).encode())
+        return key.hexdigest()
+
+    def clear(self):
+        '''Removes all of the entries from the cache.'''
+        for path, _, _ in self.__list_entries():
+            _remove(path)
+
+    def get_size(self):
+        '''Returns the total size of the entries in bytes.'''
+        return sum(size for _, size, _ in self.__list_entries())
+
+    def __entry_path(self, key):
+        return os.path.join(self.directory, key + _CACHE_FILE_EXTENSION)
+
+    def __load(self, path):
+        try:
+            with open(path, 'rb') as file:
+                messages = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A corrupt entry is removed and treated as a miss
+            _remove(path)
+            return None
+
+        # The modification time is used as the last access time for evicting entries
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return messages
+
+    def __store(self, path, messages):
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                pickle.dump(messages, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except BaseException:
+            _remove(temp_path)
+            raise
+
+        self.__evict()
+
+    def __list_entries(self):
+        entries = []
+        with os.scandir(self.directory) as directory_entries:
+            for entry in directory_entries:
+                if entry.name.endswith(_CACHE_FILE_EXTENSION) is False:
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def __evict(self):
+        if self.max_size_bytes is None:
+            return
+
+        entries = self.__list_entries()
+        total_size = sum(size for _, size, _ in entries)
+        if total_size <= self.max_size_bytes:
+            return
+
+        entries.sort(key=lambda entry: entry[2])
+        for path, size, _ in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            _remove(path)
+            total_size -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
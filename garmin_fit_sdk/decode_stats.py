@@ -0,0 +1,90 @@
+'''decode_stats.py: Contains the DecodeStats class which records statistics and per-stage timing while decoding fit files.'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+# ****WARNING****  This file is auto-generated!  Do NOT edit this file.
+# Profile Version = 21.205.0Release
+# Tag = production/release/21.205.0-0-gb3c261eb
+############################################################################################
+
+
+from time import perf_counter
+
+from . import CrcCalculator
+
+STAGES = ('unpack', 'crc', 'sub_fields', 'components', 'transform', 'hr_merge', 'listeners')
+
+
+class DecodeStats:
+    '''
+    Statistics recorded by Decoder.read when a DecodeStats object is passed as the
+    decode_stats option. The same object can be passed to several reads to total the
+    statistics of many files.
+
+    Attributes:
+        files_read: The number of fit files decoded, including chained files.
+        bytes_read: The number of bytes read from the streams.
+        definition_counts: The number of message definitions read, by message name.
+        message_counts: The number of data messages read, by message name.
+        definition_cache_hits: The number of message definitions that were reused from previous files.
+        stage_times: The time spent in each decoding stage, in seconds, by stage name.
+        decode_time: The total time spent decoding, in seconds.
+    '''
+
+    def __init__(self):
+        self.files_read = 0
+        self.bytes_read = 0
+        self.definition_counts = {}
+        self.message_counts = {}
+        self.definition_cache_hits = 0
+        self.stage_times = dict.fromkeys(STAGES, 0.0)
+        self.decode_time = 0.0
+
+    def add_time(self, stage, start):
+        '''Adds the time elapsed since start, a time.perf_counter() value, to the given stage.'''
+        self.stage_times[stage] += perf_counter() - start
+
+    def merge(self, other):
+        '''Adds the statistics of another DecodeStats object to this one.'''
+        self.files_read += other.files_read
+        self.bytes_read += other.bytes_read
+        for name, count in other.definition_counts.items():
+            self.definition_counts[name] = self.definition_counts.get(name, 0) + count
+        for name, count in other.message_counts.items():
+            self.message_counts[name] = self.message_counts.get(name, 0) + count
+        self.definition_cache_hits += other.definition_cache_hits
+        for stage, seconds in other.stage_times.items():
+            self.stage_times[stage] = self.stage_times.get(stage, 0.0) + seconds
+        self.decode_time += other.decode_time
+
+    def get_dict(self):
+        '''Returns the statistics as a dictionary, for exporting to a metrics system.'''
+        return {
+            "files_read": self.files_read,
+            "bytes_read": self.bytes_read,
+            "definition_counts": {**self.definition_counts},
+            "message_counts": {**self.message_counts},
+            "definition_cache_hits": self.definition_cache_hits,
+            "stage_times": {**self.stage_times},
+            "decode_time": self.decode_time,
+        }
+
+
+class _TimedCrcCalculator(CrcCalculator):
+    '''A CrcCalculator that records the time spent calculating the CRC in a DecodeStats object.'''
+
+    __slots__ = ('_decode_stats',)
+
+    def __init__(self, decode_stats) -> None:
+        super().__init__()
+        self._decode_stats = decode_stats
+
+    def add_bytes(self, buffer, start, end):
+        crc_start = perf_counter()
+        crc = super().add_bytes(buffer, start, end)
+        self._decode_stats.add_time('crc', crc_start)
+        return crc
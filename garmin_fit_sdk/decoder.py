@@ -12,12 +12,19 @@
 ############################################################################################
 
 
-from . import Accumulator, BitStream, CrcCalculator
+from . import Accumulator, CrcCalculator
 from . import fit as FIT
 from . import hr_mesg_utils, util
+from .bitstream import _read_bits_list
+from .decode_stats import DecodeStats, _TimedCrcCalculator
+from .mesg_classes import _get_layout_class
 from .profile import Profile
 from .stream import Endianness, Stream
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from enum import Enum
+from struct import unpack
+from time import perf_counter
 
 _CRCSIZE = 2
 _COMPRESSED_HEADER_MASK = 0x80
@@ -26,8 +33,471 @@ _MESG_HEADER_MASK = 0x00
 _HEADER_WITH_CRC_SIZE = 14
 _HEADER_WITHOUT_CRC_SIZE = 12
 
+# Record header, reserved, architecture, global message number and number of fields
+_MESG_DEF_FIXED_SIZE = 6
+_FIELD_DEF_SIZE = 3
+_MESG_DEF_CACHE_SIZE = 1024
+_MESG_DECODER_CACHE_SIZE = 1024
+
+_INVALID_TIMESTAMP = 0xFFFFFFFF
+
+_SINGLE_VALUE = 0
+_ARRAY_VALUE = 1
+_BYTE_ARRAY_VALUE = 2
+_STRING_VALUE = 3
+
+# Marks a field value which has not been transformed yet
+_UNTRANSFORMED = object()
+
+_INTEGER_BASE_TYPES = frozenset(base_type for base_type, definition in FIT.BASE_TYPE_DEFINITIONS.items()
+                                if definition['type_code'] in 'bBhHiIqQ')
+
+# The compiled decode functions, keyed by message number, field definitions and read options
+_mesg_decoders = {}
+
 DecodeMode = Enum('DecodeMode', ['NORMAL', 'SKIP_HEADER', 'DATA_ONLY'])
 
+class FileHeader:
+    '''A class that decodes a FIT file header.'''
+    def __init__(self, stream, decode_mode):
+        if decode_mode != DecodeMode.NORMAL:
+            if decode_mode == DecodeMode.SKIP_HEADER:
+                stream.seek(_HEADER_WITH_CRC_SIZE)
+
+            header_size = _HEADER_WITH_CRC_SIZE if decode_mode == DecodeMode.SKIP_HEADER else 0
+            data_size = stream.get_length() - header_size - _CRCSIZE
+
+            self.header_size = header_size
+            self.data_size = data_size
+
+            return
+
+        self.header_size = stream.read_byte()
+        self.protocol_version = stream.read_byte()
+        self.profile_version = stream.read_unint_16("little")
+        self.data_size = stream.read_unint_32("little")
+        self.data_type = stream.read_string(4)
+        self.header_crc = 0
+        self.file_total_size = self.header_size + self.data_size
+
+        if self.header_size == 14:
+            self.header_crc = stream.read_unint_16("little")
+
+    def get_dict(self):
+        dict = {}
+        dict["header_size"] = self.header_size
+        dict["protocol_version"] = (self.protocol_version >> 4) + ((self.protocol_version & 0x0F) / 10)
+        dict["profile_version"] = self.profile_version / 1000 if self.profile_version > 2199 else 100
+        dict["data_size"] = self.data_size
+        dict["data_type"] = self.data_type
+        dict["header_crc"] = self.header_crc
+        dict["file_total_size"] = self.file_total_size
+
+        return dict
+
+
+class RawRecord:
+    '''
+    A definition or data record as it is stored in a FIT file, without any field data decoded.
+
+    Attributes:
+        record_header: The record header byte.
+        local_mesg_num: The local message number from the record header.
+        global_mesg_num: The global message number from the record's message definition.
+        is_definition: Whether the record is a message definition.
+        data: A memoryview of the complete record, including the record header byte.
+        definition: A memoryview of the message definition record used by this record. For
+                    definition records this is the same as data.
+    '''
+    __slots__ = ('record_header', 'local_mesg_num', 'global_mesg_num', 'is_definition', 'data', 'definition')
+
+    def __init__(self, record_header, global_mesg_num, data, definition):
+        self.record_header = record_header
+        self.local_mesg_num = record_header & FIT.LOCAL_MESG_NUM_MASK
+        self.global_mesg_num = global_mesg_num
+        self.is_definition = record_header & FIT.MESG_DEFINITION_MASK == FIT.MESG_DEFINITION_MASK
+        self.data = data
+        self.definition = definition
+
+
+def _walk_records(data):
+    '''
+    Walks the record headers of a FIT file's data section without decoding any field data.
+    Yields a (record_header, start, end, global_mesg_num, definition_offset) tuple for each
+    record, where definition_offset is the offset of the message definition the record uses.
+    '''
+    return _walk_record_slices((data,))
+
+def _walk_record_slices(slices):
+    '''
+    Walks the record headers of a FIT file's data section read as consecutive slices, such as
+    those from Stream.iter_slices, yielding the same tuples as _walk_records with offsets from
+    the start of the data section. Only a message definition split across slices is carried
+    over, so the data section is never held in memory at once.
+    '''
+    local_mesg_defs = {}
+
+    # The start of a message definition split across slices
+    carry = b''
+    # The bytes of a data message still to come, and the record yielded once they have been walked
+    skip = 0
+    skipped_record = None
+    data_start = 0
+
+    for data in slices:
+        data_size = len(data)
+        if skip > data_size:
+            skip -= data_size
+            data_start += data_size
+            continue
+
+        if len(carry) > 0:
+            data = carry + data
+            data_start -= len(carry)
+            data_size = len(data)
+            carry = b''
+
+        position = skip
+        skip = 0
+        if skipped_record is not None:
+            yield skipped_record
+            skipped_record = None
+
+        while position < data_size:
+            record_header = data[position]
+
+            if record_header & _COMPRESSED_HEADER_MASK == _COMPRESSED_HEADER_MASK:
+                raise RuntimeError("FIT Runtime Error at byte: " + str(data_start + position) + " Compressed timestamp messages are not currently supported")
+
+            local_mesg_num = record_header & FIT.LOCAL_MESG_NUM_MASK
+
+            if record_header & FIT.MESG_DEFINITION_MASK == FIT.MESG_DEFINITION_MASK:
+                # The record header, reserved byte, architecture, global message number and number of fields
+                if position + 6 > data_size:
+                    break
+
+                if data[position + 2] == FIT.ARCH_LITTLE_ENDIAN:
+                    global_mesg_num = data[position + 3] | (data[position + 4] << 8)
+                else:
+                    global_mesg_num = (data[position + 3] << 8) | data[position + 4]
+
+                fields_end = position + 6 + data[position + 5] * 3
+                if record_header & FIT.DEV_DATA_MASK == FIT.DEV_DATA_MASK:
+                    # The number of developer fields follows the field definitions
+                    if fields_end >= data_size:
+                        break
+
+                    developer_fields_end = fields_end + 1 + data[fields_end] * 3
+                else:
+                    developer_fields_end = fields_end
+
+                if developer_fields_end > data_size:
+                    break
+
+                message_size = sum(data[position + 7 : fields_end : 3]) + sum(data[fields_end + 2 : developer_fields_end : 3])
+
+                local_mesg_defs[local_mesg_num] = (global_mesg_num, message_size, data_start + position)
+                yield record_header, data_start + position, data_start + developer_fields_end, global_mesg_num, data_start + position
+
+                position = developer_fields_end
+                continue
+
+            if local_mesg_num not in local_mesg_defs:
+                raise RuntimeError("FIT Runtime Error at byte: " + str(data_start + position) + " Invalid local message number")
+
+            global_mesg_num, message_size, definition_offset = local_mesg_defs[local_mesg_num]
+            end = position + 1 + message_size
+            record = (record_header, data_start + position, data_start + end, global_mesg_num, definition_offset)
+
+            if end > data_size:
+                skip = end - data_size
+                skipped_record = record
+                position = data_size
+                break
+
+            yield record
+
+            position = end
+
+        if position < data_size:
+            carry = bytes(data[position:])
+
+        data_start += data_size
+
+    if skipped_record is not None:
+        raise RuntimeError("FIT Runtime Error at byte: " + str(skipped_record[1]) + " Incomplete message")
+
+    if len(carry) > 0:
+        raise RuntimeError("FIT Runtime Error at byte: " + str(data_start - len(carry)) + " Incomplete message definition")
+
+def _scan_record_offsets(data, mesg_nums):
+    '''
+    Returns a list of (definition_offset, message_offset) tuples, one for each data message
+    in a FIT file's data section with a global message number in mesg_nums.
+    '''
+    return [(definition_offset, start)
+            for record_header, start, _, global_mesg_num, definition_offset in _walk_records(data)
+            if global_mesg_num in mesg_nums and record_header & FIT.MESG_DEFINITION_MASK == _MESG_HEADER_MASK]
+
+def _build_decode_plan(field_definitions, fields_profile):
+    '''Resolves the profile and base type of each field in a message definition, so they are not looked up for every message.'''
+    decode_plan = []
+    for field in field_definitions:
+        base_type_definition = FIT.BASE_TYPE_DEFINITIONS[field["base_type"]]
+        num_elements = field["num_field_elements"]
+
+        field_id = field["field_id"]
+        field_profile = fields_profile.get(field_id)
+        field_name = field_profile['name'] if field_profile is not None else field_id
+
+        if field_profile is not None and 'has_components' in field_profile:
+            convert_invalids_to_none = not field_profile['has_components']
+        else:
+            convert_invalids_to_none = True
+
+        if base_type_definition['type'] == FIT.BASE_TYPE["STRING"]:
+            value_kind = _STRING_VALUE
+        elif num_elements > 1:
+            value_kind = _BYTE_ARRAY_VALUE if base_type_definition['type'] == FIT.BASE_TYPE["BYTE"] else _ARRAY_VALUE
+        else:
+            value_kind = _SINGLE_VALUE
+
+        decode_plan.append((
+            field_id,
+            field_name,
+            field_profile,
+            base_type_definition["invalid"],
+            num_elements,
+            value_kind,
+            convert_invalids_to_none,
+            field_profile is not None and len(field_profile['sub_fields']) > 0,
+            field_profile is not None and field_profile['has_components'] is True,
+            field_profile is not None and field_profile['is_accumulated'] is True,
+        ))
+
+    return decode_plan
+
+def _find_timestamp_index(decode_plan):
+    '''Returns the index of the timestamp field in the unpacked values of a message, or None if the message has no timestamp.'''
+    index = 0
+    for field_id, _, _, _, num_elements, value_kind, *_ in decode_plan:
+        if field_id == Profile['common_fields']['timestamp'] and value_kind == _SINGLE_VALUE:
+            return index
+        index += 1 if value_kind == _STRING_VALUE else num_elements
+    return None
+
+def _has_accumulated_components(decode_plan, fields_profile):
+    '''Returns whether expanding the components of any field in a message definition updates accumulated values.'''
+    for _, _, field_profile, *_ in decode_plan:
+        if field_profile is None:
+            continue
+
+        for profile in [field_profile, *field_profile['sub_fields']]:
+            for component_field_num in profile['components']:
+                component_field = fields_profile.get(component_field_num)
+                if component_field is not None and component_field['is_accumulated'] is True:
+                    return True
+    return False
+
+def _build_field_layout(decode_plan, fields_profile):
+    '''
+    Returns the names and profiles of the fields a message of a definition can have once
+    decoded, along with the number of fields of the definition. The fields of the definition
+    come first, followed by their sub fields and the fields their components expand into.
+    The position of a field in the layout is its position in the field value slots of a message.
+    '''
+    layout = {}
+    for _, field_name, field_profile, *_ in decode_plan:
+        layout.setdefault(field_name, field_profile)
+    num_definition_fields = len(layout)
+
+    profiles_to_expand = []
+    for field_profile in list(layout.values()):
+        if field_profile is None:
+            continue
+
+        profiles_to_expand.append(field_profile)
+        for sub_field in field_profile['sub_fields']:
+            layout.setdefault(sub_field['name'], sub_field)
+            profiles_to_expand.append(sub_field)
+
+    expanded_field_nums = set()
+    while len(profiles_to_expand) > 0:
+        for component_field_num in profiles_to_expand.pop()['components']:
+            component_field = fields_profile.get(component_field_num)
+            if component_field is None or component_field_num in expanded_field_nums:
+                continue
+
+            expanded_field_nums.add(component_field_num)
+            layout.setdefault(component_field['name'], component_field)
+            profiles_to_expand.append(component_field)
+
+    return list(layout), list(layout.values()), num_definition_fields
+
+def _find_mesg_field_names(field_layout, global_mesg_num, has_developer_fields):
+    '''Returns the names of the fields of the field layout, and of the fields added to a message after it is created.'''
+    field_names = list(field_layout)
+
+    if global_mesg_num == Profile['mesg_num']['RECORD'] and 'heart_rate' not in field_names:
+        field_names.append('heart_rate')
+    elif global_mesg_num == Profile['mesg_num']['FIELD_DESCRIPTION']:
+        field_names.append('key')
+
+    if has_developer_fields:
+        field_names.append('developer_fields')
+
+    return field_names
+
+def _build_simple_decode_plan(decode_plan, type_cache):
+    '''
+    Returns the plan of a message definition which can be decoded without the general
+    decoding steps, or None if the definition has a field with sub fields or components, or
+    the same field more than once. The profile type, enum values, scale and offset of each
+    field are resolved, so a message is decoded in a single pass. The profile types are looked
+    up through the type cache of the decoder.
+    '''
+    simple_decode_plan = []
+    field_names = set()
+    for (field_id, field_name, field_profile, invalid, num_elements, value_kind, _,
+         has_sub_fields, has_components, is_accumulated) in decode_plan:
+        if has_sub_fields or has_components or field_name in field_names:
+            return None
+        field_names.add(field_name)
+
+        # Fields which are not in the profile are named by their field definition number
+        field_type = field_profile['type'] if field_profile is not None else field_id
+
+        scale = None
+        offset = 0
+        if field_type in FIT.NUMERIC_FIELD_TYPES and len(field_profile['scale']) <= 1:
+            scale = field_profile['scale'][0] if field_profile['scale'] else 1
+            offset = field_profile['offset'][0] if field_profile['offset'] else 0
+            if scale == 1 and offset == 0:
+                scale = None
+
+        simple_decode_plan.append((
+            field_name,
+            field_type,
+            field_profile,
+            invalid,
+            num_elements,
+            value_kind,
+            field_type == 'date_time',
+            type_cache.setdefault(field_type, Profile['types'].get(field_type)),
+            scale,
+            offset,
+            is_accumulated,
+        ))
+
+    return simple_decode_plan
+
+def _get_mesg_decoder(global_mesg_num, field_definitions, simple_decode_plan, options):
+    '''
+    Returns the compiled decode function of a message definition with a simple decode plan,
+    for the given (convert_datetimes_to_dates, convert_types_to_strings, apply_scale_and_offset)
+    options, or None if the definition has a field the function does not decode. The functions
+    are cached by their code, so definitions which decode the same way share a function.
+    '''
+    generated = _generate_mesg_decoder(global_mesg_num, field_definitions, simple_decode_plan, options)
+    if generated is None:
+        return None
+
+    source, types_constants = generated
+    # The profile types are keyed by identity, and kept with the function so they are not reused
+    key = (source, tuple(id(types) for types, _ in types_constants.values()))
+    cached = _mesg_decoders.get(key)
+    if cached is not None:
+        return cached[1]
+
+    constants = {
+        'convert_timestamp_to_datetime': util.convert_timestamp_to_datetime,
+        'convert_string': util._convert_string,
+    }
+    for name, (types, is_integer_keyed) in types_constants.items():
+        constants[name] = _integer_keyed_types(types) if is_integer_keyed else types
+
+    namespace = {}
+    exec(compile(source, f'<mesg_decoder {global_mesg_num}>', 'exec'), constants, namespace)
+    mesg_decoder = namespace['decode_mesg']
+
+    if len(_mesg_decoders) >= _MESG_DECODER_CACHE_SIZE:
+        del _mesg_decoders[next(iter(_mesg_decoders))]
+    _mesg_decoders[key] = (tuple(types for types, _ in types_constants.values()), mesg_decoder)
+    return mesg_decoder
+
+def _integer_keyed_types(types):
+    '''Returns the values of a profile type keyed by the integers whose str() is their key.'''
+    return {int(key): value for key, value in types.items() if key.lstrip('-').isdigit() and str(int(key)) == key}
+
+def _generate_mesg_decoder(global_mesg_num, field_definitions, simple_decode_plan, options):
+    '''
+    Generates the source of a function which decodes the unpacked values of a message in
+    straight-line code, with the invalid value, scale and offset of each field written into the
+    code as constants. The function takes the unpacked values and the accumulator, and returns
+    the message. Returns the source and the profile types the code refers to, or None if the
+    definition has an array field, or a string field which is converted further.
+    '''
+    convert_timestamps_to_datetimes, convert_types_to_strings, apply_scale_and_offset = options
+
+    types_constants = {}
+    lines = ['def decode_mesg(raw_values, accumulator):', '    message = {}']
+    index = 0
+    for position, ((field_name, field_type, field_profile, invalid, _, value_kind, is_date_time, types, scale, offset, is_accumulated),
+                   field_definition) in enumerate(zip(simple_decode_plan, field_definitions)):
+        if value_kind == _STRING_VALUE:
+            if is_accumulated or is_date_time or types is not None or field_type in FIT.NUMERIC_FIELD_TYPES:
+                return None
+
+            lines.append(f'    value = convert_string(raw_values[{index}])')
+            lines.append('    if value is not None:')
+            lines.append(f'        message[{field_name!r}] = value')
+            index += 1
+            continue
+
+        if value_kind != _SINGLE_VALUE:
+            return None
+
+        lines.append(f'    value = raw_values[{index}]')
+        lines.append(f'    if value != {invalid!r}:')
+        index += 1
+
+        if is_accumulated:
+            lines.append(f"        accumulator.createAccumulatedField({global_mesg_num!r}, {field_profile['num']!r}, int(value))")
+
+        if is_date_time and convert_timestamps_to_datetimes:
+            expression = 'convert_timestamp_to_datetime(value)'
+        elif types is not None and convert_types_to_strings:
+            # The str() of an integer value is looked up as an integer key instead
+            is_integer_keyed = field_definition["base_type"] in _INTEGER_BASE_TYPES
+            types_constants[f'types_{position}'] = (types, is_integer_keyed)
+            expression = f'types_{position}.get(value, value)' if is_integer_keyed else f'types_{position}.get(str(value), value)'
+        elif types is None and scale is not None and apply_scale_and_offset:
+            expression = f'value / {scale!r}' if scale != 1 else 'value'
+            if offset != 0:
+                expression = f'{expression} - {offset!r}'
+        else:
+            expression = 'value'
+
+        lines.append(f'        message[{field_name!r}] = {expression}')
+
+    lines.append('    return message')
+    return '\n'.join(lines), types_constants
+
+def _to_fit_timestamp(value):
+    '''Converts a time_range bound, either a datetime or a FIT timestamp, to a FIT timestamp.'''
+    if isinstance(value, datetime):
+        return util.convert_datetime_to_timestamp(value)
+    return value
+
+def _read_segment(segment, read_options, collect_stats=False):
+    '''Decodes a single fit file from its bytes. Used by the worker processes of Decoder.read_chained.'''
+    decoder = Decoder(Stream.from_byte_array(segment))
+    if collect_stats is False:
+        return decoder.read(**read_options), None
+
+    decode_stats = DecodeStats()
+    return decoder.read(**read_options, decode_stats=decode_stats), decode_stats
+
 class Decoder:
     '''
     A class for decoding a given stream (fit file). Will return the decoded data
@@ -38,26 +508,27 @@ class Decoder:
         _local_mesg_defs: The 16 most recent message definitions read.
         _messages: The messages decoded by the Decoder.
     '''
+    # Whether definitions which qualify are decoded with a simple decode plan, and with a compiled
+    # decode function, disabled by the benchmarks to compare the decoding paths
+    _use_simple_decode_plans = True
+    _use_mesg_decoders = True
 
     def __init__(self, stream: Stream):
-        if stream is None:
-            raise RuntimeError("FIT Runtine Error stream parameter is None.")
-
-        self._stream = stream
-        self._local_mesg_defs = {}
-        self._developer_data_defs = {}
-        self._messages = {}
         self._type_cache = {}
-        self._accumulator = Accumulator()
+        self._mesg_def_cache = {}
 
-        self._fields_with_subfields = []
-        self._fields_to_expand = []
+        self.reset(stream)
 
         self._decode_mode = DecodeMode.NORMAL
 
         self._mesg_listener = None
         self._mesg_definition_listener = None
         self._field_description_listener = None
+        self._decode_stats = None
+        self._mesg_objects = False
+        self._retain_messages = True
+        self.__set_time_range(None)
+        self.__set_downsampling(None, None, None)
         self._apply_scale_and_offset = True
         self._convert_timestamps_to_datetimes = True
         self._convert_types_to_strings = True
@@ -67,6 +538,34 @@ class Decoder:
         self._merge_heart_rates = True
 
 
+    def reset(self, stream: Stream):
+        '''
+        Prepares the decoder to read a new stream. All per-file state, such as message
+        definitions, developer data definitions, accumulated fields and decoded messages,
+        is cleared while caches warmed by previous reads are kept.
+        '''
+        if stream is None:
+            raise RuntimeError("FIT Runtine Error stream parameter is None.")
+
+        self._stream = stream
+        self._local_mesg_defs = {}
+        self._developer_data_defs = {}
+        self._developer_fields = {}
+        self._developer_data_id_mesgs = {}
+        self._messages = {}
+        self._num_field_description_mesgs = 0
+        self._accumulator = Accumulator()
+        self._hr_merger = None
+
+        self._fields_with_subfields = []
+        self._fields_to_expand = []
+
+        # The values of the message being decoded, indexed by the position of each field in the field layout of its definition
+        self._raw_field_values = []
+        self._field_values = []
+        # The positions of the fields added to the message after its definition fields, in the order they were added
+        self._added_field_positions = []
+
     def is_fit(self):
         '''Returns whether the file is a valid fit file.'''
         try:
@@ -74,10 +573,9 @@ class Decoder:
             if file_header_size != _HEADER_WITH_CRC_SIZE and file_header_size != _HEADER_WITHOUT_CRC_SIZE:
                 return False
 
-            if self._stream.get_length() < (file_header_size + _CRCSIZE):
+            if self._stream.get_length() - self._stream.position() < (file_header_size + _CRCSIZE):
                 return False
 
-            # TODO make sure this works with chained files (add offset)
             file_header = self.read_file_header(True)
             if file_header.data_type[0].decode() != ".FIT":
                 return False
@@ -101,7 +599,14 @@ class Decoder:
             if file_header.header_size is _HEADER_WITH_CRC_SIZE and file_header.header_crc != CrcCalculator.calculate_crc(self._stream.slice(0, 12), 0, 12):
                 return False
 
-            file_crc = CrcCalculator.calculate_crc(self._stream.read_bytes(file_header.file_total_size),0, file_header.file_total_size)
+            # Calculate the CRC a slice at a time, so large files are not read into memory at once
+            start = self._stream.position()
+            crc_calculator = CrcCalculator()
+            for data in self._stream.iter_slices(start, start + file_header.file_total_size):
+                crc_calculator.add_bytes(data, 0, len(data))
+            file_crc = crc_calculator.get_crc()
+
+            self._stream.seek(start + file_header.file_total_size)
             crc_from_file = self._stream.read_byte() + (self._stream.read_byte() << 8)
             if crc_from_file != file_crc:
                 return False
@@ -121,8 +626,24 @@ class Decoder:
                 mesg_listener = None,
                 mesg_definition_listener = None,
                 field_description_listener = None,
-                decode_mode = DecodeMode.NORMAL):
-        '''Reads the entire contents of the fit file and returns the decoded messages'''
+                decode_mode = DecodeMode.NORMAL,
+                decode_stats = None,
+                time_range = None,
+                record_step = None,
+                record_min_interval = None,
+                max_records = None,
+                mesg_objects = False,
+                retain_messages = True):
+        '''
+        Reads the entire contents of the fit file and returns the decoded messages. When a
+        time_range of (start, end) is given, only the record messages with timestamps from
+        start to end, inclusive, are decoded and returned. The record messages can be
+        downsampled by keeping every record_step-th record, records at least
+        record_min_interval seconds apart, or at most about max_records records per file. When
+        mesg_objects is True, the messages are returned as compact FitMesg objects instead of
+        dictionaries. When retain_messages is False, the messages are only passed to the
+        mesg_listener and an empty dictionary of messages is returned.
+        '''
         self._apply_scale_and_offset = apply_scale_and_offset
         self._convert_timestamps_to_datetimes = convert_datetimes_to_dates
         self._convert_types_to_strings = convert_types_to_strings
@@ -134,40 +655,277 @@ class Decoder:
         self._mesg_definition_listener = mesg_definition_listener
         self._field_description_listener = field_description_listener
         self._decode_mode = decode_mode
+        self._decode_stats = decode_stats
+        self._mesg_objects = mesg_objects
+        self._retain_messages = retain_messages
+        self.__set_time_range(time_range)
+        self.__set_downsampling(record_step, record_min_interval, max_records)
 
         self._local_mesg_defs = {}
         self._developer_data_defs = {}
+        self._developer_fields = {}
+        self._developer_data_id_mesgs = {}
         self._messages = {}
+        self._num_field_description_mesgs = 0
+
+        if decode_stats is not None:
+            decode_start = perf_counter()
+            start_position = self._stream.position()
 
         errors = []
         try:
             if self._merge_heart_rates and (not self._apply_scale_and_offset or not self._expand_components):
                 self.__raise_error("merge_heart_rates requires both apply_scale_and_offset and expand_components to be enabled!")
 
+            if (record_step is not None and record_step < 1) or (max_records is not None and max_records < 1):
+                self.__raise_error("record_step and max_records must be at least 1!")
+
+            if self._merge_heart_rates is True and (mesg_listener is None or self.__has_hr_mesgs() is True):
+                # Records are passed to the listener by the merger, once their heart rate has been merged
+                record_listener = self.__call_record_listener if mesg_listener is not None else None
+                self._hr_merger = hr_mesg_utils.HeartRateMerger(record_listener)
+            else:
+                # Without heart rate messages nothing is merged, so records are passed to the listener as they are decoded
+                self._hr_merger = None
+
             while self._stream.position() < self._stream.get_length():
                 self.__decode_next_file()
 
-            if self._merge_heart_rates is True and 'hr_mesgs' in self._messages:
-                hr_mesg_utils.merge_heart_rates(self._messages['hr_mesgs'], self._messages['record_mesgs'])
+            if self._hr_merger is not None:
+                if decode_stats is not None:
+                    hr_merge_start = perf_counter()
+                self._hr_merger.flush()
+                if decode_stats is not None:
+                    decode_stats.add_time('hr_merge', hr_merge_start)
 
         except (KeyboardInterrupt, SystemExit):
             raise
         except Exception as error:
             errors.append(error)
 
+        if decode_stats is not None:
+            decode_stats.bytes_read += self._stream.position() - start_position
+            decode_stats.decode_time += perf_counter() - decode_start
+            self._decode_stats = None
+
         return self._messages, errors
 
+    def peek_summary(self, mesg_nums = None,
+                apply_scale_and_offset = True,
+                convert_datetimes_to_dates = True,
+                convert_types_to_strings = True,
+                expand_sub_fields = True,
+                expand_components = True):
+        '''
+        Reads only the given message types, by default the file_id and session messages,
+        and returns the decoded messages. The record boundaries of each file are found with
+        a byte-level scan of the definition and record headers, and only the selected
+        messages, their definitions and any developer data messages are decoded. The data of
+        all other messages is never decoded and the file CRC is not checked.
+        '''
+        if mesg_nums is None:
+            mesg_nums = [Profile['mesg_num']['FILE_ID'], Profile['mesg_num']['SESSION']]
+
+        self._apply_scale_and_offset = apply_scale_and_offset
+        self._convert_timestamps_to_datetimes = convert_datetimes_to_dates
+        self._convert_types_to_strings = convert_types_to_strings
+        self._enable_crc_check = False
+        self._expand_sub_fields = expand_sub_fields
+        self._expand_components = expand_components
+        self._merge_heart_rates = False
+        self._mesg_listener = None
+        self._mesg_definition_listener = None
+        self._field_description_listener = None
+        self._decode_stats = None
+        self._mesg_objects = False
+        self._retain_messages = True
+        self.__set_time_range(None)
+        self.__set_downsampling(None, None, None)
+        self._decode_mode = DecodeMode.NORMAL
+
+        self._local_mesg_defs = {}
+        self._developer_data_defs = {}
+        self._developer_fields = {}
+        self._developer_data_id_mesgs = {}
+        self._messages = {}
+        self._num_field_description_mesgs = 0
+        self._hr_merger = None
+
+        selected_mesg_nums = set(mesg_nums)
+        selected_mesg_nums.add(Profile['mesg_num']['DEVELOPER_DATA_ID'])
+        selected_mesg_nums.add(Profile['mesg_num']['FIELD_DESCRIPTION'])
+
+        errors = []
+        try:
+            while self._stream.position() < self._stream.get_length():
+                self.__peek_next_file(selected_mesg_nums)
+
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception as error:
+            errors.append(error)
+
+        return self._messages, errors
+
+    def scan_chained_files(self):
+        '''
+        Walks the file headers of the stream, starting from the current position, using each
+        header's data size to find the next chained file. No records are decoded. Returns a list
+        of (offset, size) tuples, where size includes the file header and CRC. The stream
+        position is restored before returning.
+        '''
+        starting_position = self._stream.position()
+        stream_length = self._stream.get_length()
+
+        segments = []
+        try:
+            position = starting_position
+            while position < stream_length:
+                self._stream.seek(position)
+
+                if self.is_fit() is False:
+                    self.__raise_error("The file is not a fit file.")
+
+                file_header = self.read_file_header(False)
+                size = file_header.header_size + file_header.data_size + _CRCSIZE
+
+                if position + size > stream_length:
+                    self.__raise_error("The file is shorter than the size given in its file header.")
+
+                segments.append((position, size))
+                position += size
+        finally:
+            self._stream.seek(starting_position)
+
+        return segments
+
+    def read_chained(self, workers = None, merge_results = True, **read_options):
+        '''
+        Reads chained fit files by decoding each file in the stream in a separate worker
+        process. The read_options are the keyword arguments accepted by read(), except for the
+        listeners, which cannot be called from worker processes. A decode_stats object is
+        totalled from the statistics of each worker process. Each file is decoded
+        independently, so accumulated fields and heart rate merging do not carry over from one
+        chained file to the next. When merge_results is True the messages and errors of all of
+        the files are combined in file order and returned as (messages, errors). Otherwise a list
+        with a (messages, errors) tuple for each file is returned, along with the errors raised
+        while finding the chained files.
+        '''
+        for listener in ('mesg_listener', 'mesg_definition_listener', 'field_description_listener'):
+            if read_options.get(listener) is not None:
+                raise ValueError(f"{listener} is not supported when reading chained files in worker processes")
+
+        decode_stats = read_options.pop('decode_stats', None)
+        collect_stats = decode_stats is not None
+
+        results = []
+        errors = []
+        try:
+            self._stream.set_crc_calculator(None)
+
+            segments = []
+            for offset, size in self.scan_chained_files():
+                self._stream.seek(offset)
+                segments.append(self._stream.read_bytes(size))
+
+            if workers == 1 or len(segments) <= 1:
+                segment_results = [_read_segment(segment, read_options, collect_stats) for segment in segments]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    segment_results = list(executor.map(_read_segment, segments, [read_options] * len(segments), [collect_stats] * len(segments)))
+
+            for result, segment_stats in segment_results:
+                results.append(result)
+                if segment_stats is not None:
+                    decode_stats.merge(segment_stats)
+
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception as error:
+            errors.append(error)
+
+        if merge_results is False:
+            return results, errors
+
+        messages = {}
+        for segment_messages, segment_errors in results:
+            for messages_key, segment_mesgs in segment_messages.items():
+                messages.setdefault(messages_key, []).extend(segment_mesgs)
+            errors.extend(segment_errors)
+
+        return messages, errors
+
+    def iter_raw_records(self):
+        '''
+        Yields a RawRecord for each definition and data record in the stream, including the
+        records of chained files, without decoding any field data. The file CRC is not checked.
+        '''
+        while self._stream.position() < self._stream.get_length():
+            if self.is_fit() is False:
+                self.__raise_error("The file is not a fit file.")
+
+            self._stream.set_crc_calculator(None)
+            file_header = self.read_file_header(False)
+
+            data = memoryview(self._stream.read_bytes(file_header.data_size))
+            self._stream.read_bytes(_CRCSIZE)
+
+            definitions = {}
+            for record_header, start, end, global_mesg_num, _ in _walk_records(data):
+                record = data[start:end]
+
+                if record_header & FIT.MESG_DEFINITION_MASK == FIT.MESG_DEFINITION_MASK:
+                    definitions[record_header & FIT.LOCAL_MESG_NUM_MASK] = record
+                    yield RawRecord(record_header, global_mesg_num, record, record)
+                else:
+                    yield RawRecord(record_header, global_mesg_num, record, definitions[record_header & FIT.LOCAL_MESG_NUM_MASK])
+
+    def __peek_next_file(self, mesg_nums):
+        position = self._stream.position()
+
+        if self.is_fit() is False:
+            self.__raise_error("The file is not a fit file.")
+
+        self._stream.set_crc_calculator(None)
+        file_header = self.read_file_header(False)
+
+        data_start = position + file_header.header_size
+        data = self._stream.read_bytes(file_header.data_size)
+
+        active_mesg_defs = {}
+        for definition_offset, message_offset in _scan_record_offsets(data, mesg_nums):
+            local_mesg_num = data[message_offset] & FIT.LOCAL_MESG_NUM_MASK
+
+            if active_mesg_defs.get(local_mesg_num) != definition_offset:
+                self._stream.seek(data_start + definition_offset)
+                self.__decode_mesg_def()
+                active_mesg_defs[local_mesg_num] = definition_offset
+
+            self._stream.seek(data_start + message_offset)
+            self.__decode_message()
+
+        self._stream.seek(data_start + file_header.data_size + _CRCSIZE)
+
     def __decode_next_file(self):
         position = self._stream.position()
 
         if self._decode_mode == DecodeMode.NORMAL and self.is_fit() is False:
             self.__raise_error("The file is not a fit file.")
 
-        crc_calculator = CrcCalculator() if self._enable_crc_check is True else None
+        if self._enable_crc_check is True:
+            crc_calculator = CrcCalculator() if self._decode_stats is None else _TimedCrcCalculator(self._decode_stats)
+        else:
+            crc_calculator = None
         self._stream.set_crc_calculator(crc_calculator)
 
+        if self._decode_stats is not None:
+            self._decode_stats.files_read += 1
+
         file_header = self.read_file_header(False, decode_mode=self._decode_mode)
 
+        if self._max_records is not None:
+            self._file_record_step = max(self._record_step, -(-self.__count_records(file_header.data_size) // self._max_records))
+
         # Read data definitions and messages
         while self._stream.position() < (position + file_header.header_size + file_header.data_size):
             self.__decode_next_record()
@@ -194,34 +952,81 @@ class Decoder:
             self.__decode_mesg_def()
 
     def __decode_mesg_def(self):
-        record_header = self._stream.read_byte()
+        definition_bytes = self._stream.read_bytes(_MESG_DEF_FIXED_SIZE)
+        record_header = definition_bytes[0]
+        definition_bytes += self._stream.read_bytes(definition_bytes[5] * _FIELD_DEF_SIZE)
+
+        if record_header & FIT.DEV_DATA_MASK == FIT.DEV_DATA_MASK:
+            num_dev_fields = self._stream.read_byte()
+            definition_bytes += bytes([num_dev_fields]) + self._stream.read_bytes(num_dev_fields * _FIELD_DEF_SIZE)
+
+        # Files from the same device repeat the same definitions, so the built definitions are kept across files
+        cached_definition = self._mesg_def_cache.get(definition_bytes)
+        if cached_definition is None:
+            cached_definition = self.__build_mesg_def(definition_bytes)
+
+            if len(self._mesg_def_cache) >= _MESG_DEF_CACHE_SIZE:
+                del self._mesg_def_cache[next(iter(self._mesg_def_cache))]
+            self._mesg_def_cache[definition_bytes] = cached_definition
+        elif self._decode_stats is not None:
+            self._decode_stats.definition_cache_hits += 1
+
+        mesg_def, local_mesg_def = cached_definition
+
+        decode_stats = self._decode_stats
+        if decode_stats is not None:
+            decode_stats.definition_counts[local_mesg_def['name']] = decode_stats.definition_counts.get(local_mesg_def['name'], 0) + 1
+
+        if self._mesg_definition_listener is not None:
+            if decode_stats is not None:
+                listener_start = perf_counter()
+            self._mesg_definition_listener({
+                **mesg_def,
+                "field_definitions": [{**field_definition} for field_definition in mesg_def["field_definitions"]],
+                "developer_field_defs": [{**developer_field_def} for developer_field_def in mesg_def["developer_field_defs"]],
+            })
+            if decode_stats is not None:
+                decode_stats.add_time('listeners', listener_start)
+
+        #TODO add option for unknown data
+
+        self._local_mesg_defs[mesg_def["local_mesg_num"]] = local_mesg_def
+
+        messages_key = local_mesg_def['messages_key'] if 'messages_key' in local_mesg_def else None
+        if self._retain_messages is True and messages_key not in self._messages:
+            self._messages[messages_key] = []
+
+    def __build_mesg_def(self, definition_bytes):
+        record_header = definition_bytes[0]
 
         struct_format_string = ''
         mesg_def = {}
         mesg_def["record_header"] = record_header
         mesg_def["local_mesg_num"] = record_header & FIT.LOCAL_MESG_NUM_MASK
-        mesg_def["reserved"] = self._stream.read_byte()
+        mesg_def["reserved"] = definition_bytes[1]
 
-        mesg_def["architecture"] = self._stream.read_byte()
+        mesg_def["architecture"] = definition_bytes[2]
         mesg_def["endianness"] = Endianness.LITTLE if mesg_def["architecture"] == 0 else Endianness.BIG
 
         struct_format_string += '>' if mesg_def["endianness"] == Endianness.BIG else '<'
         mesg_def["struct_format_string"] = struct_format_string
 
-        mesg_def["global_mesg_num"] = self._stream.read_unint_16(mesg_def["endianness"])
-        mesg_def["num_fields"] = self._stream.read_byte()
+        mesg_def["global_mesg_num"] = int.from_bytes(definition_bytes[3:5], mesg_def["endianness"])
+        mesg_def["num_fields"] = definition_bytes[5]
         mesg_def["field_definitions"] = []
         mesg_def["developer_field_defs"] = []
         mesg_def["message_size"] = 0
         mesg_def["developer_data_size"] = 0
 
         format_parts = [struct_format_string]
+        offset = _MESG_DEF_FIXED_SIZE
         for i in range(mesg_def["num_fields"]):
             field_definition = {
-                "field_id": self._stream.read_byte(),
-                "size": self._stream.read_byte(),
-                "base_type": self._stream.read_byte() & FIT.BASE_TYPE_MASK,
+                "field_id": definition_bytes[offset],
+                "size": definition_bytes[offset + 1],
+                "base_type": definition_bytes[offset + 2] & FIT.BASE_TYPE_MASK,
             }
+            offset += _FIELD_DEF_SIZE
 
             if field_definition["base_type"] not in FIT.BASE_TYPE_DEFINITIONS:
                 self.__raise_error("Invalid field definition base type")
@@ -241,22 +1046,21 @@ class Decoder:
         mesg_def["struct_format_string"] = ''.join(format_parts)
 
         if record_header & FIT.DEV_DATA_MASK == FIT.DEV_DATA_MASK:
-            num_dev_fields = self._stream.read_byte()
+            num_dev_fields = definition_bytes[offset]
+            offset += 1
 
             for i in range(num_dev_fields):
                 developer_field_definition = {
-                    "field_definition_number": self._stream.read_byte(),
-                    "size": self._stream.read_byte(),
-                    "developer_data_index": self._stream.read_byte(),
+                    "field_definition_number": definition_bytes[offset],
+                    "size": definition_bytes[offset + 1],
+                    "developer_data_index": definition_bytes[offset + 2],
                     "endianness": Endianness.LITTLE if mesg_def["architecture"] == 0 else Endianness.BIG
                 }
+                offset += _FIELD_DEF_SIZE
 
                 mesg_def["developer_field_defs"].append(developer_field_definition)
                 mesg_def["developer_data_size"] += developer_field_definition["size"]
 
-        if self._mesg_definition_listener is not None:
-            self._mesg_definition_listener({**mesg_def})
-
         if mesg_def["global_mesg_num"] in Profile['messages']:
             message_profile = Profile['messages'][mesg_def["global_mesg_num"]]
         else:
@@ -267,14 +1071,36 @@ class Decoder:
                 'fields': {}
             }
 
-        #TODO add option for unknown data
-
         # Add the profile to the local message definition
-        self._local_mesg_defs[mesg_def["local_mesg_num"]] = {**mesg_def, **message_profile}
-
-        messages_key = message_profile['messages_key'] if 'messages_key' in message_profile else None
-        if message_profile is not None and messages_key not in self._messages:
-            self._messages[messages_key] = []
+        local_mesg_def = {**mesg_def, **message_profile}
+        local_mesg_def["decode_plan"] = _build_decode_plan(mesg_def["field_definitions"], message_profile['fields'])
+        local_mesg_def["has_duplicate_fields"] = len({field["field_id"] for field in mesg_def["field_definitions"]}) != len(mesg_def["field_definitions"])
+        local_mesg_def["field_layout"], local_mesg_def["field_layout_profiles"], local_mesg_def["num_definition_fields"] = _build_field_layout(
+            local_mesg_def["decode_plan"], message_profile['fields'])
+        local_mesg_def["field_positions"] = {field_name: position for position, field_name in enumerate(local_mesg_def["field_layout"])}
+
+        # The field description and struct format of each developer field are resolved when its first value is read
+        local_mesg_def["developer_field_plan"] = [{
+            "key": (developer_field_def["developer_data_index"], developer_field_def["field_definition_number"]),
+            "size": developer_field_def["size"],
+            "definition": developer_field_def,
+            "field_profile": None,
+            "struct_format_string": None,
+            "is_string": False,
+        } for developer_field_def in mesg_def["developer_field_defs"]]
+        local_mesg_def["timestamp_index"] = _find_timestamp_index(local_mesg_def["decode_plan"])
+        local_mesg_def["has_accumulated_components"] = _has_accumulated_components(local_mesg_def["decode_plan"], message_profile['fields'])
+        local_mesg_def["has_accumulated_fields"] = local_mesg_def["has_accumulated_components"] or any(
+            is_accumulated for *_, is_accumulated in local_mesg_def["decode_plan"])
+
+        # Developer data id and field description messages also update the developer data definitions
+        has_simple_decode_plan = (self._use_simple_decode_plans is True and len(mesg_def["developer_field_defs"]) == 0
+            and mesg_def["global_mesg_num"] not in (Profile['mesg_num']['DEVELOPER_DATA_ID'], Profile['mesg_num']['FIELD_DESCRIPTION']))
+        local_mesg_def["simple_decode_plan"] = _build_simple_decode_plan(local_mesg_def["decode_plan"], self._type_cache) if has_simple_decode_plan else None
+        local_mesg_def["mesg_decoder_options"] = None
+        local_mesg_def["mesg_decoder"] = None
+
+        return mesg_def, local_mesg_def
 
     def __decode_message(self):
         record_header = self._stream.read_byte()
@@ -285,31 +1111,91 @@ class Decoder:
         else:
             self.__raise_error("Invalid local message number")
 
-        messages_key = mesg_def['messages_key']
+        is_record = mesg_def['global_mesg_num'] == Profile['mesg_num']['RECORD']
+        is_time_range_filtered = is_record and self._time_range is not None
+        if is_time_range_filtered and self._past_time_range is True:
+            # The records are in time order and past the end of the time range, so the rest are skipped
+            self._stream.read_bytes(mesg_def['message_size'] + mesg_def['developer_data_size'])
+            return
 
         # Decode regular message
-        message = {}
-        self._fields_to_expand = []
-        self._fields_with_subfields = []
+        raw_values = self.__read_raw_values(mesg_def["message_size"], mesg_def["struct_format_string"])
 
-        message = self.__read_message(mesg_def)
+        if is_time_range_filtered and self.__is_outside_time_range(mesg_def, raw_values):
+            # The heart rate window of the first record in the time range starts at the timestamp of the record before it
+            start = self._time_range[0]
+            self.__skip_message(mesg_def, raw_values, start is not None and raw_values[mesg_def['timestamp_index']] < start)
+            return
+
+        if is_record and self._is_downsampling is True and self.__is_downsampled(mesg_def, raw_values):
+            # Dropped records still close the heart rate window of the next record, as they would without downsampling
+            self.__skip_message(mesg_def, raw_values, True)
+            return
+
+        if mesg_def['simple_decode_plan'] is not None and self._mesg_objects is False:
+            message = self.__decode_simple_message(mesg_def, raw_values)
+        else:
+            message = self.__decode_full_message(mesg_def, raw_values)
+
+        # Append decoded message
+        if self._retain_messages is True:
+            self._messages[mesg_def['messages_key']].append(message)
+
+        decode_stats = self._decode_stats
+        if decode_stats is not None:
+            decode_stats.message_counts[mesg_def['name']] = decode_stats.message_counts.get(mesg_def['name'], 0) + 1
+
+        if self._mesg_listener is not None and (self._hr_merger is None or is_record is False):
+            if decode_stats is not None:
+                listener_start = perf_counter()
+            self._mesg_listener(mesg_def['global_mesg_num'], message)
+            if decode_stats is not None:
+                decode_stats.add_time('listeners', listener_start)
+
+        if self._hr_merger is not None:
+            if decode_stats is not None:
+                hr_merge_start = perf_counter()
+
+            if mesg_def['global_mesg_num'] == Profile['mesg_num']['HR']:
+                self._hr_merger.add_hr_mesg(message)
+            elif mesg_def['global_mesg_num'] == Profile['mesg_num']['RECORD']:
+                self._hr_merger.add_record_mesg(message)
+
+            if decode_stats is not None:
+                decode_stats.add_time('hr_merge', hr_merge_start)
+
+        if mesg_def['global_mesg_num'] == Profile['mesg_num']['FIELD_DESCRIPTION'] and self._field_description_listener is not None:
+            if decode_stats is not None:
+                listener_start = perf_counter()
+            developer_data_id_mesg = self._developer_data_id_mesgs.get(message.get('developer_data_index'), {})
+            self._field_description_listener(message.get('key'), {**developer_data_id_mesg}, {**message})
+            if decode_stats is not None:
+                decode_stats.add_time('listeners', listener_start)
+
+    def __decode_full_message(self, mesg_def, raw_values):
+        self.__read_message(mesg_def, raw_values)
 
         developer_fields = {}
 
         # Decode developer data if it exists
-        if len(mesg_def["developer_field_defs"]) > 0:
+        if len(mesg_def["developer_field_plan"]) > 0:
 
-            for developer_field_def in mesg_def['developer_field_defs']:
-                field_profile = self.__lookup_developer_data_field(developer_field_def)
+            for developer_field in mesg_def['developer_field_plan']:
+                field_profile = self._developer_fields.get(developer_field['key'])
                 if field_profile is None:
                     # If there is not a field definition, then read past the field data.
-                    self._stream.read_bytes(developer_field_def['size'])
+                    self._stream.read_bytes(developer_field['size'])
                     continue
 
-                struct_format_string = self.__build_dev_data_struct_string(developer_field_def, field_profile)
-                field_value = self.__read_raw_value(developer_field_def['size'], struct_format_string)
+                if developer_field['field_profile'] is not field_profile:
+                    # Built once for each field description the definition is read with
+                    developer_field['struct_format_string'] = self.__build_dev_data_struct_string(developer_field['definition'], field_profile)
+                    developer_field['is_string'] = field_profile['fit_base_type_id'] == FIT.BASE_TYPE['STRING']
+                    developer_field['field_profile'] = field_profile
+
+                field_value = self.__read_raw_value(developer_field['size'], developer_field['struct_format_string'])
 
-                if field_profile['fit_base_type_id'] == FIT.BASE_TYPE['STRING']:
+                if developer_field['is_string'] is True:
                     field_value = util._convert_string(field_value)
                 #NOTE possible point to scrub invalids????
 
@@ -317,165 +1203,373 @@ class Decoder:
                     developer_fields[field_profile['key']] = field_value
 
         if mesg_def['global_mesg_num'] == Profile['mesg_num']['DEVELOPER_DATA_ID']:
-            self.__add_developer_data_id_to_profile(message)
+            self.__add_developer_data_id_to_profile(self.__get_raw_fields(mesg_def))
+            message = self.__create_message(mesg_def)
+            # The first developer data id of an index is the one passed to the field description listener
+            self._developer_data_id_mesgs.setdefault(message.get('developer_data_index'), message)
 
         elif mesg_def['global_mesg_num'] == Profile['mesg_num']['FIELD_DESCRIPTION']:
-            message['key'] = len(self._messages[messages_key])
-            self.__add_field_description_to_profile(message)
+            raw_fields = self.__get_raw_fields(mesg_def)
+            # The key is the index of the field description in the decoded messages, whether they are retained or not
+            raw_fields['key'] = self._num_field_description_mesgs
+            self._num_field_description_mesgs += 1
+            self.__add_field_description_to_profile(raw_fields)
+            message = self.__create_message(mesg_def)
+            message['key'] = raw_fields['key']
 
         else:
-            message = self.__apply_profile(mesg_def, message)
-
-        self.__clean_message(message)
+            self.__apply_profile(mesg_def)
+            message = self.__create_message(mesg_def)
 
         if len(developer_fields) != 0:
             message['developer_fields'] = developer_fields
 
-        # Append decoded message
-        self._messages[messages_key].append(message)
+        return message
 
-        if self._mesg_listener is not None:
-            self._mesg_listener(mesg_def['global_mesg_num'], message)
+    def __decode_simple_message(self, mesg_def, raw_values):
+        '''Decodes a message with the simple decode plan of its definition, in a single pass over the unpacked values.'''
+        decode_stats = self._decode_stats
+        if decode_stats is not None:
+            stage_start = perf_counter()
+
+        convert_timestamps_to_datetimes = self._convert_timestamps_to_datetimes
+        convert_types_to_strings = self._convert_types_to_strings
+        apply_scale_and_offset = self._apply_scale_and_offset
+
+        options = (convert_timestamps_to_datetimes, convert_types_to_strings, apply_scale_and_offset)
+        if mesg_def['mesg_decoder_options'] != options:
+            # Looked up again only when a read uses different options
+            mesg_def['mesg_decoder'] = _get_mesg_decoder(mesg_def['global_mesg_num'], mesg_def['field_definitions'],
+                mesg_def['simple_decode_plan'], options) if self._use_mesg_decoders is True else None
+            mesg_def['mesg_decoder_options'] = options
+
+        if mesg_def['mesg_decoder'] is not None:
+            message = mesg_def['mesg_decoder'](raw_values, self._accumulator)
+            if decode_stats is not None:
+                decode_stats.add_time('transform', stage_start)
+            return message
 
-        if mesg_def['global_mesg_num'] == Profile['mesg_num']['FIELD_DESCRIPTION'] and self._field_description_listener is not None:
-            developer_data_id_mesg = next(
-                (m for m in self._messages.get('developer_data_id_mesgs', [])
-                 if m.get('developer_data_index') == message.get('developer_data_index')),
-                {})
-            self._field_description_listener(message.get('key'), {**developer_data_id_mesg}, {**message})
+        message = {}
+        index = 0
+        for (field_name, field_type, field_profile, invalid, num_elements, value_kind,
+             is_date_time, types, scale, offset, is_accumulated) in mesg_def['simple_decode_plan']:
+            if value_kind == _SINGLE_VALUE:
+                field_value = raw_values[index]
+                index += 1
+                if field_value == invalid:
+                    continue
+
+                if is_accumulated:
+                    # Components of other messages may accumulate onto the value of the field
+                    self.__set_accumulated_value(mesg_def, field_profile, field_value)
+
+                if is_date_time and convert_timestamps_to_datetimes:
+                    field_value = util.convert_timestamp_to_datetime(field_value)
+                elif types is not None:
+                    if convert_types_to_strings:
+                        field_value = types.get(str(field_value), field_value)
+                elif scale is not None and apply_scale_and_offset:
+                    field_value = (field_value / scale if scale != 1 else field_value) - offset
+
+                message[field_name] = field_value
+                continue
+
+            if value_kind == _STRING_VALUE:
+                raw_value = util._convert_string(raw_values[index])
+                index += 1
+
+            elif value_kind == _BYTE_ARRAY_VALUE:
+                raw_value = raw_values[index : index + num_elements]
+                if util._only_invalid_values(raw_value, invalid) is True:
+                    raw_value = None
+                index += num_elements
+
+            else:
+                raw_value = util._mask_invalid_values(raw_values, index, num_elements, invalid)
+                index += num_elements
+
+            if raw_value is None:
+                continue
+
+            if is_accumulated:
+                self.__set_accumulated_value(mesg_def, field_profile, raw_value)
+
+            field_value = raw_value
+            if is_date_time and convert_timestamps_to_datetimes:
+                field_value = util.convert_timestamp_to_datetime(raw_value)
+            else:
+                if convert_types_to_strings:
+                    field_value = self.__convert_type_to_string(field_type, raw_value)
+
+                if apply_scale_and_offset and field_type in FIT.NUMERIC_FIELD_TYPES:
+                    field_value = self.__apply_scale_and_offset(field_profile, raw_value)
+
+            # Arrays of a single value are reduced to the value
+            message[field_name] = field_value[0] if isinstance(field_value, list) and len(field_value) == 1 else field_value
+
+        if decode_stats is not None:
+            decode_stats.add_time('transform', stage_start)
+
+        return message
 
     def __decode_compressed_timestamp_message(self):
         self.__raise_error("Compressed timestamp messages are not currently supported")
 
-    def __read_message(self, mesg_def):
-        message = {}
-        raw_values = self.__read_raw_values(mesg_def["message_size"], mesg_def["struct_format_string"])
+    def __set_time_range(self, time_range):
+        if time_range is None:
+            self._time_range = None
+        else:
+            start, end = time_range
+            self._time_range = (_to_fit_timestamp(start), _to_fit_timestamp(end))
 
-        index = 0
-        for field in mesg_def['field_definitions']:
-            base_type_definition = FIT.BASE_TYPE_DEFINITIONS[field["base_type"]]
-            invalid = base_type_definition["invalid"]
-            num_elements = field["num_field_elements"]
+        self._last_record_timestamp = None
+        self._records_in_time_order = True
+        self._past_time_range = False
 
-            field_id = field["field_id"]
-            field_profile = mesg_def['fields'][field_id] if field_id in mesg_def['fields'] else None
-            field_name = field_profile['name'] if field_id in mesg_def['fields'] else field_id
+    def __is_outside_time_range(self, mesg_def, raw_values):
+        timestamp_index = mesg_def['timestamp_index']
+        if timestamp_index is None or raw_values[timestamp_index] == _INVALID_TIMESTAMP:
+            return False
 
-            if field_profile is not None and 'has_components' in field_profile:
-                convert_invalids_to_none = not field_profile['has_components']
-            else:
-                convert_invalids_to_none = True
+        timestamp = raw_values[timestamp_index]
+        if self._last_record_timestamp is not None and timestamp < self._last_record_timestamp:
+            self._records_in_time_order = False
+        self._last_record_timestamp = timestamp
+
+        start, end = self._time_range
+        if end is not None and timestamp > end:
+            self._past_time_range = self._records_in_time_order
+            return True
+
+        return start is not None and timestamp < start
+
+    def __set_downsampling(self, record_step, record_min_interval, max_records):
+        self._record_step = record_step if record_step is not None else 1
+        self._record_min_interval = record_min_interval
+        self._max_records = max_records
+        self._is_downsampling = self._record_step > 1 or record_min_interval is not None or max_records is not None
+
+        self._file_record_step = self._record_step
+        self._record_index = 0
+        self._last_sampled_timestamp = None
+
+    def __count_records(self, data_size):
+        # Walked a slice at a time, so the data section is not read into memory at once
+        start = self._stream.position()
+        num_records = 0
+        try:
+            for record_header, _, _, global_mesg_num, _ in _walk_record_slices(self._stream.iter_slices(start, start + data_size)):
+                if global_mesg_num == Profile['mesg_num']['RECORD'] and record_header & FIT.MESG_DEFINITION_MASK == _MESG_HEADER_MASK:
+                    num_records += 1
+        except Exception:
+            # The count is only used to choose the record step, so decoding reports any invalid records
+            pass
+
+        return num_records
+
+    def __is_downsampled(self, mesg_def, raw_values):
+        record_index = self._record_index
+        self._record_index += 1
+
+        if record_index % self._file_record_step != 0:
+            return True
+
+        if self._record_min_interval is not None:
+            timestamp_index = mesg_def['timestamp_index']
+            if timestamp_index is None or raw_values[timestamp_index] == _INVALID_TIMESTAMP:
+                return False
+
+            timestamp = raw_values[timestamp_index]
+            if self._last_sampled_timestamp is not None and timestamp - self._last_sampled_timestamp < self._record_min_interval:
+                return True
+            self._last_sampled_timestamp = timestamp
+
+        return False
 
+    def __has_hr_mesgs(self):
+        '''Returns whether the stream has any heart rate messages, or True if the stream can not be walked.'''
+        position = self._stream.position()
+        crc_calculator = self._stream.get_crc_caclulator()
+        self._stream.set_crc_calculator(None)
+
+        try:
+            while self._stream.position() < self._stream.get_length():
+                file_header = self.read_file_header(False, decode_mode=self._decode_mode)
+
+                # Walked a slice at a time, so the data section is not read into memory at once
+                start = self._stream.position()
+                for record_header, _, _, global_mesg_num, _ in _walk_record_slices(self._stream.iter_slices(start, start + file_header.data_size)):
+                    if global_mesg_num == Profile['mesg_num']['HR'] and record_header & FIT.MESG_DEFINITION_MASK != FIT.MESG_DEFINITION_MASK:
+                        return True
+
+                if start + file_header.data_size + _CRCSIZE > self._stream.get_length():
+                    # The file is truncated, so decoding reports the error
+                    return True
+
+                self._stream.seek(start + file_header.data_size + _CRCSIZE)
+        except Exception:
+            # Decoding reports any errors, and the records are held for merging in case there are heart rates
+            return True
+        finally:
+            self._stream.seek(position)
+            self._stream.set_crc_calculator(crc_calculator)
+
+        return False
+
+    def __call_record_listener(self, message):
+        decode_stats = self._decode_stats
+        if decode_stats is not None:
+            listener_start = perf_counter()
+        self._mesg_listener(Profile['mesg_num']['RECORD'], message)
+        if decode_stats is not None:
+            decode_stats.add_time('listeners', listener_start)
+
+    def __skip_message(self, mesg_def, raw_values, add_to_hr_merger):
+        self._stream.read_bytes(mesg_def['developer_data_size'])
+
+        timestamp_index = mesg_def['timestamp_index']
+        if (add_to_hr_merger is True and self._hr_merger is not None and timestamp_index is not None
+                and raw_values[timestamp_index] != _INVALID_TIMESTAMP):
+            self._hr_merger.add_record_mesg({'timestamp': raw_values[timestamp_index]}, notify=False)
+
+        # Skipped messages are not transformed, but accumulated values must still be tracked
+        if mesg_def['has_accumulated_fields'] is True:
+            self.__read_message(mesg_def, raw_values)
+
+            if mesg_def['has_accumulated_components'] is True:
+                self.__expand_sub_fields(mesg_def)
+                self.__expand_components(mesg_def)
+
+    def __read_message(self, mesg_def, raw_values):
+        num_fields = len(mesg_def['field_layout'])
+        raw_field_values = self._raw_field_values = [None] * num_fields
+        self._field_values = [_UNTRANSFORMED] * num_fields
+        self._added_field_positions.clear()
+        self._fields_with_subfields.clear()
+        self._fields_to_expand.clear()
+
+        has_duplicate_fields = mesg_def['has_duplicate_fields']
+        field_positions = mesg_def['field_positions']
+
+        index = 0
+        # Without duplicate fields, the position of each field in the layout is its position in the definition
+        for position, (field_id, field_name, field_profile, invalid, num_elements, value_kind, convert_invalids_to_none,
+             has_sub_fields, has_components, is_accumulated) in enumerate(mesg_def['decode_plan']):
             field_value = None
 
             # Fields with strings or string arrays
-            if base_type_definition['type'] == FIT.BASE_TYPE["STRING"]:
+            if value_kind == _STRING_VALUE:
                 field_value = util._convert_string(raw_values[index])
+                index += 1
 
             # Fields with an array of values
-            elif num_elements > 1:
-                field_value = []
-
-                if(base_type_definition['type'] == FIT.BASE_TYPE["BYTE"]):
-                    raw_array = raw_values[index : index + num_elements]
-                    field_value = raw_array if util._only_invalid_values(raw_array, invalid) is False else None
+            elif value_kind == _BYTE_ARRAY_VALUE:
+                raw_array = raw_values[index : index + num_elements]
+                field_value = raw_array if util._only_invalid_values(raw_array, invalid) is False else None
+                index += num_elements
+
+            elif value_kind == _ARRAY_VALUE:
+                if convert_invalids_to_none:
+                    field_value = util._mask_invalid_values(raw_values, index, num_elements, invalid)
                 else:
-                    for i in range(num_elements):
-                        raw_value = raw_values[index + i] if raw_values[index + i] != invalid or not convert_invalids_to_none else None
-                        field_value.append(raw_value)
-
-                    if self.__is_array_all_none(field_value) is True:
-                        field_value = None
+                    field_value = raw_values[index : index + num_elements]
+                index += num_elements
 
             # Fields with a single value
             else:
                 if raw_values[index] != invalid or not convert_invalids_to_none:
                     field_value = raw_values[index]
+                index += 1
 
             if field_value is not None:
-                message[field_name] = {
-                'raw_field_value': field_value,
-                'field_definition_number': field_id
-                }
+                if has_duplicate_fields is True:
+                    position = field_positions[field_name]
+                raw_field_values[position] = field_value
 
-                if field_profile and len(field_profile['sub_fields']) > 0:
+                if has_sub_fields:
                     self._fields_with_subfields.append(field_name)
 
-                if field_profile and field_profile['has_components'] is True:
+                if has_components:
                     self._fields_to_expand.append(field_name)
 
-                if field_profile and field_profile['is_accumulated'] is True:
-                    self.__set_accumulated_value(mesg_def, message, field_profile, field_value)
-
-            index += num_elements if base_type_definition['type'] != FIT.BASE_TYPE["STRING"] else 1
-
-        return message
+                if is_accumulated:
+                    self.__set_accumulated_value(mesg_def, field_profile, field_value)
 
-    def __apply_profile(self, mesg_def: dict, raw_message: dict):
-        message = raw_message
+    def __apply_profile(self, mesg_def: dict):
+        decode_stats = self._decode_stats
+        if decode_stats is None:
+            self.__expand_sub_fields(mesg_def)
 
+            self.__expand_components(mesg_def)
 
-        self.__expand_sub_fields(mesg_def['global_mesg_num'], message)
+            self.__transform_values(mesg_def)
 
-        self.__expand_components(mesg_def['global_mesg_num'], message, mesg_def['fields'], mesg_def)
-
-        self.__transform_values(message, mesg_def)
-
-        return message
+            return
 
-    def __transform_values(self, message, mesg_def):
-        fields_dict = mesg_def['fields']
-        for field_name in message:
-            field_data = message[field_name]
-            if field_data.get('is_expanded_field', False):
+        stage_start = perf_counter()
+        self.__expand_sub_fields(mesg_def)
+        decode_stats.add_time('sub_fields', stage_start)
+
+        stage_start = perf_counter()
+        self.__expand_components(mesg_def)
+        decode_stats.add_time('components', stage_start)
+
+        stage_start = perf_counter()
+        self.__transform_values(mesg_def)
+        decode_stats.add_time('transform', stage_start)
+
+    def __transform_values(self, mesg_def):
+        field_layout = mesg_def['field_layout']
+        field_layout_profiles = mesg_def['field_layout_profiles']
+        field_values = self._field_values
+        for position, raw_value in enumerate(self._raw_field_values):
+            # Expanded fields are transformed while they are expanded
+            if raw_value is None or field_values[position] is not _UNTRANSFORMED:
                 continue
 
-            field_id = field_data['field_definition_number']
-            has_profile = field_id in fields_dict
-            field_profile = fields_dict[field_id] if has_profile else None
-            field_type = field_profile['type'] if has_profile else field_id
-
-            if field_data.get('is_sub_field'):
-                field_profile = self.__get_subfield_profile(field_profile, field_name)
-                field_type = field_profile['type'] if has_profile else field_id
+            # Fields which are not in the profile are named by their field definition number
+            field_profile = field_layout_profiles[position]
+            field_type = field_profile['type'] if field_profile is not None else field_layout[position]
 
-            raw_value = field_data['raw_field_value']
             field_value = raw_value
             # Optional data operations
-            if self._convert_types_to_strings:
-                field_value = self.__convert_type_to_string(field_type, raw_value)
-
-            if self._apply_scale_and_offset and field_type in FIT.NUMERIC_FIELD_TYPES:
-                field_value = self.__apply_scale_and_offset(field_profile, raw_value)
-
             if self._convert_timestamps_to_datetimes and field_type == 'date_time':
                 field_value = util.convert_timestamp_to_datetime(raw_value)
+            else:
+                if self._convert_types_to_strings:
+                    field_value = self.__convert_type_to_string(field_type, raw_value)
 
-            field_data['field_value'] = field_value
+                if self._apply_scale_and_offset and field_type in FIT.NUMERIC_FIELD_TYPES:
+                    field_value = self.__apply_scale_and_offset(field_profile, raw_value)
+
+            field_values[position] = field_value
         return
 
-    def __expand_components(self, mesg_num, message, fields, mesg_def):
+    def __expand_components(self, mesg_def):
         if self._expand_components is False or len(self._fields_to_expand) == 0:
             return
 
-        mesg = {}
+        mesg_num = mesg_def['global_mesg_num']
+        fields = mesg_def['fields']
+        field_positions = mesg_def['field_positions']
+
+        # The expanded fields are added to the message once all of the components are expanded
+        expanded_names = []
+        expanded_raw_values = []
+        expanded_values = []
 
         while len(self._fields_to_expand) > 0:
             field_name = self._fields_to_expand.pop()
 
-            field_to_expand = message.get(field_name) or mesg.get(field_name)
-
-            raw_field_value = field_to_expand['raw_field_value']
-            field_definition_number = field_to_expand['field_definition_number']
-            field_profile = mesg_def['fields'].get(field_definition_number)
+            position = field_positions[field_name]
+            raw_field_value = self._raw_field_values[position]
+            if raw_field_value is None:
+                raw_field_value = expanded_raw_values[expanded_names.index(field_name)]
+            field_profile = mesg_def['field_layout_profiles'][position]
 
             if field_profile is None: 
                 continue
 
-            is_sub_field = field_to_expand.get('is_sub_field') or False
-            if is_sub_field is True:
-                field_profile = self.__get_subfield_profile(field_profile, field_name)
-
             base_type = FIT.FIELD_TYPE_TO_BASE_TYPE[field_profile['type']] if field_profile['type'] in FIT.FIELD_TYPE_TO_BASE_TYPE else None
 
             if field_profile['has_components'] is False or base_type is None:
@@ -484,26 +1578,20 @@ class Decoder:
             if util._only_invalid_values(raw_field_value, FIT.BASE_TYPE_DEFINITIONS[base_type]['invalid']) is True:
                 continue
 
-            bitstream = BitStream(raw_field_value, base_type)
-
-            for i in range(len(field_profile['components'])):
-                if bitstream.bits_available() < field_profile['bits'][i]:
-                    break
+            component_values = _read_bits_list(raw_field_value, base_type, field_profile['bits'])
 
+            for i, value in enumerate(component_values):
                 target_field = fields[field_profile['components'][i]]
-                if target_field['name'] not in mesg:
+                if target_field['name'] in expanded_names:
+                    target_index = expanded_names.index(target_field['name'])
+                else:
                     base_type = FIT.FIELD_TYPE_TO_BASE_TYPE[target_field['type']] if target_field['type'] in FIT.FIELD_TYPE_TO_BASE_TYPE else target_field['type']
                     invalid_value = FIT.BASE_TYPE_DEFINITIONS[base_type]['invalid'] if base_type in FIT.BASE_TYPE_DEFINITIONS else 0xFF
 
-                    mesg[target_field['name']] = {
-                        'field_value': [],
-                        'raw_field_value': [],
-                        'field_definition_number': target_field['num'],
-                        'is_expanded_field': True,
-                        'invalid': invalid_value
-                    }
-
-                value = bitstream.read_bits(field_profile['bits'][i])
+                    target_index = len(expanded_names)
+                    expanded_names.append(target_field['name'])
+                    expanded_raw_values.append([])
+                    expanded_values.append([])
 
                 if target_field['is_accumulated'] is True: 
                     value = self._accumulator.accumulate(mesg_num, target_field['num'], value, field_profile['bits'][i])
@@ -513,76 +1601,78 @@ class Decoder:
                 value = int(value) if value.is_integer() else value
                 raw_value = (value + target_field['offset'][0]) * target_field['scale'][0]
 
-                mesg[target_field['name']]['raw_field_value'].append(int(raw_value))
+                expanded_raw_values[target_index].append(int(raw_value))
 
                 if raw_value == invalid_value:
-                    mesg[target_field['name']]['field_value'].append(None)
+                    expanded_values[target_index].append(None)
                 else:
                     if self._convert_types_to_strings is True:
                             value = self.__convert_type_to_string(target_field['type'], value)
 
-                    mesg[target_field['name']]['field_value'].append(value)
+                    expanded_values[target_index].append(value)
 
                 if target_field['has_components'] is True:
                     self._fields_to_expand.append(target_field['name'])
 
-                if bitstream.has_bits_available() is False:
-                    break
-
-        for field_name in mesg:
-            mesg[field_name]['raw_field_value'] = util._sanitize_values(mesg[field_name]['raw_field_value'])
-            mesg[field_name]['field_value'] = util._sanitize_values(mesg[field_name]['field_value'])
-            message[field_name] = mesg[field_name]
+        for field_name, raw_field_value, field_value in zip(expanded_names, expanded_raw_values, expanded_values):
+            self.__set_field(field_positions[field_name], util._sanitize_values(raw_field_value), util._sanitize_values(field_value))
 
-    def __expand_sub_fields(self, global_mesg_num, message):
+    def __expand_sub_fields(self, mesg_def):
         if self._expand_sub_fields is False or len(self._fields_with_subfields) == 0:
             return
 
-        # Save the original fields for iteration before expanding sub fields.
         for field in self._fields_with_subfields:
-            if message[field]['field_definition_number'] in Profile['messages'][global_mesg_num]['fields']:
-                field_profile = Profile['messages'][global_mesg_num]['fields'][message[field]['field_definition_number']]
-            else:
+            field_profile = mesg_def['field_layout_profiles'][mesg_def['field_positions'][field]]
+            if field_profile is None:
                 continue
 
             if len(field_profile['sub_fields']) > 0:
-                self.__expand_sub_field(message, field_profile)
+                self.__expand_sub_field(mesg_def, field_profile)
 
-    def __expand_sub_field(self, message, field_profile):
+    def __expand_sub_field(self, mesg_def, field_profile):
+        field_positions = mesg_def['field_positions']
+        raw_field_values = self._raw_field_values
         for sub_field in field_profile['sub_fields']:
             for map_item in sub_field['map']:
-                reference_field_profile = message[map_item['name']] if map_item['name'] in message else None
-
-                if reference_field_profile is None:
+                reference_position = field_positions.get(map_item['name'])
+                if reference_position is None or raw_field_values[reference_position] is None:
                     continue
 
-                if reference_field_profile['raw_field_value'] == map_item['raw_value']:
-                    orig = message[field_profile['name']]
-                    raw = orig['raw_field_value']
-                    message[sub_field['name']] = {**orig,
-                        'raw_field_value': raw.copy() if isinstance(raw, list) else raw,
-                        'is_sub_field': True}
+                if raw_field_values[reference_position] == map_item['raw_value']:
+                    raw = raw_field_values[field_positions[field_profile['name']]]
+                    self.__set_field(field_positions[sub_field['name']], raw.copy() if isinstance(raw, list) else raw, _UNTRANSFORMED)
 
                     if sub_field['has_components'] is True:
                         self._fields_to_expand.append(sub_field['name'])
 
                     break
 
-    def __get_subfield_profile(self, field_profile, name):
-        return next(sub_field for sub_field in field_profile['sub_fields'] if sub_field['name'] == name) or {}
+    def __set_field(self, position, raw_field_value, field_value):
+        '''Sets the values of a field of the message being decoded, keeping the position of a field which was already set.'''
+        if self._raw_field_values[position] is None:
+            self._added_field_positions.append(position)
 
-    def __set_accumulated_value(self, mesg_def, message, field, raw_field_value): 
-        raw_field_values = raw_field_value if type(raw_field_value) == list else [raw_field_value]
+        self._raw_field_values[position] = raw_field_value
+        self._field_values[position] = field_value
 
-        for value in raw_field_values: 
-            for containing_field in message.values():
-                components = mesg_def['fields'].get(field['num'])['components']
-                for i, component_field_num in enumerate(components):
-                    target_field = mesg_def['fields'][component_field_num]
+    def __iter_field_positions(self, mesg_def):
+        '''Yields the positions of the fields of the message being decoded, in the order the fields were added.'''
+        raw_field_values = self._raw_field_values
+        added_field_positions = self._added_field_positions
+        for position in range(mesg_def['num_definition_fields']):
+            if raw_field_values[position] is not None and (len(added_field_positions) == 0 or position not in added_field_positions):
+                yield position
 
-                    if target_field['num'] == field['num'] and target_field['is_accumulated']:
-                        value = (((value / field['scale'][0]) - field['offset'][0]) + containing_field['offset'][i]) * containing_field['scale'][i]
+        yield from added_field_positions
 
+    def __get_raw_fields(self, mesg_def):
+        field_layout = mesg_def['field_layout']
+        return {field_layout[position]: self._raw_field_values[position] for position in self.__iter_field_positions(mesg_def)}
+
+    def __set_accumulated_value(self, mesg_def, field, raw_field_value): 
+        raw_field_values = raw_field_value if type(raw_field_value) == list else [raw_field_value]
+
+        for value in raw_field_values: 
             self._accumulator.createAccumulatedField(mesg_def['global_mesg_num'], field['num'], int(value))
 
     def __convert_type_to_string(self, field_type, raw_field_value):
@@ -636,101 +1726,136 @@ class Decoder:
 
 
     def __add_developer_data_id_to_profile(self, message):
-        if message is None or message['developer_data_index'] is None or message['developer_data_index']['raw_field_value'] == 0xFF:
+        if message is None or message['developer_data_index'] is None or message['developer_data_index'] == 0xFF:
             return
 
-        self._developer_data_defs[message['developer_data_index']['raw_field_value']] = {
-            'developer_data_index': message['developer_data_index']['raw_field_value'],
-            'developer_id': message['developer_id']['raw_field_value'] if 'developer_id' in message else None,
-            'application_id': message['application_id']['raw_field_value'] if 'application_id' in message else None,
-            'manufacturer_id': message['manufacturer_id']['raw_field_value'] if 'manufacturer_id' in message else None,
-            'application_version': message['application_version']['raw_field_value'] if 'application_version' in message else None,
+        # The field descriptions of a developer data index are replaced along with its developer data id
+        for key in [key for key in self._developer_fields if key[0] == message['developer_data_index']]:
+            del self._developer_fields[key]
+
+        self._developer_data_defs[message['developer_data_index']] = {
+            'developer_data_index': message['developer_data_index'],
+            'developer_id': message['developer_id'] if 'developer_id' in message else None,
+            'application_id': message['application_id'] if 'application_id' in message else None,
+            'manufacturer_id': message['manufacturer_id'] if 'manufacturer_id' in message else None,
+            'application_version': message['application_version'] if 'application_version' in message else None,
             'fields': []
         }
 
     def __add_field_description_to_profile(self, message):
 
-        if message is None or message['developer_data_index'] is None or message['developer_data_index']['raw_field_value'] == 0xFF:
+        if message is None or message['developer_data_index'] is None or message['developer_data_index'] == 0xFF:
             return
 
-        developer_data_index = message['developer_data_index']['raw_field_value']
+        developer_data_index = message['developer_data_index']
         developer_data_def = self._developer_data_defs.get(developer_data_index)
 
         if developer_data_def is None:
             return
 
         if message["fit_base_type_id"] is not None:
-            masked_base_type = message["fit_base_type_id"]['raw_field_value'] & FIT.BASE_TYPE_MASK
+            masked_base_type = message["fit_base_type_id"] & FIT.BASE_TYPE_MASK
             base_type_code = FIT.BASE_TYPE_DEFINITIONS[masked_base_type]["type_code"]
         else:
             base_type_code = None
 
-        developer_data_def['fields'].append({
-            'developer_data_index': message['developer_data_index']['raw_field_value'],
-            'field_definition_number': message['field_definition_number']['raw_field_value'],
-            'fit_base_type_id': message['fit_base_type_id']['raw_field_value'] & FIT.BASE_TYPE_MASK if 'fit_base_type_id' in message else None,
+        field = {
+            'developer_data_index': message['developer_data_index'],
+            'field_definition_number': message['field_definition_number'],
+            'fit_base_type_id': message['fit_base_type_id'] & FIT.BASE_TYPE_MASK if 'fit_base_type_id' in message else None,
             'base_type_code': base_type_code,
-            'name': message['name']['raw_field_value'] if 'name' in message else None,
-            'array': message['array']['raw_field_value'] if 'array' in message else None,
-            'components': message['components']['raw_field_value'] if 'components' in message else None,
-            'scale': message['scale']['raw_field_value'] if 'scale' in message else None,
-            'offset': message['offset']['raw_field_value'] if 'offset' in message else None,
-            'units': message['units']['raw_field_value'] if 'units' in message else None,
-            'bits': message['bits']['raw_field_value'] if 'bits' in message else None,
-            'accumulate': message['accumulate']['raw_field_value'] if 'accumulate' in message else None,
-            'ref_field_name': message['ref_field_name']['raw_field_value'] if 'ref_field_name' in message else None,
-            'ref_field_value': message['ref_field_value']['raw_field_value'] if 'ref_field_value' in message else None,
-            'fit_base_unit_id': message['fit_base_unit_id']['raw_field_value'] if 'fit_base_unit_id' in message else None,
-            'native_mesg_num': message['native_mesg_num']['raw_field_value'] if 'native_mesg_num' in message else None,
-            'native_field_num': message['native_field_num']['raw_field_value'] if 'native_field_num' in message else None,
+            'name': message['name'] if 'name' in message else None,
+            'array': message['array'] if 'array' in message else None,
+            'components': message['components'] if 'components' in message else None,
+            'scale': message['scale'] if 'scale' in message else None,
+            'offset': message['offset'] if 'offset' in message else None,
+            'units': message['units'] if 'units' in message else None,
+            'bits': message['bits'] if 'bits' in message else None,
+            'accumulate': message['accumulate'] if 'accumulate' in message else None,
+            'ref_field_name': message['ref_field_name'] if 'ref_field_name' in message else None,
+            'ref_field_value': message['ref_field_value'] if 'ref_field_value' in message else None,
+            'fit_base_unit_id': message['fit_base_unit_id'] if 'fit_base_unit_id' in message else None,
+            'native_mesg_num': message['native_mesg_num'] if 'native_mesg_num' in message else None,
+            'native_field_num': message['native_field_num'] if 'native_field_num' in message else None,
             'key': message['key']
-        })
+        }
+        developer_data_def['fields'].append(field)
+
+        # The first description of a field is the one used to decode it
+        self._developer_fields.setdefault((field['developer_data_index'], field['field_definition_number']), field)
 
     def __build_dev_data_struct_string(self, developer_field_def: dict, field_profile: dict):
         struct_format_string = "<" if developer_field_def['endianness'] == Endianness.LITTLE else ">"
-        invalid_value = FIT.BASE_TYPE_DEFINITIONS[field_profile['fit_base_type_id']]['invalid']
         base_type_code = field_profile['base_type_code']
         base_type_size = FIT.BASE_TYPE_DEFINITIONS[field_profile['fit_base_type_id']]['size']
         num_elements = int(developer_field_def["size"] / base_type_size)
 
-        field_profile['num_elements'] = num_elements
-        field_profile['invalid'] = invalid_value
-
         struct_format_string += str(num_elements) + base_type_code
 
         return struct_format_string
 
-    def __lookup_developer_data_field(self, developer_field_def):
-        try:
-            for field in self._developer_data_defs[developer_field_def['developer_data_index']]['fields']:
-                if field['field_definition_number'] == developer_field_def['field_definition_number']:
-                    return field
+    def __create_message(self, mesg_def):
+        if self._mesg_objects is True:
+            return self.__create_mesg_object(mesg_def)
 
-            return None
+        field_layout = mesg_def['field_layout']
+        raw_field_values = self._raw_field_values
+        field_values = self._field_values
 
-        except Exception:
-            return None
+        message = {}
+        for position in self.__iter_field_positions(mesg_def):
+            field_value = field_values[position]
+            if field_value is _UNTRANSFORMED:
+                field_value = raw_field_values[position]
+            # Arrays of a single value are reduced to the value
+            message[field_layout[position]] = field_value[0] if isinstance(field_value, list) and len(field_value) == 1 else field_value
 
-    def __clean_message(self, message):
-        if message is not None:
-            for field in message:
-                if isinstance(message[field], dict) and 'raw_field_value' in message[field]:
-                    message[field] = message[field]['field_value'] if 'field_value' in message[field] else message[field]['raw_field_value']
-                message[field] = util._sanitize_values(message[field])
+        return message
+
+    def __create_mesg_object(self, mesg_def):
+        mesg_slots = mesg_def.get('mesg_slots')
+        if mesg_slots is None:
+            # Built on first use and kept with the cached definition
+            mesg_class = _get_layout_class(mesg_def['global_mesg_num'], _find_mesg_field_names(
+                mesg_def['field_layout'], mesg_def['global_mesg_num'], len(mesg_def['developer_field_defs']) > 0))
+            mesg_def['mesg_class'] = mesg_class
+            mesg_slots = mesg_def['mesg_slots'] = [mesg_class._slot_map.get(field_name) for field_name in mesg_def['field_layout']]
+
+        field_layout = mesg_def['field_layout']
+        raw_field_values = self._raw_field_values
+        field_values = self._field_values
+
+        mesg_object = mesg_def['mesg_class']()
+        for position in self.__iter_field_positions(mesg_def):
+            field_value = field_values[position]
+            if field_value is _UNTRANSFORMED:
+                field_value = raw_field_values[position]
+            if isinstance(field_value, list) and len(field_value) == 1:
+                field_value = field_value[0]
+
+            slot = mesg_slots[position]
+            if slot is not None:
+                slot.__set__(mesg_object, field_value)
+            else:
+                mesg_object[field_layout[position]] = field_value
+
+        return mesg_object
 
     def __read_raw_values(self, message_size, struct_format_string):
-        return self._stream.read_and_unpack(message_size, struct_format_string)
+        if self._decode_stats is None:
+            return self._stream.read_and_unpack(message_size, struct_format_string)
+
+        # Read the bytes separately so the time spent on the CRC is not counted as unpacking
+        byte_array = self._stream.read_bytes(message_size)
+        unpack_start = perf_counter()
+        values = list(unpack(struct_format_string, byte_array))
+        self._decode_stats.add_time('unpack', unpack_start)
+        return values
 
     def __read_raw_value(self, message_size, struct_format_string):
-        field_value = self._stream.read_and_unpack(message_size, struct_format_string)
+        field_value = self.__read_raw_values(message_size, struct_format_string)
         return field_value if len(field_value) > 1 else field_value[0]
 
-    def __is_array_all_none(self, array):
-        for i in array:
-            if i is not None:
-                return False
-        return True
-
     def __raise_error(self, error = ""):
         position = self._stream.position()
         message = "FIT Runtime Error at byte: " + str(position) + " " + error
@@ -740,44 +1865,6 @@ class Decoder:
         '''Reads the file's header and returns its parameters.'''
         starting_position = self._stream.position()
 
-        class FileHeader:
-            '''A class that decodes a FIT file header.'''
-            def __init__(self, stream, decode_mode):
-                if decode_mode != DecodeMode.NORMAL:
-                    if decode_mode == DecodeMode.SKIP_HEADER:
-                        stream.seek(_HEADER_WITH_CRC_SIZE)
-
-                    header_size = _HEADER_WITH_CRC_SIZE if decode_mode == DecodeMode.SKIP_HEADER else 0
-                    data_size = stream.get_length() - header_size - _CRCSIZE
-
-                    self.header_size = header_size
-                    self.data_size = data_size
-
-                    return
-            
-                self.header_size = stream.read_byte()
-                self.protocol_version = stream.read_byte()
-                self.profile_version = stream.read_unint_16("little")
-                self.data_size = stream.read_unint_32("little")
-                self.data_type = stream.read_string(4)
-                self.header_crc = 0
-                self.file_total_size = self.header_size + self.data_size
-
-                if self.header_size == 14:
-                    self.header_crc = stream.read_unint_16("little")
-
-            def get_dict(self):
-                dict = {}
-                dict["header_size"] = self.header_size
-                dict["protocol_version"] = (self.protocol_version >> 4) + ((self.protocol_version & 0x0F) / 10)
-                dict["profile_version"] = self.profile_version / 1000 if self.profile_version > 2199 else 100
-                dict["data_size"] = self.data_size
-                dict["data_type"] = self.data_type
-                dict["header_crc"] = self.header_crc
-                dict["file_total_size"] = self.file_total_size
-
-                return dict
-
         file_header = FileHeader(self._stream, decode_mode)
 
         if reset is True:
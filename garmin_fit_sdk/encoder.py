@@ -40,6 +40,7 @@ class Encoder:
         """
         self._output_stream = _OutputStream()
         self._local_mesg_definitions = [None] * 16
+        self._raw_mesg_definitions = [None] * 16
         self._next_local_mesg_num = 0
         self._field_descriptions = {}
 
@@ -111,6 +112,38 @@ class Encoder:
 
         return self
 
+    def write_raw_record(self, raw_record):
+        """Copies a raw definition or data record, as returned by Decoder.iter_raw_records(), into the file.
+
+        The record bytes are written as they are, without being decoded or re-encoded. Before a data
+        record is written, the message definition it uses is written if it is not already the active
+        definition for its local message number. Definitions can therefore be left out when filtering
+        records, but the Developer Data Id and Field Description messages for any developer fields
+        must still be written.
+
+        Args:
+            raw_record: The RawRecord to write.
+
+        Returns:
+            Encoder: self
+        """
+        try:
+            local_num = raw_record.local_mesg_num
+            definition = bytes(raw_record.definition)
+
+            if self._raw_mesg_definitions[local_num] != definition:
+                self._output_stream.write_bytes(definition)
+                self._raw_mesg_definitions[local_num] = definition
+                self._local_mesg_definitions[local_num] = None
+
+            if not raw_record.is_definition:
+                self._output_stream.write_bytes(raw_record.data)
+
+        except Exception as e:
+            raise ValueError(f"Could not write raw record: {e}") from e
+
+        return self
+
     def add_developer_field(self, key, developer_data_id_mesg, field_description_mesg):
         """Adds a Developer Data Field Description and associated Developer Data Id Message to the Encoder.
 
@@ -302,3 +335,4 @@ class Encoder:
         """
         mesg_definition.write(self._output_stream)
         self._local_mesg_definitions[mesg_definition.local_mesg_num] = mesg_definition
+        self._raw_mesg_definitions[mesg_definition.local_mesg_num] = None
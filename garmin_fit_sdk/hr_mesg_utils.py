@@ -12,102 +12,249 @@
 ############################################################################################
 
 
+from array import array
+from bisect import bisect_right
+from collections import deque
 from datetime import datetime
 
 from . import util
 
+_GAP_INCREMENT_MILLISECONDS = 250
+_GAP_INCREMENT_SECONDS = _GAP_INCREMENT_MILLISECONDS / 1000.0
+_GAP_MAX_MILLISECONDS = 5000
+_GAP_MAX_STEPS = _GAP_MAX_MILLISECONDS / _GAP_INCREMENT_MILLISECONDS
+
+# Number of consumed heart rate samples to accumulate before they are trimmed from the window
+_TRIM_THRESHOLD = 4096
+
 
 def merge_heart_rates(hr_mesgs, record_mesgs):
     '''Takes the list of heart rate messages and merges them into the record messages.'''
     if hr_mesgs is None or record_mesgs is None or len(hr_mesgs) == 0 or len(record_mesgs) == 0:
         return
 
-    heartrates = expand_heart_rates(hr_mesgs)
-
-    heartrate_index = 0
-    record_range_start_time = None
-
-    for i in range(len(record_mesgs)):
-        message = record_mesgs[i]
+    merger = HeartRateMerger()
+    for message in hr_mesgs:
+        merger.add_hr_mesg(message)
 
-        hr_sum = 0
-        hr_sum_count = 0
+    for message in record_mesgs:
+        merger.add_record_mesg(message)
 
-        record_range_end_time = seconds_since_fit_epoch(message['timestamp'])
+    merger.flush()
 
-        if record_range_start_time is None:
-            record_range_start_time = record_range_end_time
 
-        if record_range_start_time == record_range_end_time:
-            record_range_start_time -= 1
-            heartrate_index = heartrate_index - 1 if heartrate_index >= 1 else 0
+def expand_heart_rates(hr_mesgs):
+    '''Takes the heart rate messages and expands them to 250ms increments.'''
+    timestamps, heart_rates = _expand_heart_rate_arrays(hr_mesgs)
+
+    return [{'timestamp': timestamp, 'heart_rate': int(heart_rate) if heart_rate.is_integer() else heart_rate}
+            for timestamp, heart_rate in zip(timestamps, heart_rates)]
+
+
+class HeartRateMerger:
+    '''
+    A class that merges heart rates into record messages incrementally, as heart rate
+    and record messages are decoded, instead of after all messages have been decoded.
+
+    The expanded heart rate samples are kept in a sliding window, and a record message is
+    only held until a heart rate sample past its timestamp has been received. The merged
+    values are the same as those produced by merge_heart_rates. When a record_listener is
+    given, it is called with each record message once its heart rate has been merged, or
+    by flush() for the records whose window never closed.
+
+    Attributes:
+        _expander: The buffers of expanded heart rate samples still within the window.
+        _record_listener: The function called with each record message once it is merged, or None.
+        _pending_records: The record messages whose heart rate window has not closed yet,
+                          each with whether it is passed to the record listener.
+        _merged_records: The merged record messages not yet passed to the record listener.
+        _heartrate_index: Index of the first heart rate sample not yet consumed by a record.
+        _scan_index: Index to resume searching from for the end of the head record's window.
+        _record_range_start_time: The exclusive start time of the head record's window.
+        _head_prepared: Whether the window start of the head record has been computed.
+        _error: The first error raised while merging, re-raised by flush().
+    '''
+    def __init__(self, record_listener = None):
+        self._expander = _HeartRateExpander()
+        self._record_listener = record_listener
+        self._pending_records = deque()
+        self._merged_records = deque()
+        self._heartrate_index = 0
+        self._scan_index = 0
+        self._record_range_start_time = None
+        self._head_prepared = False
+        self._error = None
+
+    def add_hr_mesg(self, hr_mesg):
+        '''Expands a decoded heart rate message and merges into any records whose window it closes.'''
+        if self._error is not None:
+            return
+
+        try:
+            self._expander.add_hr_mesg(hr_mesg)
+            self.__merge_pending_records(False)
+        except Exception as error:
+            self.__set_error(error)
+
+        self.__emit_merged_records()
+
+    def add_record_mesg(self, record_mesg, notify = True):
+        '''
+        Queues a decoded record message, merging its heart rate as soon as its window closes.
+        Records added with notify set to False are merged but not passed to the record listener,
+        such as the timestamps of records which are skipped while decoding.
+        '''
+        if self._error is not None:
+            # Nothing more is merged after an error, so the record is passed on as it is
+            if notify is True and self._record_listener is not None:
+                self._record_listener(record_mesg)
+            return
+
+        self._pending_records.append((record_mesg, notify))
+
+        try:
+            if len(self._expander.timestamps) > 0:
+                self.__merge_pending_records(False)
+        except Exception as error:
+            self.__set_error(error)
+
+        self.__emit_merged_records()
+
+    def flush(self):
+        '''Merges the remaining records once no more heart rate messages will be added.'''
+        if self._error is None and len(self._expander.timestamps) > 0:
+            try:
+                self.__merge_pending_records(True)
+            except Exception as error:
+                self.__set_error(error)
+
+        # The records without a heart rate window, such as when there are no heart rate messages, are passed on as they are
+        self._merged_records.extend(self._pending_records)
+        self._pending_records.clear()
+        self.__emit_merged_records()
+
+        if self._error is not None:
+            raise self._error
+
+    def __set_error(self, error):
+        self._error = error
+        self._merged_records.extend(self._pending_records)
+        self._pending_records.clear()
+
+    def __emit_merged_records(self):
+        # Called outside of the error handling of the merge, so errors raised by the listener are not deferred
+        merged_records = self._merged_records
+        while len(merged_records) > 0:
+            record_mesg, notify = merged_records.popleft()
+            if notify is True and self._record_listener is not None:
+                self._record_listener(record_mesg)
+
+    def __merge_pending_records(self, is_final):
+        timestamps = self._expander.timestamps
+        heart_rates = self._expander.heart_rates
+
+        while len(self._pending_records) > 0:
+            message = self._pending_records[0][0]
+            record_range_end_time = seconds_since_fit_epoch(message['timestamp'])
+
+            if self._head_prepared is False:
+                if self._record_range_start_time is None:
+                    self._record_range_start_time = record_range_end_time
+
+                if self._record_range_start_time == record_range_end_time:
+                    self._record_range_start_time -= 1
+                    self._heartrate_index = self._heartrate_index - 1 if self._heartrate_index >= 1 else 0
+
+                self._scan_index = self._heartrate_index
+                self._head_prepared = True
+
+            if self._expander.is_sorted:
+                window_end_index = bisect_right(timestamps, record_range_end_time, self._scan_index)
+            else:
+                window_end_index = _find_window_end(timestamps, record_range_end_time, self._scan_index)
 
-        finding_in_range_hr_mesgs = True
-        while(finding_in_range_hr_mesgs and (heartrate_index < len(heartrates))):
-            heart_rate = heartrates[heartrate_index]
+            if window_end_index == len(timestamps):
+                if is_final is False:
+                    # Wait for a heartrate beyond the record time to close the window
+                    self._scan_index = window_end_index
+                    break
 
-            # Check if the heartrate timestamp is > record start time
-            # and if the heartrate timestamp is <= to record end time
-            if heart_rate['timestamp'] > record_range_start_time and heart_rate['timestamp'] <= record_range_end_time:
-                hr_sum += heart_rate['heart_rate']
-                hr_sum_count += 1
-            # Check if the heartrate timestamp exceeds the record time
-            elif heart_rate['timestamp'] > record_range_end_time:
-                finding_in_range_hr_mesgs = False
+                self._heartrate_index = window_end_index
+            else:
+                hr_sum = 0
+                hr_sum_count = 0
+                for i in range(self._heartrate_index, window_end_index):
+                    if timestamps[i] > self._record_range_start_time:
+                        hr_sum += heart_rates[i]
+                        hr_sum_count += 1
 
                 if hr_sum_count > 0:
                     # Update record's heart rate value
-                    #avg_hr = round(hr_sum / hr_sum_count, 0)
-                    avg_hr = int((hr_sum / hr_sum_count) + .5)
-                    message['heart_rate'] = avg_hr
-                # Reset HR average accumulators
-                hr_sum = 0
-                hr_sum_count = 0
-                record_range_start_time = record_range_end_time
+                    message['heart_rate'] = int((hr_sum / hr_sum_count) + .5)
 
-                # Breaks out of finding_in_range_hr_messages while loop without incrementing heartrate_index
-                break
-            heartrate_index += 1
+                self._record_range_start_time = record_range_end_time
+                self._heartrate_index = window_end_index
 
+            self._merged_records.append(self._pending_records.popleft())
+            self._head_prepared = False
 
-def expand_heart_rates(hr_mesgs):
-    '''Takes the heart rate messages and expands them to 250ms increments.'''
-    GAP_INCREMENT_MILLISECONDS = 250
-    GAP_INCREMENT_SECONDS = GAP_INCREMENT_MILLISECONDS / 1000.0
-    GAP_MAX_MILLISECONDS = 5000
-    GAP_MAX_STEPS = GAP_MAX_MILLISECONDS / GAP_INCREMENT_MILLISECONDS
+        self.__trim_window()
 
-    if hr_mesgs is None or len(hr_mesgs) == 0:
-        return []
+    def __trim_window(self):
+        # Keep the sample before the current index, a repeated record timestamp steps back to it
+        num_consumed = self._heartrate_index - 1
+        if num_consumed < _TRIM_THRESHOLD:
+            return
 
-    anchor_event_timestamp = 0.0
-    anchor_timestamp = None
+        self._expander.trim(num_consumed)
+        self._heartrate_index -= num_consumed
+        self._scan_index -= num_consumed
 
-    heartrates = []
 
-    for message in hr_mesgs:
+class _HeartRateExpander:
+    '''
+    Expands heart rate messages to 250ms increments into parallel array('d') buffers of
+    timestamps (seconds since the FIT epoch) and heart rates.
+    '''
+    __slots__ = ('timestamps', 'heart_rates', 'is_sorted', '_anchor_timestamp', '_anchor_event_timestamp')
+
+    def __init__(self):
+        self.timestamps = array('d')
+        self.heart_rates = array('d')
+        self.is_sorted = True
+        self._anchor_timestamp = None
+        self._anchor_event_timestamp = 0.0
+
+    def add_hr_mesg(self, message):
+        '''Expands a single heart rate message onto the end of the buffers.'''
         if message is None:
-            __raise_error("HR message must not be None.")
+            _raise_error("HR message must not be None.")
 
         event_timestamps = message['event_timestamp'] if isinstance(message['event_timestamp'], list) else [message['event_timestamp']]
         filtered_bpm = message['filtered_bpm'] if isinstance(message['filtered_bpm'], list) else [message['filtered_bpm']]
 
         # Update HR anchor timestamp if present
         if 'timestamp' in message and message['timestamp'] is not None:
-            anchor_timestamp = seconds_since_fit_epoch(message['timestamp'])
+            self._anchor_timestamp = seconds_since_fit_epoch(message['timestamp'])
 
             if message['fractional_timestamp'] is not None:
-                anchor_timestamp += message['fractional_timestamp']
+                self._anchor_timestamp += message['fractional_timestamp']
 
             if len(event_timestamps) == 1:
-                anchor_event_timestamp = event_timestamps[0]
+                self._anchor_event_timestamp = event_timestamps[0]
             else:
-                __raise_error("Anchor HR message must have at least one event_timestamp")
+                _raise_error("Anchor HR message must have at least one event_timestamp")
+
+        anchor_timestamp = self._anchor_timestamp
+        anchor_event_timestamp = self._anchor_event_timestamp
 
         if anchor_timestamp is None or anchor_event_timestamp is None:
-            __raise_error("No anchor timestamp received in an HR message before delta HR messages")
+            _raise_error("No anchor timestamp received in an HR message before delta HR messages")
         elif len(event_timestamps) != len(filtered_bpm):
-            __raise_error("HR message with mismatching event timestamp and filtered bpm")
+            _raise_error("HR message with mismatching event timestamp and filtered bpm")
+
+        timestamps = self.timestamps
+        heart_rates = self.heart_rates
 
         for i in range(len(event_timestamps)):
             event_timestamp = event_timestamps[i]
@@ -116,29 +263,59 @@ def expand_heart_rates(hr_mesgs):
                 if anchor_event_timestamp - event_timestamp > (0x400000):
                     event_timestamp += 0x400000
                 else:
-                    __raise_error("Anchor event_timestamp is greater than subsequent event_timestamp. This does not allow for correct delta caluclation.")
+                    _raise_error("Anchor event_timestamp is greater than subsequent event_timestamp. This does not allow for correct delta caluclation.")
 
+            if filtered_bpm[i] is None:
+                _raise_error("HR message with an invalid filtered bpm")
 
-            current_hr = { 'timestamp': anchor_timestamp, 'heart_rate': filtered_bpm[i] }
-            current_hr['timestamp'] += (event_timestamp - anchor_event_timestamp)
+            current_timestamp = anchor_timestamp + (event_timestamp - anchor_event_timestamp)
 
             # Carry the previous HR value forward across the gap to the current
             # HR value for up to 5 seconds in 250ms increments
-            if len(heartrates) > 0:
-                previous_hr = heartrates[len(heartrates) - 1]
-                gap_in_milliseconds = abs(current_hr['timestamp'] - previous_hr['timestamp']) * 1000
+            if len(timestamps) > 0:
+                previous_timestamp = timestamps[-1]
+                previous_heart_rate = heart_rates[-1]
+                gap_in_milliseconds = abs(current_timestamp - previous_timestamp) * 1000
                 step = 1
 
-                while(gap_in_milliseconds > GAP_INCREMENT_MILLISECONDS and step <= GAP_MAX_STEPS):
-                    gap_hr = { 'timestamp': previous_hr['timestamp'], 'heart_rate': previous_hr['heart_rate'] }
-                    gap_hr['timestamp'] += (GAP_INCREMENT_SECONDS * step)
-                    heartrates.append(gap_hr)
+                while(gap_in_milliseconds > _GAP_INCREMENT_MILLISECONDS and step <= _GAP_MAX_STEPS):
+                    timestamps.append(previous_timestamp + (_GAP_INCREMENT_SECONDS * step))
+                    heart_rates.append(previous_heart_rate)
 
-                    gap_in_milliseconds -= GAP_INCREMENT_MILLISECONDS
+                    gap_in_milliseconds -= _GAP_INCREMENT_MILLISECONDS
                     step += 1
 
-            heartrates.append(current_hr)
-    return heartrates
+                if current_timestamp < previous_timestamp:
+                    self.is_sorted = False
+
+            timestamps.append(current_timestamp)
+            heart_rates.append(filtered_bpm[i])
+
+    def trim(self, num_samples):
+        '''Removes the given number of samples from the start of the buffers.'''
+        del self.timestamps[:num_samples]
+        del self.heart_rates[:num_samples]
+
+
+def _expand_heart_rate_arrays(hr_mesgs):
+    '''
+    Expands the heart rate messages to 250ms increments and returns parallel
+    array('d') buffers of timestamps (seconds since the FIT epoch) and heart rates.
+    '''
+    expander = _HeartRateExpander()
+
+    if hr_mesgs is not None:
+        for message in hr_mesgs:
+            expander.add_hr_mesg(message)
+
+    return expander.timestamps, expander.heart_rates
+
+def _find_window_end(timestamps, record_range_end_time, start_index):
+    '''Returns the index of the first timestamp after the record time, scanning forward from start_index.'''
+    for i in range(start_index, len(timestamps)):
+        if timestamps[i] > record_range_end_time:
+            return i
+    return len(timestamps)
 
 def seconds_since_fit_epoch(timestamp):
     '''Gives the time in seconds since the fit epoch.'''
@@ -147,6 +324,6 @@ def seconds_since_fit_epoch(timestamp):
 
     return timestamp
 
-def __raise_error(error = ""):
+def _raise_error(error = ""):
         message = f"FIT Runtime Error {error}"
         raise RuntimeError(message)
@@ -0,0 +1,127 @@
+'''integrity.py: Contains the functions for checking the integrity of many fit files at once.'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+# ****WARNING****  This file is auto-generated!  Do NOT edit this file.
+# Profile Version = 21.205.0Release
+# Tag = production/release/21.205.0-0-gb3c261eb
+############################################################################################
+
+
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+
+from . import CrcCalculator
+
+_CRCSIZE = 2
+_HEADER_WITH_CRC_SIZE = 14
+_HEADER_WITHOUT_CRC_SIZE = 12
+
+# Maximum number of paths sent to a worker process at a time
+_CHUNK_SIZE = 64
+
+IntegrityCheck = Enum('IntegrityCheck', ['FILE_READ', 'HEADER_SIZE', 'DATA_TYPE', 'HEADER_CRC', 'DATA_SIZE', 'FILE_CRC'])
+
+
+class IntegrityResult:
+    '''
+    The result of checking the integrity of a single fit file.
+
+    Attributes:
+        path: The path of the file that was checked.
+        failed_check: The IntegrityCheck that failed, or None if the file is good.
+        error: A description of the failed check, or None if the file is good.
+    '''
+
+    __slots__ = ('path', 'failed_check', 'error')
+
+    def __init__(self, path, failed_check=None, error=None):
+        self.path = path
+        self.failed_check = failed_check
+        self.error = error
+
+    @property
+    def is_valid(self):
+        '''Returns whether the integrity of the file is good or not.'''
+        return self.failed_check is None
+
+    def __repr__(self):
+        return f"IntegrityResult(path={self.path!r}, failed_check={self.failed_check}, error={self.error!r})"
+
+
+def check_buffer_integrity(buffer):
+    '''
+    Checks the integrity of the fit file in the given buffer, which can be any bytes-like object.
+    Returns a tuple of the IntegrityCheck that failed and a description of the failure,
+    or (None, None) if the integrity of the file is good.
+    '''
+    length = len(buffer)
+    header_size = buffer[0] if length > 0 else 0
+    if header_size != _HEADER_WITH_CRC_SIZE and header_size != _HEADER_WITHOUT_CRC_SIZE:
+        return IntegrityCheck.HEADER_SIZE, f"Invalid header size: {header_size}"
+
+    if length < header_size + _CRCSIZE:
+        return IntegrityCheck.HEADER_SIZE, f"File length {length} is shorter than the header"
+
+    if bytes(buffer[8:12]) != b'.FIT':
+        return IntegrityCheck.DATA_TYPE, "Data type is not .FIT"
+
+    data_size = int.from_bytes(buffer[4:8], 'little')
+    file_total_size = header_size + data_size
+    if file_total_size + _CRCSIZE > length:
+        return IntegrityCheck.DATA_SIZE, f"Data size {data_size} exceeds the file length {length}"
+
+    if header_size == _HEADER_WITH_CRC_SIZE:
+        header_crc = int.from_bytes(buffer[12:14], 'little')
+        if header_crc != CrcCalculator.calculate_crc(buffer, 0, _HEADER_WITHOUT_CRC_SIZE):
+            return IntegrityCheck.HEADER_CRC, "Header CRC does not match"
+
+    file_crc = int.from_bytes(buffer[file_total_size:file_total_size + _CRCSIZE], 'little')
+    if file_crc != CrcCalculator.calculate_crc(buffer, 0, file_total_size):
+        return IntegrityCheck.FILE_CRC, "File CRC does not match"
+
+    return None, None
+
+
+def check_file_integrity(path):
+    '''Checks the integrity of the fit file at the given path and returns an IntegrityResult.'''
+    try:
+        with open(path, 'rb') as file:
+            if file.seek(0, 2) == 0:
+                failed_check, error = check_buffer_integrity(b'')
+            else:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    failed_check, error = check_buffer_integrity(buffer)
+    except OSError as error:
+        return IntegrityResult(path, IntegrityCheck.FILE_READ, str(error))
+
+    return IntegrityResult(path, failed_check, error)
+
+
+def check_integrity_many(paths, workers=None):
+    '''
+    Checks the integrity of each of the fit files at the given paths, using a pool of worker processes.
+    The files are memory mapped rather than read into memory.
+
+    Parameters:
+        paths: The paths of the files to check.
+        workers: The number of worker processes, or None to use one per CPU.
+            When workers is 1 the files are checked in this process.
+
+    Returns:
+        A list with an IntegrityResult for each path, in the same order as the paths.
+    '''
+    paths = list(paths)
+    if workers == 1 or len(paths) <= 1:
+        return [check_file_integrity(path) for path in paths]
+
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    chunk_size = max(1, min(_CHUNK_SIZE, len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(check_file_integrity, paths, chunksize=chunk_size))
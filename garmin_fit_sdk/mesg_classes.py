@@ -0,0 +1,200 @@
+'''mesg_classes.py: Contains the compact message classes, generated from the profile, which decoded messages can be returned as instead of dictionaries.'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+# ****WARNING****  This file is auto-generated!  Do NOT edit this file.
+# Profile Version = 21.205.0Release
+# Tag = production/release/21.205.0-0-gb3c261eb
+############################################################################################
+
+
+from collections.abc import MutableMapping
+
+from .profile import Profile
+
+_DEVELOPER_FIELDS = 'developer_fields'
+
+_mesg_types = {}
+_layout_classes = {}
+
+
+class FitMesg(MutableMapping):
+    '''
+    The base class of the decoded message classes. A message type, such as RecordMesg, has a
+    class for each set of fields found in the message definitions of a file, which stores the
+    field values in __slots__ instead of a dictionary. The messages can be used like the
+    dictionaries returned by default, and the fields can also be read as attributes, where a
+    profile field without a value is None.
+
+    Attributes:
+        global_mesg_num: The global message number of the message type.
+    '''
+    __slots__ = ('_extra',)
+
+    global_mesg_num = None
+    # The names of the profile fields of the message type
+    _field_names = frozenset()
+    # The slot descriptors of a layout class, by field name
+    _slot_map = {}
+    # The field names of a layout class
+    _layout = ()
+
+    def __init__(self, fields=None):
+        # Fields without a slot, such as fields not in the profile, are kept in a dictionary
+        self._extra = None
+        if fields is not None:
+            for name, value in fields.items():
+                self[name] = value
+
+    def __getattr__(self, name):
+        # Only called when the attribute is not found, such as a slot without a value
+        if name in type(self)._field_names:
+            return None
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __getitem__(self, key):
+        slot = self._slot_map.get(key)
+        if slot is not None:
+            try:
+                return slot.__get__(self)
+            except AttributeError:
+                raise KeyError(key) from None
+
+        extra = self._extra
+        if extra is not None and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        slot = self._slot_map.get(key)
+        if slot is not None:
+            slot.__set__(self, value)
+            return
+
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __delitem__(self, key):
+        slot = self._slot_map.get(key)
+        if slot is not None:
+            try:
+                slot.__delete__(self)
+                return
+            except AttributeError:
+                raise KeyError(key) from None
+
+        if self._extra is None or key not in self._extra:
+            raise KeyError(key)
+        del self._extra[key]
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        for name, slot in self._slot_map.items():
+            try:
+                slot.__get__(self)
+            except AttributeError:
+                continue
+            yield name
+
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        '''Returns the fields of the message as a dictionary.'''
+        fields = {}
+        for name, slot in self._slot_map.items():
+            try:
+                fields[name] = slot.__get__(self)
+            except AttributeError:
+                continue
+
+        if self._extra is not None:
+            fields.update(self._extra)
+        return fields
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # The classes are created at run time, so they are pickled by message number and layout
+        return (_rebuild_mesg, (type(self).global_mesg_num, type(self)._layout, self.to_dict()))
+
+
+def _class_name(mesg_num):
+    if mesg_num in Profile['messages']:
+        return ''.join(part.capitalize() for part in Profile['messages'][mesg_num]['name'].split('_')) + 'Mesg'
+    return f"Mesg{mesg_num}"
+
+
+def get_mesg_type(mesg_num):
+    '''
+    Returns the class of the given message type, generated from the profile. All of the
+    decoded messages of the type are instances of this class.
+    '''
+    mesg_type = _mesg_types.get(mesg_num)
+    if mesg_type is not None:
+        return mesg_type
+
+    field_names = {_DEVELOPER_FIELDS}
+    if mesg_num in Profile['messages']:
+        for field in Profile['messages'][mesg_num]['fields'].values():
+            field_names.add(field['name'])
+            field_names.update(sub_field['name'] for sub_field in field['sub_fields'])
+
+    mesg_type = type(_class_name(mesg_num), (FitMesg,), {
+        '__slots__': (),
+        '__module__': __name__,
+        'global_mesg_num': mesg_num,
+        '_field_names': frozenset(field_names),
+    })
+    return _mesg_types.setdefault(mesg_num, mesg_type)
+
+
+def _is_slot_name(name):
+    return isinstance(name, str) and name.isidentifier() and not name.startswith('_') and not hasattr(FitMesg, name)
+
+
+def _get_layout_class(mesg_num, field_names):
+    '''
+    Returns the class of the message type with a slot for each of the given field names.
+    Names which can not be slots are stored in the dictionary of extra fields instead.
+    '''
+    key = (mesg_num, tuple(field_names))
+    layout_class = _layout_classes.get(key)
+    if layout_class is not None:
+        return layout_class
+
+    slot_names = tuple(dict.fromkeys(name for name in field_names if _is_slot_name(name)))
+    mesg_type = get_mesg_type(mesg_num)
+    layout_class = type(mesg_type.__name__, (mesg_type,), {
+        '__slots__': slot_names,
+        '__module__': __name__,
+        '_layout': key[1],
+    })
+    layout_class._slot_map = {name: layout_class.__dict__[name] for name in slot_names}
+
+    return _layout_classes.setdefault(key, layout_class)
+
+
+def _rebuild_mesg(mesg_num, field_names, fields):
+    return _get_layout_class(mesg_num, field_names)(fields)
@@ -90,6 +90,10 @@ class _OutputStream:
         self._buffer.extend(encoded)
         self._buffer.append(0x00)
 
+    def write_bytes(self, data):
+        """Write raw bytes as they are."""
+        self._buffer.extend(data)
+
     def write_value(self, value, base_type):
         """Write a single value of the given base type."""
         base_type_def = FIT.BASE_TYPE_DEFINITIONS.get(base_type)
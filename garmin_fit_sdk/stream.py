@@ -21,6 +21,9 @@ from enum import Enum
 from io import BufferedReader, BytesIO
 from struct import unpack
 
+# The number of bytes read from the buffered reader at a time, which small reads and peeks are served from
+_BLOCK_SIZE = 64 * 1024
+
 
 class Endianness(str, Enum):
     '''An enum class for denoting a bytes endinannes (LSB or MSB)'''
@@ -32,9 +35,16 @@ class Stream:
     '''
     A class that represents a stream of data from a .fit file.
 
+    The stream keeps its own position, and reads the data from the buffered reader a block at
+    a time, so the position of the buffered reader is not the position of the stream.
+
     Attributes:
         _buffered_reader: The buffered reader that holds the stream data.
         _stream_length:   The calculated length of the stream.
+        _position:        The current position in the stream.
+        _block:           The bytes most recently read from the buffered reader.
+        _block_view:      A memoryview of _block, which values are unpacked from without copying.
+        _block_start:     The position in the stream of the first byte of _block.
         _crc_calculator:  The CRC calculator which calculates the CRC each time bytes are read.
     '''
     @staticmethod
@@ -81,6 +91,11 @@ class Stream:
     def __init__(self, buffered_reader: BufferedReader, stream_length):
         self._buffered_reader = buffered_reader
         self._stream_length = stream_length
+        self._position = buffered_reader.tell()
+
+        self._block = b''
+        self._block_view = memoryview(self._block)
+        self._block_start = 0
 
         self._crc_calculator = None
 
@@ -95,47 +110,110 @@ class Stream:
         self._buffered_reader.close()
 
     def get_buffered_reader(self):
-        '''Returns the buffered reader of the stream.'''
+        '''
+        Returns the buffered reader of the stream, positioned at the stream position. The stream
+        reads ahead of its position in blocks, so the reader is moved back to the stream position.
+        '''
+        self._buffered_reader.seek(self._position)
         return self._buffered_reader
 
     def peek_byte(self):
         '''Reads one byte from the stream without advancing stream position.'''
-        return self._buffered_reader.peek(1)[0]
+        offset = self.__block_offset(self._position, 1)
+        return self._block[offset]
 
     def peek_bytes(self, num_bytes: int):
         '''Reads the given amount of bytes from the stream without advancing stream position '''
-        return self._buffered_reader.peek(num_bytes)[0:num_bytes]
+        return self.__read_range(self._position, num_bytes)
 
     def slice(self, start: int, end: int):
-        '''Returns all of the bytes from the stream between the given start and end.'''
-        starting_position = self.position()
-        self.seek(start)
-        slice = self.peek_bytes(end - start)[0: end - start]
-        self.seek(starting_position)
-        return slice
+        '''
+        Returns all of the bytes from the stream between the given start and end, without
+        changing the stream position. Fewer bytes are only returned when the data ends first.
+        '''
+        return self.__read_range(start, end - start)
+
+    def iter_slices(self, start: int, end: int, slice_size: int = _BLOCK_SIZE):
+        '''
+        Yields the bytes from the stream between the given start and end in consecutive slices
+        of at most slice_size bytes, so a large range, such as a multi-GB file, is never held in
+        memory at once. The stream position is not changed.
+        '''
+        position = start
+        while position < end:
+            self._buffered_reader.seek(position)
+            data = self._buffered_reader.read(min(slice_size, end - position))
+            if len(data) == 0:
+                return
+
+            yield data
+            position += len(data)
 
     def seek(self, position: int):
         '''Moves the stream position of stream to the given position.'''
-        self._buffered_reader.seek(position)
+        self._position = position
 
     def read_byte(self):
         '''Reads one byte from the stream.'''
-        if self.position() > self._stream_length - 1:
-            raise IndexError("FIT Runtime Error, end of file reached at byte pos: " + self.position())
-        return self.read_bytes(1)[0]
+        position = self._position
+        if position > self._stream_length - 1:
+            raise IndexError("FIT Runtime Error, end of file reached at byte pos: " + str(position))
+
+        offset = self.__block_offset(position, 1)
+        value = self._block[offset]
+        self._position = position + 1
+
+        if self._crc_calculator is not None:
+            self._crc_calculator.add_bytes(self._block, offset, offset + 1)
+
+        return value
 
     def read_bytes(self, num_bytes: int):
         '''Reads the given amount of bytes from the stream.'''
-        if num_bytes > (self._stream_length - self.position()):
+        position = self._position
+        if num_bytes > (self._stream_length - position):
             raise IndexError("FIT Runtime Error number of bytes provided is longer than the number of bytes remaining")
 
-        read_bytes = self._buffered_reader.read(num_bytes)[0:num_bytes]
+        read_bytes = self.__read_range(position, num_bytes)
+        self._position = position + len(read_bytes)
 
         if self._crc_calculator is not None:
             self._crc_calculator.add_bytes(read_bytes, 0, num_bytes)
 
         return read_bytes
 
+    def __read_range(self, start, num_bytes):
+        '''
+        Returns the given number of bytes from the start position, or fewer if the data ends
+        first, without changing the stream position.
+        '''
+        if num_bytes <= 0:
+            return b''
+
+        offset = start - self._block_start
+        if num_bytes > _BLOCK_SIZE and (offset < 0 or offset + num_bytes > len(self._block)):
+            # Large ranges, such as a whole file, are read directly instead of through the block
+            self._buffered_reader.seek(start)
+            return self._buffered_reader.read(num_bytes)
+
+        offset = self.__block_offset(start, num_bytes)
+        return self._block[offset : offset + num_bytes]
+
+    def __block_offset(self, position, num_bytes):
+        '''
+        Returns the offset of the given position in the block, first reading a new block from
+        the position if the block does not hold the given number of bytes.
+        '''
+        offset = position - self._block_start
+        if offset >= 0 and offset + num_bytes <= len(self._block):
+            return offset
+
+        self._buffered_reader.seek(position)
+        self._block = self._buffered_reader.read(max(num_bytes, _BLOCK_SIZE))
+        self._block_view = memoryview(self._block)
+        self._block_start = position
+        return 0
+
     def read_unint_16(self, endianness: Endianness = Endianness.LITTLE):
         '''Reads a 16-bit unsigned integer from the stream with the given endianness'''
         return int.from_bytes(self.read_bytes(2), endianness)
@@ -151,11 +229,11 @@ class Stream:
 
     def reset(self):
         '''Resets the stream position to the beginning of the stream.'''
-        self._buffered_reader.seek(0)
+        self._position = 0
 
     def position(self):
         '''Returns the current position in the stream.'''
-        return self._buffered_reader.tell()
+        return self._position
 
     def get_length(self):
         '''Returns the total length of the stream.'''
@@ -163,11 +241,19 @@ class Stream:
 
     def read_and_unpack(self, size: int, struct_format_string):
         '''Reads a given number of bytes and unpacks the binary struct given a formatting string template'''
-        byte_array = self.read_bytes(size)
+        position = self._position
+        offset = position - self._block_start
+        if size > self._stream_length - position or offset < 0 or offset + size > len(self._block):
+            return list(unpack(struct_format_string, self.read_bytes(size)))
+
+        # Unpack straight from the block, without copying the bytes
+        end = offset + size
+        self._position = position + size
 
-        values = list(unpack(struct_format_string, byte_array))
+        if self._crc_calculator is not None:
+            self._crc_calculator.add_bytes(self._block, offset, end)
 
-        return values
+        return list(unpack(struct_format_string, self._block_view[offset:end]))
 
     def get_crc_caclulator(self):
         '''Returns the CRC calculator'''
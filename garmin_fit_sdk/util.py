@@ -14,6 +14,7 @@
 
 from datetime import datetime, timezone
 from . import fit as FIT
+from .accelerator import speedups as _speedups
 
 FIT_EPOCH_S = 631065600
 
@@ -22,8 +23,13 @@ FIELD_TYPE_TO_BASE_TYPE = FIT.FIELD_TYPE_TO_BASE_TYPE
 
 def convert_timestamp_to_datetime(timestamp):
     '''Takes a FIT datetime timestamp and converts it to a python datetime in utc'''
-    utc_datetime = datetime.fromtimestamp((timestamp if timestamp else 0) + FIT_EPOCH_S, timezone.utc)
-    return utc_datetime.replace(tzinfo=timezone.utc)
+    return datetime.fromtimestamp((timestamp if timestamp else 0) + FIT_EPOCH_S, timezone.utc)
+
+def convert_timestamps_to_datetimes(timestamps):
+    '''Takes a column of FIT datetime timestamps and converts them to a list of python datetimes in utc'''
+    from_timestamp = datetime.fromtimestamp
+    utc = timezone.utc
+    return [from_timestamp((timestamp if timestamp else 0) + FIT_EPOCH_S, utc) for timestamp in timestamps]
 
 def convert_datetime_to_timestamp(value):
     '''Takes a python datetime and converts it to a FIT datetime timestamp.'''
@@ -42,6 +48,9 @@ def _convert_string(string):
 def _only_invalid_values(raw_field_value, invalid_value):
     '''Returns whether the given value(s) consist of only invalid values.'''
     if isinstance(raw_field_value, list):
+        if _speedups is not None:
+            return _speedups.only_invalid_values(raw_field_value, invalid_value)
+
         for value in raw_field_value:
             if value != invalid_value:
                 return False
@@ -50,6 +59,23 @@ def _only_invalid_values(raw_field_value, invalid_value):
 
     return raw_field_value == invalid_value
 
+def _mask_invalid_values(raw_values, start, count, invalid_value):
+    '''
+    Returns the given number of values from the start index with the invalid values replaced
+    by None, or None if all of the values are invalid.
+    '''
+    if _speedups is not None:
+        values = _speedups.mask_invalid_values(raw_values, start, count, invalid_value)
+        if values is not NotImplemented:
+            return values
+
+    values = [value if value != invalid_value else None for value in raw_values[start : start + count]]
+    for value in values:
+        if value is not None:
+            return values
+
+    return None
+
 def _sanitize_values(values):
     '''Reduces values if it is an array of length one.'''
     if isinstance(values, list) and len(values) == 1:
@@ -0,0 +1,12 @@
+'''setup.py: Builds the optional compiled accelerator when GARMIN_FIT_SDK_BUILD_ACCELERATOR is set.'''
+
+import os
+
+from setuptools import Extension, setup
+
+ext_modules = []
+if os.environ.get('GARMIN_FIT_SDK_BUILD_ACCELERATOR', '') not in ('', '0'):
+    # Optional, so the package still installs as pure Python when there is no compiler
+    ext_modules.append(Extension('garmin_fit_sdk._speedups', ['garmin_fit_sdk/_speedups.c'], optional=True))
+
+setup(ext_modules=ext_modules)
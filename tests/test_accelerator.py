@@ -0,0 +1,154 @@
+'''test_accelerator.py: Contains the set of tests comparing the compiled accelerator to the pure Python implementations in the Python FIT SDK'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import random
+
+import pytest
+from garmin_fit_sdk import BitStream, CrcCalculator, Decoder, Stream, is_accelerated
+from garmin_fit_sdk import accelerator, bitstream, crc_calculator, util
+from garmin_fit_sdk import fit as FIT
+
+from tests.data import Data
+
+_NAN = float('nan')
+
+requires_accelerator = pytest.mark.skipif(not is_accelerated(), reason='the compiled accelerator is not built or is disabled')
+
+
+@pytest.fixture
+def pure_python(monkeypatch):
+    '''Disables the compiled accelerator in the modules which use it.'''
+    for module in (bitstream, crc_calculator, util):
+        monkeypatch.setattr(module, '_speedups', None)
+
+
+def test_is_accelerated():
+    '''Tests that is_accelerated() reports whether the compiled module is in use.'''
+    assert is_accelerated() is (accelerator.speedups is not None)
+
+
+@requires_accelerator
+class TestCrc:
+    @pytest.mark.parametrize('size', [0, 1, 14, 1000])
+    def test_matches_pure_python(self, size, pure_python):
+        '''Tests that the compiled CRC matches the pure Python CRC over random bytes.'''
+        data = bytes(random.Random(size).randrange(256) for _ in range(size))
+        compiled = accelerator.speedups.update_crc(data, 0, size, 0)
+
+        assert compiled == CrcCalculator.calculate_crc(data, 0, size)
+        assert accelerator.speedups.update_crc(bytearray(data), 0, size, 0) == compiled
+        assert accelerator.speedups.update_crc(memoryview(data), 0, size, 0) == compiled
+
+    def test_bounds_match_slicing(self, pure_python):
+        '''Tests that out of range and negative bounds are treated the same as slicing.'''
+        data = bytes(range(20))
+        for start, end in [(5, 100), (-5, 20), (15, 5), (-100, 3)]:
+            assert accelerator.speedups.update_crc(data, start, end, 0x1234) == CrcCalculator._update_crc_bytes(data, start, end, 0x1234)
+
+    def test_unsupported_buffer_falls_back(self):
+        '''Tests that buffers the compiled CRC does not handle are returned to the pure Python implementation.'''
+        assert accelerator.speedups.update_crc(list(Data.fit_file_short), 0, 12, 0) is NotImplemented
+        assert CrcCalculator.calculate_crc(list(Data.fit_file_short), 0, 12) == CrcCalculator.calculate_crc(Data.fit_file_short, 0, 12)
+
+
+@requires_accelerator
+class TestReadBitsList:
+    @pytest.mark.parametrize('base_type', [FIT.BASE_TYPE['UINT8'], FIT.BASE_TYPE['UINT16'], FIT.BASE_TYPE['UINT32'], FIT.BASE_TYPE['SINT8']])
+    def test_matches_bitstream(self, base_type):
+        '''Tests that the compiled bit reads match BitStream for random data and widths.'''
+        rng = random.Random(base_type)
+        bits_per_position = FIT.BASE_TYPE_DEFINITIONS[base_type]['size'] * 8
+        for _ in range(200):
+            num_elements = rng.randrange(1, 64 // bits_per_position + 1)
+            data = [rng.randrange(-(1 << bits_per_position), 1 << bits_per_position) for _ in range(num_elements)]
+            if num_elements == 1 and rng.random() < 0.5:
+                data = data[0]
+            bits_to_read = [rng.randrange(0, 20) for _ in range(rng.randrange(0, 8))]
+
+            assert accelerator.speedups.read_bits_list(data, bits_per_position, bits_to_read) == \
+                BitStream(data, base_type).read_bits_list(bits_to_read)
+
+    @pytest.mark.parametrize('base_type', [FIT.BASE_TYPE['UINT8'], FIT.BASE_TYPE['UINT16'], FIT.BASE_TYPE['UINT32'], FIT.BASE_TYPE['UINT64']])
+    def test_more_than_64_bits_matches_bitstream(self, base_type):
+        '''Tests that the compiled bit reads of data wider than 64 bits match BitStream.'''
+        rng = random.Random(base_type)
+        bits_per_position = FIT.BASE_TYPE_DEFINITIONS[base_type]['size'] * 8
+        for _ in range(200):
+            data = [rng.randrange(1 << bits_per_position) for _ in range(rng.randrange(1, 20))]
+            bits_to_read = [rng.randrange(0, 65) for _ in range(rng.randrange(0, 20))]
+
+            assert accelerator.speedups.read_bits_list(data, bits_per_position, bits_to_read) == \
+                BitStream(data, base_type).read_bits_list(bits_to_read)
+
+    def test_hr_event_timestamps(self):
+        '''Tests the 12 bit event timestamps of a heart rate message, packed into 10 bytes.'''
+        data = [0xFF, 0x0F, 0x01, 0x20, 0x00, 0x03, 0x40, 0x00, 0x05, 0x60]
+        bits_to_read = [12] * 8
+
+        values = accelerator.speedups.read_bits_list(data, 8, bits_to_read)
+
+        assert values is not NotImplemented and len(values) == 6
+        assert values == BitStream(data, FIT.BASE_TYPE['UINT8']).read_bits_list(bits_to_read)
+
+    def test_width_wider_than_64_bits_falls_back(self):
+        '''Tests that a component wider than 64 bits is returned to the pure Python implementation.'''
+        data = [0xFF] * 9
+
+        assert accelerator.speedups.read_bits_list(data, 8, [72]) is NotImplemented
+        assert bitstream._read_bits_list(data, FIT.BASE_TYPE['UINT8'], [72]) == [(1 << 72) - 1]
+
+    def test_full_64_bits(self):
+        '''Tests reading all 64 bits of the data at once.'''
+        data = [0xFFFFFFFF, 0x80000000]
+
+        assert accelerator.speedups.read_bits_list(data, 32, [64]) == [0x80000000FFFFFFFF]
+
+
+@requires_accelerator
+class TestInvalidValues:
+    @pytest.mark.parametrize('raw_values,start,count,invalid', [
+        ([1, 0xFF, 3, 0xFF], 0, 4, 0xFF),
+        ([1, 0xFF, 3, 0xFF], 1, 3, 0xFF),
+        ([0xFF, 0xFF, 7], 0, 2, 0xFF),
+        ([0xFF, 0xFF, 7], 0, 0, 0xFF),
+        ([1.5, float('nan'), 2.0], 0, 3, 2.0),
+        ([_NAN, 1.5], 0, 2, _NAN),
+    ])
+    def test_mask_matches_pure_python(self, raw_values, start, count, invalid, pure_python):
+        '''Tests that the compiled masking of invalid values matches the pure Python masking.'''
+        compiled = accelerator.speedups.mask_invalid_values(raw_values, start, count, invalid)
+        expected = util._mask_invalid_values(raw_values, start, count, invalid)
+
+        assert repr(compiled) == repr(expected)
+
+    @pytest.mark.parametrize('raw_values,invalid', [
+        ([0xFF, 0xFF], 0xFF),
+        ([0xFF, 0x00], 0xFF),
+        ([], 0xFF),
+    ])
+    def test_only_invalid_matches_pure_python(self, raw_values, invalid, pure_python):
+        '''Tests that the compiled check for only invalid values matches the pure Python check.'''
+        assert accelerator.speedups.only_invalid_values(raw_values, invalid) is util._only_invalid_values(raw_values, invalid)
+
+
+@requires_accelerator
+@pytest.mark.parametrize('file', ['tests/fits/ActivityDevFields.fit', 'tests/fits/HrmPluginTestActivity.fit', 'tests/fits/WithGearChangeData.fit'])
+def test_decode_matches_pure_python(file, mocker):
+    '''Tests that decoding a file gives the same messages with and without the accelerator.'''
+    stream = Stream.from_file(file)
+    messages, errors = Decoder(stream).read()
+
+    for module in (bitstream, crc_calculator, util):
+        mocker.patch.object(module, '_speedups', None)
+    stream = Stream.from_file(file)
+    pure_messages, pure_errors = Decoder(stream).read()
+
+    assert len(errors) == 0 and len(pure_errors) == 0
+    assert repr(messages) == repr(pure_messages)
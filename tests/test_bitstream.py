@@ -39,25 +39,25 @@ class TestReadBit:
 
 class TestReadBitsFromArray:
     @pytest.mark.parametrize(
-        "data,base_type,bits_to_read,expected_values,takes_fast_path",
+        "data,base_type,bits_to_read,expected_values",
         [
-            ([0xAB],                             FIT.BASE_TYPE['UINT8'],  [8],        [0xAB],                              True),
-            ([0xAB],                             FIT.BASE_TYPE['UINT8'],  [4, 4],     [0xB, 0xA],                          False),
-            ([0xAB],                             FIT.BASE_TYPE['UINT8'],  [4,1,1,1,1],[0xB, 0, 1, 0, 1],                   False),
-            ([0xAA, 0xCB],                       FIT.BASE_TYPE['UINT8'],  [16],       [0xCBAA],                            False),
-            ([0xAA, 0xCB, 0xDE, 0xFF],           FIT.BASE_TYPE['UINT8'],  [16, 16],   [0xCBAA, 0xFFDE],                    False),
-            ([0xAA, 0xCB, 0xDE, 0xFF],           FIT.BASE_TYPE['UINT8'],  [32],       [0xFFDECBAA],                        False),
-            ([0xAA, 0xBB],                       FIT.BASE_TYPE['UINT8'],  [8, 8],     [0xAA, 0xBB],                        True),
-            ([0xABCD, 0xEF01],                   FIT.BASE_TYPE['UINT16'], [16, 16],   [0xABCD, 0xEF01],                    True),
-            ([0xABCD, 0xEF01],                   FIT.BASE_TYPE['UINT16'], [32],       [0xEF01ABCD],                        False),
-            ([0xABCDEF01],                       FIT.BASE_TYPE['UINT32'], [32],       [0xABCDEF01],                        True),
-            ([0xABCDEF01, 0x12345678],           FIT.BASE_TYPE['UINT32'], [32, 32],   [0xABCDEF01, 0x12345678],            True),
-            ([0x7BCDEF0123456789],               FIT.BASE_TYPE['UINT64'], [64],       [0x7BCDEF0123456789],                True),
+            ([0xAB],                             FIT.BASE_TYPE['UINT8'],  [8],        [0xAB]),
+            ([0xAB],                             FIT.BASE_TYPE['UINT8'],  [4, 4],     [0xB, 0xA]),
+            ([0xAB],                             FIT.BASE_TYPE['UINT8'],  [4,1,1,1,1],[0xB, 0, 1, 0, 1]),
+            ([0xAA, 0xCB],                       FIT.BASE_TYPE['UINT8'],  [16],       [0xCBAA]),
+            ([0xAA, 0xCB, 0xDE, 0xFF],           FIT.BASE_TYPE['UINT8'],  [16, 16],   [0xCBAA, 0xFFDE]),
+            ([0xAA, 0xCB, 0xDE, 0xFF],           FIT.BASE_TYPE['UINT8'],  [32],       [0xFFDECBAA]),
+            ([0xAA, 0xBB],                       FIT.BASE_TYPE['UINT8'],  [8, 8],     [0xAA, 0xBB]),
+            ([0xABCD, 0xEF01],                   FIT.BASE_TYPE['UINT16'], [16, 16],   [0xABCD, 0xEF01]),
+            ([0xABCD, 0xEF01],                   FIT.BASE_TYPE['UINT16'], [32],       [0xEF01ABCD]),
+            ([0xABCDEF01],                       FIT.BASE_TYPE['UINT32'], [32],       [0xABCDEF01]),
+            ([0xABCDEF01, 0x12345678],           FIT.BASE_TYPE['UINT32'], [32, 32],   [0xABCDEF01, 0x12345678]),
+            ([0x7BCDEF0123456789],               FIT.BASE_TYPE['UINT64'], [64],       [0x7BCDEF0123456789]),
             ([0x7BCDEF0123456789,
               0x0BCDEF0123456789],               FIT.BASE_TYPE['UINT64'], [64, 64],   [0x7BCDEF0123456789,
-                                                                                        0x0BCDEF0123456789],                True),
-            ([0xABCDEF0123456789],               FIT.BASE_TYPE['UINT64'], [32],       [0x23456789],                        False),
-            ([0xABCDEF0123456789],               FIT.BASE_TYPE['UINT64'], [32, 32],   [0x23456789, 0xABCDEF01],            False),
+                                                                                        0x0BCDEF0123456789]),
+            ([0xABCDEF0123456789],               FIT.BASE_TYPE['UINT64'], [32],       [0x23456789]),
+            ([0xABCDEF0123456789],               FIT.BASE_TYPE['UINT64'], [32, 32],   [0x23456789, 0xABCDEF01]),
         ],
         ids=[
             "UInt8 [0xAB] - 8",
@@ -77,33 +77,32 @@ class TestReadBitsFromArray:
             "UInt64 [0xABCDEF0123456789] - 32,32",
         ],
     )
-    def test_read_bits(self, data, base_type, bits_to_read, expected_values, takes_fast_path):
+    def test_read_bits(self, data, base_type, bits_to_read, expected_values):
         bit_stream = BitStream(data, base_type)
         for i, expected in enumerate(expected_values):
             assert bit_stream.read_bits(bits_to_read[i]) == expected
-        assert (bit_stream._array is None) == takes_fast_path
 
 
 class TestReadBitsFromInteger:
     @pytest.mark.parametrize(
-        "data,base_type,bits_to_read,expected_values,takes_fast_path",
+        "data,base_type,bits_to_read,expected_values",
         [
-            (0xAB,               FIT.BASE_TYPE['UINT8'],  [8],         [0xAB],                   True),
-            (0xAB,               FIT.BASE_TYPE['UINT8'],  [4, 4],      [0xB, 0xA],               False),
-            (0xAB,               FIT.BASE_TYPE['UINT8'],  [4,1,1,1,1], [0xB, 0, 1, 0, 1],        False),
-            (0xAACB,             FIT.BASE_TYPE['UINT16'], [16],        [0xAACB],                 True),
-            (0xABCDEF01,         FIT.BASE_TYPE['UINT32'], [16, 16],    [0xEF01, 0xABCD],          False),
-            (0xABCDEF01,         FIT.BASE_TYPE['UINT32'], [32],        [0xABCDEF01],             True),
-            (0x7BCDEF0123456789, FIT.BASE_TYPE['UINT64'], [64],        [0x7BCDEF0123456789],     True),
-            (0xABCDEF0123456789, FIT.BASE_TYPE['UINT64'], [64],        [0xABCDEF0123456789],     True),
-            (0xABCDEF0123456789, FIT.BASE_TYPE['UINT64'], [32],        [0x23456789],             False),
-            (0xABCDEF0123456789, FIT.BASE_TYPE['UINT64'], [32, 32],    [0x23456789, 0xABCDEF01], False),
-            (25,                 FIT.BASE_TYPE['SINT8'],  [8],         [25],                     True),
-            (-56,                FIT.BASE_TYPE['SINT8'],  [8],         [200],                    True),
-            (500,                FIT.BASE_TYPE['SINT16'], [16],        [500],                    True),
-            (-1,                 FIT.BASE_TYPE['SINT16'], [16],        [0xFFFF],                 True),
-            (0x3FC00000,         FIT.BASE_TYPE['FLOAT32'], [32],       [0x3FC00000],             True),
-            (0x3FF8000000000000, FIT.BASE_TYPE['FLOAT64'], [64],       [0x3FF8000000000000],     True),
+            (0xAB,               FIT.BASE_TYPE['UINT8'],  [8],         [0xAB]),
+            (0xAB,               FIT.BASE_TYPE['UINT8'],  [4, 4],      [0xB, 0xA]),
+            (0xAB,               FIT.BASE_TYPE['UINT8'],  [4,1,1,1,1], [0xB, 0, 1, 0, 1]),
+            (0xAACB,             FIT.BASE_TYPE['UINT16'], [16],        [0xAACB]),
+            (0xABCDEF01,         FIT.BASE_TYPE['UINT32'], [16, 16],    [0xEF01, 0xABCD]),
+            (0xABCDEF01,         FIT.BASE_TYPE['UINT32'], [32],        [0xABCDEF01]),
+            (0x7BCDEF0123456789, FIT.BASE_TYPE['UINT64'], [64],        [0x7BCDEF0123456789]),
+            (0xABCDEF0123456789, FIT.BASE_TYPE['UINT64'], [64],        [0xABCDEF0123456789]),
+            (0xABCDEF0123456789, FIT.BASE_TYPE['UINT64'], [32],        [0x23456789]),
+            (0xABCDEF0123456789, FIT.BASE_TYPE['UINT64'], [32, 32],    [0x23456789, 0xABCDEF01]),
+            (25,                 FIT.BASE_TYPE['SINT8'],  [8],         [25]),
+            (-56,                FIT.BASE_TYPE['SINT8'],  [8],         [200]),
+            (500,                FIT.BASE_TYPE['SINT16'], [16],        [500]),
+            (-1,                 FIT.BASE_TYPE['SINT16'], [16],        [0xFFFF]),
+            (0x3FC00000,         FIT.BASE_TYPE['FLOAT32'], [32],       [0x3FC00000]),
+            (0x3FF8000000000000, FIT.BASE_TYPE['FLOAT64'], [64],       [0x3FF8000000000000]),
         ],
         ids=[
             "UInt8 0xAB - 8",
@@ -117,18 +116,17 @@ class TestReadBitsFromInteger:
             "UInt64 0xABCDEF0123456789 - 32",
             "UInt64 0xABCDEF0123456789 - 32,32",
             "SInt8 25 - 8 positive value unchanged by mask",
-            "SInt8 -56 (0xC8) - 8 fast path matches slow path unsigned bit pattern",
+            "SInt8 -56 (0xC8) - 8 reads unsigned bit pattern",
             "SInt16 500 - 16 positive value unchanged by mask",
-            "SInt16 -1 (0xFFFF) - 16 fast path matches slow path unsigned bit pattern",
-            "Float32 0x3FC00000 (1.5f) - 32 fast path uses bit mask",
-            "Float64 0x3FF8000000000000 (1.5d) - 64 fast path uses bit mask",
+            "SInt16 -1 (0xFFFF) - 16 reads unsigned bit pattern",
+            "Float32 0x3FC00000 (1.5f) - 32 uses bit mask",
+            "Float64 0x3FF8000000000000 (1.5d) - 64 uses bit mask",
         ],
     )
-    def test_read_bits(self, data, base_type, bits_to_read, expected_values, takes_fast_path):
+    def test_read_bits(self, data, base_type, bits_to_read, expected_values):
         bit_stream = BitStream(data, base_type)
         for i, expected in enumerate(expected_values):
             assert bit_stream.read_bits(bits_to_read[i]) == expected
-        assert (bit_stream._array is None) == takes_fast_path
 
 
 class TestExceptions:
@@ -147,49 +145,64 @@ class TestExceptions:
             bit_stream.read_bit()
 
 
-class TestDeferredInit:
-    '''Tests covering the deferred _array initialisation state machine in BitStream.'''
+class TestReadBitsList:
+    @pytest.mark.parametrize(
+        "data,base_type,bits_to_read,expected_values,bits_available",
+        [
+            ([0xAB],                   FIT.BASE_TYPE['UINT8'],  [4, 4],       [0xB, 0xA],               0),
+            ([0xAA, 0xCB, 0xDE, 0xFF], FIT.BASE_TYPE['UINT8'],  [16, 16],     [0xCBAA, 0xFFDE],         0),
+            ([0x01, 0x23, 0x45],       FIT.BASE_TYPE['UINT8'],  [12, 12],     [0x301, 0x452],           0),
+            ([0x01, 0x23, 0x45],       FIT.BASE_TYPE['UINT8'],  [12, 12, 12], [0x301, 0x452],           0),
+            (0xABCDEF01,               FIT.BASE_TYPE['UINT32'], [8, 8],       [0x01, 0xEF],             16),
+            (0xABCDEF01,               FIT.BASE_TYPE['UINT32'], [8, 32],      [0x01],                   24),
+            (0xAB,                     FIT.BASE_TYPE['UINT8'],  [],           [],                       8),
+        ],
+        ids=[
+            "UInt8 [0xAB] - 4,4",
+            "UInt8 [0xAA, 0xCB, 0xDE, 0xFF] - 16,16",
+            "UInt8 [0x01, 0x23, 0x45] - 12,12 (cross-boundary)",
+            "UInt8 [0x01, 0x23, 0x45] - 12,12,12 stops when bits are exhausted",
+            "UInt32 0xABCDEF01 - 8,8 leaves remaining bits",
+            "UInt32 0xABCDEF01 - 8,32 stops at width larger than bits available",
+            "UInt8 0xAB - no widths",
+        ],
+    )
+    def test_read_bits_list(self, data, base_type, bits_to_read, expected_values, bits_available):
+        '''Tests read_bits_list() matches sequential read_bits() calls and stops when bits run out.'''
+        bit_stream = BitStream(data, base_type)
+        assert bit_stream.read_bits_list(bits_to_read) == expected_values
+        assert bit_stream.bits_available() == bits_available
 
-    def test_fast_path_multiple_elements_sequential(self):
-        '''Fast path fires for each full-element read, leaving _array None between reads.'''
-        bit_stream = BitStream([0x11, 0x22, 0x33], FIT.BASE_TYPE['UINT8'])
-        assert bit_stream._array is None
-        assert bit_stream.read_bits(8) == 0x11
-        assert bit_stream._array is None
-        assert bit_stream.bits_available() == 16
-        assert bit_stream.read_bits(8) == 0x22
-        assert bit_stream._array is None
-        assert bit_stream.read_bits(8) == 0x33
-        assert bit_stream.bits_available() == 0
+    def test_hr_event_timestamp_12(self):
+        '''Tests unpacking an HR event_timestamp_12 array of eight 12-bit values in one call.'''
+        expected_values = [0x123, 0x456, 0x789, 0xABC, 0xDEF, 0x000, 0xFFF, 0x800]
+        packed = 0
+        for i, value in enumerate(expected_values):
+            packed |= value << (i * 12)
+        data = list(packed.to_bytes(12, 'little'))
 
-    def test_slow_path_after_fast_path_initialises_array(self):
-        '''A partial read after fast-path consumption triggers lazy _array init at the correct offset.'''
-        bit_stream = BitStream([0xAB, 0xCD], FIT.BASE_TYPE['UINT8'])
-        assert bit_stream.read_bits(8) == 0xAB
-        assert bit_stream._array is None
-        assert bit_stream.read_bits(4) == 0xD   # low nibble of 0xCD
-        assert bit_stream._array is not None
-        assert bit_stream.read_bits(4) == 0xC   # high nibble of 0xCD
-        assert bit_stream.bits_available() == 0
+        bit_stream = BitStream(data, FIT.BASE_TYPE['BYTE'])
+        assert bit_stream.read_bits_list([12] * 10) == expected_values
+        assert bit_stream.has_bits_available() is False
 
-    def test_read_bit_after_fast_path_initialises_array(self):
-        '''read_bit() after fast-path consumption initialises _array lazily from the correct offset.'''
-        bit_stream = BitStream([0xFF, 0x00], FIT.BASE_TYPE['UINT8'])
-        assert bit_stream.read_bits(8) == 0xFF
-        assert bit_stream._array is None
-        assert bit_stream.read_bit() == 0
-        assert bit_stream._array is not None
-        for _ in range(7):
-            assert bit_stream.read_bit() == 0
-        assert bit_stream.bits_available() == 0
 
-    def test_reset_restores_deferred_state(self):
-        '''reset() restores _array to None, making the fast path available and bits_available correct.'''
+class TestReset:
+    def test_reset_after_partial_reads(self):
+        '''reset() rewinds to the start of the data and restores bits_available.'''
         bit_stream = BitStream([0x12, 0x34], FIT.BASE_TYPE['UINT8'])
-        bit_stream.read_bits(4)
-        assert bit_stream._array is not None
+        assert bit_stream.read_bits(4) == 0x2
+        assert bit_stream.read_bit() == 1
         bit_stream.reset()
-        assert bit_stream._array is None
         assert bit_stream.bits_available() == 16
         assert bit_stream.read_bits(8) == 0x12
         assert bit_stream.read_bits(8) == 0x34
+        assert bit_stream.bits_available() == 0
+
+    def test_mixed_bit_and_bits_reads(self):
+        '''read_bit() and read_bits() can be interleaved across element boundaries.'''
+        bit_stream = BitStream([0xFF, 0x00], FIT.BASE_TYPE['UINT8'])
+        assert bit_stream.read_bits(7) == 0x7F
+        assert bit_stream.read_bit() == 1
+        assert bit_stream.read_bit() == 0
+        assert bit_stream.read_bits(7) == 0
+        assert bit_stream.has_bits_available() is False
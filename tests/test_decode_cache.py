@@ -0,0 +1,103 @@
+'''test_decode_cache.py: Contains the set of tests for the DecodeCache class in the Python FIT SDK'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import os
+
+import pytest
+from garmin_fit_sdk import DecodeCache, Decoder, Stream
+
+from tests.data import Data
+
+
+class TestDecodeCache:
+    '''Set of tests which verify reading decoded messages through the disk cache.'''
+    def test_cache_hit_skips_decoding(self, tmp_path, mocker):
+        '''Tests that the second read of the same contents returns the cached messages without decoding.'''
+        cache = DecodeCache(tmp_path)
+        expected_messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read()
+
+        messages, errors = cache.read(Stream.from_file('tests/fits/ActivityDevFields.fit'))
+        assert len(errors) == 0
+        assert messages == expected_messages
+
+        spy_read = mocker.spy(Decoder, "read")
+        messages, errors = cache.read(Stream.from_file('tests/fits/ActivityDevFields.fit'))
+
+        assert spy_read.call_count == 0
+        assert len(errors) == 0
+        assert messages == expected_messages
+
+    def test_key_includes_read_options(self, tmp_path):
+        '''Tests that reads with different options are cached separately, and that default options share an entry.'''
+        assert DecodeCache.get_key(Data.fit_file_short) == DecodeCache.get_key(Data.fit_file_short, convert_types_to_strings=True)
+        assert DecodeCache.get_key(Data.fit_file_short) != DecodeCache.get_key(Data.fit_file_short, convert_types_to_strings=False)
+        assert DecodeCache.get_key(Data.fit_file_short) != DecodeCache.get_key(Data.fit_file_short_new)
+
+        cache = DecodeCache(tmp_path)
+        messages, errors = cache.read(Stream.from_byte_array(Data.fit_file_short))
+        messages, errors = cache.read(Stream.from_byte_array(Data.fit_file_short), convert_types_to_strings=False)
+
+        assert messages['file_id_mesgs'][0]['manufacturer'] == 255
+        assert len(os.listdir(tmp_path)) == 2
+
+    def test_results_with_errors_not_cached(self, tmp_path):
+        '''Tests that a read which returns errors is not cached.'''
+        cache = DecodeCache(tmp_path)
+        messages, errors = cache.read(Stream.from_byte_array(Data.fit_file_short_new_invalid_crc))
+
+        assert len(errors) == 1
+        assert len(os.listdir(tmp_path)) == 0
+
+    def test_listener_not_supported(self, tmp_path):
+        '''Tests that listeners can not be used when reading through the cache.'''
+        cache = DecodeCache(tmp_path)
+        with pytest.raises(ValueError):
+            cache.read(Stream.from_byte_array(Data.fit_file_short), mesg_listener=lambda mesg_num, message: None)
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        '''Tests that a corrupt entry is replaced by decoding the file again.'''
+        cache = DecodeCache(tmp_path)
+        expected_messages, errors = cache.read(Stream.from_byte_array(Data.fit_file_short))
+
+        entry_path = tmp_path / os.listdir(tmp_path)[0]
+        entry_path.write_bytes(b'corrupt')
+
+        messages, errors = cache.read(Stream.from_byte_array(Data.fit_file_short))
+        assert messages == expected_messages
+        assert entry_path.stat().st_size > len(b'corrupt')
+
+    def test_least_recently_used_entries_evicted(self, tmp_path):
+        '''Tests that the least recently used entries are removed when the cache is over its size limit.'''
+        cache = DecodeCache(tmp_path, max_size_bytes=None)
+        for data in (Data.fit_file_short, Data.fit_file_short_new, Data.fit_file_chained):
+            cache.read(Stream.from_byte_array(data))
+
+        entries = {data: tmp_path / (DecodeCache.get_key(data) + '.pickle')
+                   for data in (bytes(Data.fit_file_short), bytes(Data.fit_file_short_new), bytes(Data.fit_file_chained))}
+        for access_time, path in enumerate(entries.values()):
+            os.utime(path, (access_time, access_time))
+
+        # Reading the oldest entry makes it the most recently used
+        cache.read(Stream.from_byte_array(Data.fit_file_short))
+
+        cache.max_size_bytes = cache.get_size() - 1
+        cache.read(Stream.from_byte_array(Data.fit_file_monitoring))
+
+        assert entries[bytes(Data.fit_file_short)].exists()
+        assert entries[bytes(Data.fit_file_short_new)].exists() is False
+        assert cache.get_size() <= cache.max_size_bytes
+
+    def test_clear(self, tmp_path):
+        '''Tests removing all of the entries.'''
+        cache = DecodeCache(tmp_path)
+        cache.read(Stream.from_byte_array(Data.fit_file_short))
+        cache.clear()
+
+        assert cache.get_size() == 0
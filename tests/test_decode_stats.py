@@ -0,0 +1,92 @@
+'''test_decode_stats.py: Contains the set of tests for the DecodeStats class in the Python FIT SDK'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import pytest
+from garmin_fit_sdk import DecodeStats, Decoder, Stream
+from garmin_fit_sdk.decode_stats import STAGES
+
+from tests.data import Data
+
+
+class TestDecodeStats:
+    '''Set of tests which verify the statistics recorded while decoding.'''
+    def test_counts(self):
+        '''Tests the file, byte, definition and message counts of a decoded file.'''
+        decode_stats = DecodeStats()
+        messages, errors = Decoder(Stream.from_byte_array(Data.fit_file_short)).read(decode_stats=decode_stats)
+
+        assert len(errors) == 0
+        assert decode_stats.files_read == 1
+        assert decode_stats.bytes_read == len(Data.fit_file_short)
+        assert decode_stats.definition_counts == {'file_id': 1, 'monitoring_hr_data': 1}
+        assert decode_stats.message_counts == {'file_id': 1, 'monitoring_hr_data': 1}
+        assert decode_stats.definition_cache_hits == 0
+        assert decode_stats.decode_time > 0
+
+    def test_messages_unchanged(self):
+        '''Tests that recording statistics does not change the decoded messages.'''
+        expected_messages, expected_errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read()
+        messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read(decode_stats=DecodeStats())
+
+        assert len(errors) == len(expected_errors) == 0
+        assert messages == expected_messages
+
+    def test_stage_times(self):
+        '''Tests that time is recorded for each stage, and that stages which do not run are not timed.'''
+        decode_stats = DecodeStats()
+        Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read(
+            decode_stats=decode_stats, mesg_listener=lambda mesg_num, message: None)
+
+        assert set(decode_stats.stage_times) == set(STAGES)
+        assert all(seconds > 0 for seconds in decode_stats.stage_times.values())
+
+        decode_stats = DecodeStats()
+        Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read(
+            decode_stats=decode_stats, enable_crc_check=False, merge_heart_rates=False)
+
+        assert decode_stats.stage_times['crc'] == 0
+        assert decode_stats.stage_times['hr_merge'] == 0
+        assert decode_stats.stage_times['listeners'] == 0
+
+    def test_totals_across_reads(self):
+        '''Tests that passing the same DecodeStats to several reads totals the statistics.'''
+        decode_stats = DecodeStats()
+        decoder = Decoder(Stream.from_byte_array(Data.fit_file_short_new))
+        decoder.read(decode_stats=decode_stats)
+
+        decoder.reset(Stream.from_byte_array(Data.fit_file_short_new))
+        decoder.read(decode_stats=decode_stats)
+
+        assert decode_stats.files_read == 2
+        assert decode_stats.bytes_read == 2 * len(Data.fit_file_short_new)
+        assert decode_stats.message_counts == {'file_id': 2}
+        assert decode_stats.definition_cache_hits == 1
+
+    @pytest.mark.parametrize("workers", [(1), (2)], ids=["In Process", "Worker Processes"])
+    def test_read_chained(self, workers):
+        '''Tests that the statistics of chained files decoded in worker processes are totalled.'''
+        decode_stats = DecodeStats()
+        messages, errors = Decoder(Stream.from_byte_array(Data.fit_file_chained)).read_chained(workers=workers, decode_stats=decode_stats)
+
+        assert len(errors) == 0
+        assert decode_stats.files_read == 2
+        assert decode_stats.bytes_read == len(Data.fit_file_chained)
+        assert decode_stats.message_counts['file_id'] == 2
+
+    def test_get_dict(self):
+        '''Tests that get_dict() returns copies of the recorded statistics.'''
+        decode_stats = DecodeStats()
+        Decoder(Stream.from_byte_array(Data.fit_file_short_new)).read(decode_stats=decode_stats)
+
+        stats_dict = decode_stats.get_dict()
+        stats_dict['message_counts']['file_id'] = 100
+
+        assert stats_dict['files_read'] == 1
+        assert decode_stats.message_counts['file_id'] == 1
@@ -12,9 +12,9 @@ from datetime import datetime, timezone
 import struct
 
 import pytest
-from garmin_fit_sdk import Decoder, Profile, Stream, CrcCalculator
+from garmin_fit_sdk import Decoder, Encoder, Profile, Stream, CrcCalculator
 from garmin_fit_sdk import fit as FIT
-from garmin_fit_sdk.decoder import DecodeMode
+from garmin_fit_sdk.decoder import DecodeMode, _walk_record_slices, _walk_records
 
 from tests.data import Data
 
@@ -47,6 +47,17 @@ class TestCheckIntegrity:
 
         assert decoder.check_integrity() is False
 
+    def test_check_integrity_reads_slices(self, mocker):
+        '''Tests that the file CRC is calculated a slice at a time, instead of reading the whole file.'''
+        stream = Stream.from_file('tests/fits/ActivityDevFields.fit')
+        spy_iter_slices = mocker.spy(stream, 'iter_slices')
+        spy_read_bytes = mocker.spy(stream, 'read_bytes')
+        decoder = Decoder(stream)
+
+        assert decoder.check_integrity() is True
+        assert spy_iter_slices.call_count == 1
+        assert all(call.args[0] < stream.get_length() for call in spy_read_bytes.call_args_list)
+
     @pytest.mark.parametrize(
         "data,expected_value",
         [
@@ -392,6 +403,58 @@ class TestDecoderRead():
         assert len(errors) == 0 and len(messages['session_mesgs']) == 1
         assert messages['session_mesgs'][0]['developer_fields'][0] == 1234
 
+    def test_read_dev_data_with_changed_field_description(self):
+        '''Tests that a reused decoder decodes developer data with the field description of the file being read, when the definitions of the files are the same.'''
+        def encode_file(base_type, value):
+            field_descriptions = {
+                0: {
+                    'developer_data_id_mesg': {'mesg_num': Profile['mesg_num']['DEVELOPER_DATA_ID'], 'developer_data_index': 0},
+                    'field_description_mesg': {
+                        'mesg_num': Profile['mesg_num']['FIELD_DESCRIPTION'], 'developer_data_index': 0,
+                        'field_definition_number': 0, 'fit_base_type_id': base_type,
+                    },
+                },
+            }
+            encoder = Encoder(field_descriptions=field_descriptions)
+            encoder.write_mesg(field_descriptions[0]['developer_data_id_mesg'])
+            encoder.write_mesg(field_descriptions[0]['field_description_mesg'])
+            encoder.write_mesg({'mesg_num': Profile['mesg_num']['RECORD'], 'timestamp': 1000, 'developer_fields': {0: value}})
+            return encoder.close()
+
+        decoder = Decoder(Stream.from_byte_array(encode_file(FIT.BASE_TYPE['SINT16'], -5)))
+        messages, errors = decoder.read()
+        assert len(errors) == 0
+        assert messages['record_mesgs'][0]['developer_fields'][0] == -5
+
+        decoder.reset(Stream.from_byte_array(encode_file(FIT.BASE_TYPE['UINT16'], 65000)))
+        messages, errors = decoder.read()
+        assert len(errors) == 0
+        assert messages['record_mesgs'][0]['developer_fields'][0] == 65000
+
+    def test_field_description_listener_gets_developer_data_id(self):
+        '''Tests that the field description listener is passed copies of each field description and the developer data id of its index.'''
+        encoder = Encoder()
+        for developer_data_index in (0, 1):
+            encoder.write_mesg({'mesg_num': Profile['mesg_num']['DEVELOPER_DATA_ID'],
+                                'developer_data_index': developer_data_index, 'application_version': developer_data_index + 10})
+        for developer_data_index in (1, 0, 2):
+            encoder.write_mesg({'mesg_num': Profile['mesg_num']['FIELD_DESCRIPTION'], 'developer_data_index': developer_data_index,
+                                'field_definition_number': 0, 'fit_base_type_id': FIT.BASE_TYPE['UINT8']})
+
+        calls = []
+        def field_description_listener(key, developer_data_id_mesg, field_description_mesg):
+            calls.append((key, developer_data_id_mesg.get('application_version'), field_description_mesg['developer_data_index']))
+            developer_data_id_mesg['application_version'] = None
+            field_description_mesg['key'] = None
+
+        messages, errors = Decoder(Stream.from_byte_array(encoder.close())).read(field_description_listener=field_description_listener)
+
+        assert len(errors) == 0
+        assert calls == [(0, 11, 1), (1, 10, 0), (2, None, 2)]
+
+        assert [mesg['application_version'] for mesg in messages['developer_data_id_mesgs']] == [10, 11]
+        assert [mesg['key'] for mesg in messages['field_description_mesgs']] == [0, 1, 2]
+
     @pytest.mark.parametrize(
         "option_status",
         [
@@ -606,6 +669,21 @@ class TestComponentExpansion:
         assert 'activity_type' not in messages['monitoring_mesgs'][3] and 'intensity' not in messages['monitoring_mesgs'][3]
         assert messages['monitoring_mesgs'][3]['cycles'] == 15
 
+    def test_expanded_field_order(self):
+        '''Tests that expanded fields keep the position of a field already in the message, and are otherwise added after the other fields.'''
+        encoder = Encoder()
+        encoder.write_mesg({'mesg_num': Profile['mesg_num']['FILE_ID'], 'type': 'activity'})
+        encoder.write_mesg({'mesg_num': Profile['mesg_num']['RECORD'], 'timestamp': 1000, 'enhanced_altitude': 100.0, 'altitude': 120.0, 'speed': 1.0})
+        encoder.write_mesg({'mesg_num': Profile['mesg_num']['RECORD'], 'timestamp': 1001, 'enhanced_altitude': None, 'altitude': 120.0, 'speed': 1.0})
+        fit_data = encoder.close()
+
+        messages, errors = Decoder(Stream.from_byte_array(fit_data)).read()
+
+        assert len(errors) == 0
+        assert list(messages['record_mesgs'][0]) == ['timestamp', 'enhanced_altitude', 'altitude', 'speed', 'enhanced_speed']
+        assert list(messages['record_mesgs'][1]) == ['timestamp', 'altitude', 'speed', 'enhanced_speed', 'enhanced_altitude']
+        assert messages['record_mesgs'][0]['enhanced_altitude'] == messages['record_mesgs'][1]['enhanced_altitude'] == 120
+
 class TestMergeHeartrates:
     '''Set of tests which verify the functionality of merging heartrates to records when decoding.'''
     @pytest.mark.parametrize(
@@ -634,6 +712,29 @@ class TestMergeHeartrates:
                 missing_hr = True
         assert missing_hr == expected
 
+    def test_listener_gets_merged_heart_rates(self):
+        '''Tests that the records passed to the listener already have their merged heart rates.'''
+        heart_rates = []
+        def mesg_listener(mesg_num, message):
+            if mesg_num == Profile['mesg_num']['RECORD']:
+                heart_rates.append(message.get('heart_rate'))
+
+        messages, errors = Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read(mesg_listener=mesg_listener)
+
+        assert len(errors) == 0
+        assert None not in heart_rates
+        assert heart_rates == [message['heart_rate'] for message in messages['record_mesgs']]
+
+    def test_listener_gets_records_in_order_without_heart_rates(self):
+        '''Tests that records are passed to the listener as they are decoded when there are no heart rate messages to merge.'''
+        mesg_nums = []
+        def mesg_listener(mesg_num, message):
+            mesg_nums.append(mesg_num)
+
+        Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read(mesg_listener=mesg_listener)
+
+        assert mesg_nums.index(Profile['mesg_num']['RECORD']) < mesg_nums.index(Profile['mesg_num']['LAP'])
+
     def test_merge_heart_rate_fails_without_scale_and_offset(self):
         '''Tests to ensure that decoding fails when merge_heart_rates == True but apply_scale_and_offset == False'''
         stream = Stream.from_file('tests/fits/HrmPluginTestActivity.fit')
@@ -677,6 +778,499 @@ class TestAccumulatedFields:
         assert messages['record_mesgs'][1]['distance'] == 264
         assert messages['record_mesgs'][2]['distance'] == 276
 
+class TestPeekSummary:
+    '''Set of tests which verify reading only the summary messages of a fit file.'''
+    @pytest.mark.parametrize(
+        "file_name",
+        [
+            ('tests/fits/ActivityDevFields.fit'),
+            ('tests/fits/HrmPluginTestActivity.fit'),
+        ], ids=["Activity with Developer Fields", "HRM Plugin Activity"]
+    )
+    def test_peek_summary_matches_read(self, file_name):
+        '''Tests that the file_id and session messages match those returned by read() and that records are not decoded.'''
+        expected_messages, errors = Decoder(Stream.from_file(file_name)).read()
+        assert len(errors) == 0
+
+        messages, errors = Decoder(Stream.from_file(file_name)).peek_summary()
+
+        assert len(errors) == 0
+        assert 'record_mesgs' not in messages
+        assert messages['file_id_mesgs'] == expected_messages['file_id_mesgs']
+        assert messages['session_mesgs'] == expected_messages['session_mesgs']
+
+    def test_peek_summary_developer_fields(self):
+        '''Tests that developer fields in the session message are decoded.'''
+        messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).peek_summary()
+
+        assert len(errors) == 0
+        assert messages['session_mesgs'][0]['developer_fields'][2] == [-10, 12]
+
+    def test_peek_summary_mesg_nums(self):
+        '''Tests selecting which messages are decoded.'''
+        stream = Stream.from_file('tests/fits/WithGearChangeData.fit')
+        messages, errors = Decoder(stream).peek_summary(mesg_nums=[Profile['mesg_num']['ACTIVITY']])
+
+        assert len(errors) == 0
+        assert list(messages.keys()) == ['activity_mesgs']
+        assert stream.position() == stream.get_length()
+
+    def test_peek_summary_chained_file(self):
+        '''Tests that the summary messages of each chained file are read.'''
+        messages, errors = Decoder(Stream.from_byte_array(Data.fit_file_chained)).peek_summary()
+        expected_messages, expected_errors = Decoder(Stream.from_byte_array(Data.fit_file_chained)).read()
+
+        assert len(errors) == 0
+        assert messages['file_id_mesgs'] == expected_messages['file_id_mesgs']
+
+    def test_peek_summary_invalid_file(self):
+        '''Tests that peeking a file that is not a fit file returns an error.'''
+        messages, errors = Decoder(Stream.from_byte_array(Data.fit_file_invalid)).peek_summary()
+
+        assert len(errors) == 1
+
+class TestIterRawRecords:
+    '''Set of tests which verify iterating the raw records of a fit file.'''
+    def test_iter_raw_records(self):
+        '''Tests that there is one raw data record per decoded message, with the global message numbers of the decoded messages.'''
+        mesg_nums = []
+        def mesg_listener(mesg_num, message):
+            mesg_nums.append(mesg_num)
+
+        messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read(mesg_listener=mesg_listener)
+        raw_records = list(Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).iter_raw_records())
+
+        assert len(errors) == 0
+        assert [raw_record.global_mesg_num for raw_record in raw_records if raw_record.is_definition is False] == mesg_nums
+
+    def test_raw_record_bytes(self):
+        '''Tests the header, definition and data slices of the raw records.'''
+        raw_records = list(Decoder(Stream.from_byte_array(Data.fit_file_short_new)).iter_raw_records())
+
+        assert len(raw_records) == 2
+        definition, message = raw_records
+
+        assert definition.is_definition is True
+        assert definition.global_mesg_num == Profile['mesg_num']['FILE_ID']
+        assert bytes(definition.data) == bytes(Data.fit_file_short_new[14:14 + len(definition.data)])
+        assert definition.definition is definition.data
+
+        assert message.is_definition is False
+        assert message.record_header == 0x00 and message.local_mesg_num == 0
+        assert message.global_mesg_num == Profile['mesg_num']['FILE_ID']
+        assert bytes(message.definition) == bytes(definition.data)
+        assert len(message.data) + len(definition.data) + 16 == len(Data.fit_file_short_new)
+
+    def test_iter_raw_records_chained_file(self):
+        '''Tests that the raw records of all chained files are returned.'''
+        decoder = Decoder(Stream.from_byte_array(Data.fit_file_chained))
+        decoder.read()
+        raw_records = list(Decoder(Stream.from_byte_array(Data.fit_file_chained)).iter_raw_records())
+
+        assert len([raw_record for raw_record in raw_records if raw_record.is_definition is False]) == decoder.get_num_messages()
+
+    def test_iter_raw_records_invalid_file(self):
+        '''Tests that iterating a file that is not a fit file raises an error.'''
+        decoder = Decoder(Stream.from_byte_array(Data.fit_file_invalid))
+        with pytest.raises(RuntimeError):
+            list(decoder.iter_raw_records())
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            bytes([0x40, 0x00, 0x00]),
+            bytes([0x60, 0x00, 0x00, 0x14, 0x00, 0x01, 0x03, 0x01, 0x02]),
+            bytes([0x40, 0x00, 0x00, 0x14, 0x00, 0x02, 0x03, 0x01]),
+        ], ids=["Fixed Part", "Developer Field Count", "Field Definitions"]
+    )
+    def test_walk_records_truncated_definition(self, data):
+        '''Tests that walking a truncated message definition raises the incomplete message definition error.'''
+        with pytest.raises(RuntimeError, match="Incomplete message definition"):
+            list(_walk_records(data))
+
+    @pytest.mark.parametrize("slice_size", [1, 2, 7, 64, 4096])
+    def test_walk_record_slices(self, slice_size):
+        '''Tests that walking a data section a slice at a time yields the same records as walking it at once.'''
+        with open('tests/fits/ActivityDevFields.fit', 'rb') as file:
+            fit_file = file.read()
+        data = fit_file[fit_file[0]:len(fit_file) - 2]
+        slices = [data[i:i + slice_size] for i in range(0, len(data), slice_size)]
+
+        assert list(_walk_record_slices(slices)) == list(_walk_records(data))
+
+    @pytest.mark.parametrize(
+        "data,error",
+        [
+            (bytes([0x40, 0x00, 0x00, 0x14, 0x00, 0x02, 0x03, 0x01]), "byte: 0 Incomplete message definition"),
+            (bytes([0x40, 0x00, 0x00, 0x14, 0x00, 0x01, 0x03, 0x04, 0x86, 0x00, 0x01, 0x02]), "byte: 9 Incomplete message"),
+        ], ids=["Definition", "Message"]
+    )
+    def test_walk_record_slices_truncated(self, data, error):
+        '''Tests that walking a record truncated across slices raises the same error as walking it at once.'''
+        with pytest.raises(RuntimeError, match=error):
+            list(_walk_record_slices([data[i:i + 1] for i in range(len(data))]))
+
+class TestChainedFiles:
+    '''Set of tests which verify finding and decoding chained fit files.'''
+    def test_is_fit_at_chained_file_offset(self):
+        '''Tests is_fit() at the start of the second chained file, and when the remaining bytes are too short.'''
+        stream = Stream.from_byte_array(Data.fit_file_chained)
+        decoder = Decoder(stream)
+
+        stream.seek(116)
+        assert decoder.is_fit() is True
+
+        stream.seek(len(Data.fit_file_chained) - 15)
+        assert decoder.is_fit() is False
+
+    @pytest.mark.parametrize(
+        "data,expected_segments",
+        [
+            (Data.fit_file_short_new, [(0, len(Data.fit_file_short_new))]),
+            (Data.fit_file_chained, [(0, 116), (116, 116)]),
+        ], ids=["Single File", "Chained File"]
+    )
+    def test_scan_chained_files(self, data, expected_segments):
+        '''Tests finding the offset and size of each chained file.'''
+        stream = Stream.from_byte_array(data)
+        assert Decoder(stream).scan_chained_files() == expected_segments
+        assert stream.position() == 0
+
+    def test_scan_chained_files_truncated(self):
+        '''Tests that a chained file which is shorter than its header states raises an error.'''
+        stream = Stream.from_byte_array(Data.fit_file_chained[:-1])
+        with pytest.raises(RuntimeError):
+            Decoder(stream).scan_chained_files()
+
+    @pytest.mark.parametrize("workers", [(1), (2)], ids=["In Process", "Worker Processes"])
+    def test_read_chained(self, workers):
+        '''Tests that reading chained files in parallel returns the same messages as read().'''
+        expected_messages, errors = Decoder(Stream.from_byte_array(Data.fit_file_chained)).read()
+        messages, errors = Decoder(Stream.from_byte_array(Data.fit_file_chained)).read_chained(workers=workers)
+
+        assert len(errors) == 0
+        assert messages == expected_messages
+
+    def test_read_chained_per_file_results(self):
+        '''Tests returning the messages of each chained file separately.'''
+        results, errors = Decoder(Stream.from_byte_array(Data.fit_file_chained)).read_chained(workers=1, merge_results=False, convert_types_to_strings=False)
+
+        assert len(errors) == 0
+        assert len(results) == 2
+        for messages, file_errors in results:
+            assert len(file_errors) == 0
+            assert messages['file_id_mesgs'][0]['manufacturer'] == 255
+
+    def test_read_chained_listener_not_supported(self):
+        '''Tests that listeners can not be used when reading chained files in worker processes.'''
+        decoder = Decoder(Stream.from_byte_array(Data.fit_file_chained))
+        with pytest.raises(ValueError):
+            decoder.read_chained(mesg_listener=lambda mesg_num, message: None)
+
+class TestMesgDefCache:
+    '''Set of tests which verify that message definitions are reused across files decoded by the same decoder.'''
+    def test_definitions_reused_across_files(self):
+        '''Tests that a definition seen in a previous file is reused, and that the messages are unchanged.'''
+        decoder = Decoder(Stream.from_byte_array(Data.fit_file_short_new))
+        expected_messages, errors = decoder.read()
+        assert len(decoder._mesg_def_cache) == 1
+        local_mesg_def = decoder._local_mesg_defs[0]
+
+        decoder.reset(Stream.from_byte_array(Data.fit_file_short_new))
+        messages, errors = decoder.read()
+
+        assert len(errors) == 0
+        assert messages == expected_messages
+        assert len(decoder._mesg_def_cache) == 1
+        assert decoder._local_mesg_defs[0] is local_mesg_def
+
+    def test_definition_listener_gets_copy(self):
+        '''Tests that changes made by the mesg_definition_listener do not change the cached definition.'''
+        def mesg_definition_listener(mesg_def):
+            mesg_def['field_definitions'][0]['field_id'] = 255
+            mesg_def['field_definitions'].clear()
+
+        decoder = Decoder(Stream.from_byte_array(Data.fit_file_short_new))
+        expected_messages, errors = decoder.read()
+
+        decoder.reset(Stream.from_byte_array(Data.fit_file_short_new))
+        messages, errors = decoder.read(mesg_definition_listener=mesg_definition_listener)
+
+        decoder.reset(Stream.from_byte_array(Data.fit_file_short_new))
+        messages, errors = decoder.read()
+
+        assert len(errors) == 0
+        assert messages == expected_messages
+
+class TestSimpleDecodePlan:
+    '''Set of tests which verify that messages decoded with a simple decode plan or compiled decode function are the same as those decoded by the general path.'''
+    @staticmethod
+    def _encode_simple_activity():
+        encoder = Encoder()
+        encoder.write_mesg({'mesg_num': Profile['mesg_num']['FILE_ID'], 'type': 'activity', 'manufacturer': 'garmin',
+                            'product_name': 'Bike', 'time_created': 1000})
+        encoder.write_mesg({'mesg_num': Profile['mesg_num']['DEVICE_INFO'], 'timestamp': 1000, 'device_index': 'creator',
+                            'battery_voltage': 3.5, 'serial_number': 42})
+        # The distance of the first record is accumulated onto by the compressed distance of the second
+        encoder.write_mesg({'mesg_num': Profile['mesg_num']['RECORD'], 'timestamp': 1000, 'distance': 625.0, 'cadence': 80})
+        encoder.write_mesg({'mesg_num': Profile['mesg_num']['RECORD'], 'timestamp': 1001, 'compressed_speed_distance': [0x64, 0x80, 0x02]})
+        return encoder.close()
+
+    @pytest.mark.parametrize("disabled_path", ['_use_simple_decode_plans', '_use_mesg_decoders'])
+    @pytest.mark.parametrize(
+        "read_options",
+        [
+            ({}),
+            ({'convert_datetimes_to_dates': False, 'convert_types_to_strings': False}),
+            ({'apply_scale_and_offset': False, 'merge_heart_rates': False}),
+        ], ids=["Default Options", "Raw Types", "Without Scale and Offset"]
+    )
+    def test_same_as_general_path(self, monkeypatch, read_options, disabled_path):
+        '''Tests that the messages, and their field order, are the same when simple decode plans or compiled decode functions are disabled.'''
+        fit_data = self._encode_simple_activity()
+        messages, errors = Decoder(Stream.from_byte_array(fit_data)).read(**read_options)
+
+        monkeypatch.setattr(Decoder, disabled_path, False)
+        expected_messages, errors = Decoder(Stream.from_byte_array(fit_data)).read(**read_options)
+
+        assert len(errors) == 0
+        assert messages == expected_messages
+        assert [list(mesg) for mesgs in messages.values() for mesg in mesgs] == [list(mesg) for mesgs in expected_messages.values() for mesg in mesgs]
+
+    def test_accumulated_field(self):
+        '''Tests that the value of an accumulated field decoded with a simple decode plan is accumulated onto by later components.'''
+        messages, errors = Decoder(Stream.from_byte_array(self._encode_simple_activity())).read()
+
+        assert len(errors) == 0
+        assert messages['device_info_mesgs'][0]['battery_voltage'] == 3.5
+        assert messages['record_mesgs'][0]['distance'] == 625.0
+        assert messages['record_mesgs'][1]['distance'] > messages['record_mesgs'][0]['distance']
+
+class TestTimeRange:
+    '''Set of tests which verify decoding only the record messages within a time range.'''
+    @pytest.mark.parametrize(
+        "start_index,end_index",
+        [
+            (100, 200),
+            (None, 10),
+            (-10, None),
+            (5, 5),
+        ], ids=["Start and End", "End Only", "Start Only", "Single Record"]
+    )
+    def test_time_range_matches_filtered_records(self, start_index, end_index):
+        '''Tests that the records in the time range are the same as the records of a full decode, and other messages are unaffected.'''
+        expected_messages, errors = Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read()
+        timestamps = [record['timestamp'] for record in expected_messages['record_mesgs']]
+        start = timestamps[start_index] if start_index is not None else None
+        end = timestamps[end_index] if end_index is not None else None
+
+        messages, errors = Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read(time_range=(start, end))
+
+        assert len(errors) == 0
+        assert messages['record_mesgs'] == [record for record in expected_messages['record_mesgs']
+                                            if (start is None or record['timestamp'] >= start)
+                                            and (end is None or record['timestamp'] <= end)]
+        for messages_key in expected_messages:
+            if messages_key != 'record_mesgs':
+                assert messages[messages_key] == expected_messages[messages_key]
+
+    def test_time_range_keeps_accumulated_values(self):
+        '''Tests that accumulated values are tracked through the records before the time range.'''
+        encoder = Encoder()
+        encoder.write_mesg({'mesg_num': Profile['mesg_num']['FILE_ID'], 'type': 'activity'})
+        for i in range(10):
+            encoder.write_mesg({'mesg_num': Profile['mesg_num']['RECORD'], 'timestamp': 1000 + i, 'cycles': (i * 100) % 256})
+        fit_data = encoder.close()
+
+        messages, errors = Decoder(Stream.from_byte_array(fit_data)).read(convert_datetimes_to_dates=False, time_range=(1005, 1007))
+
+        assert len(errors) == 0
+        assert [record['total_cycles'] for record in messages['record_mesgs']] == [500, 600, 700]
+
+    def test_time_range_records_out_of_order(self):
+        '''Tests that records after the end of the time range are still decoded once the record timestamps have been out of order.'''
+        encoder = Encoder()
+        encoder.write_mesg({'mesg_num': Profile['mesg_num']['FILE_ID'], 'type': 'activity'})
+        for timestamp in [1000, 1002, 1001, 1005, 1003]:
+            encoder.write_mesg({'mesg_num': Profile['mesg_num']['RECORD'], 'timestamp': timestamp, 'heart_rate': 100})
+        fit_data = encoder.close()
+
+        messages, errors = Decoder(Stream.from_byte_array(fit_data)).read(convert_datetimes_to_dates=False, time_range=(1001, 1003))
+
+        assert len(errors) == 0
+        assert [record['timestamp'] for record in messages['record_mesgs']] == [1002, 1001, 1003]
+
+class TestRecordDownsampling:
+    '''Set of tests which verify downsampling the record messages while decoding.'''
+    @pytest.mark.parametrize(
+        "read_options,expected_indexes",
+        [
+            ({'record_step': 7}, range(0, 310, 7)),
+            ({'max_records': 50}, range(0, 310, 7)),
+            ({'record_step': 10, 'max_records': 50}, range(0, 310, 10)),
+        ], ids=["Every Nth Record", "Max Records", "Step Larger Than Max Records Step"]
+    )
+    def test_downsampled_records_match_full_decode(self, read_options, expected_indexes):
+        '''Tests that the kept records, including their merged heart rates, are the same as the records of a full decode.'''
+        expected_messages, errors = Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read()
+        messages, errors = Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read(**read_options)
+
+        assert len(errors) == 0
+        assert messages['record_mesgs'] == [expected_messages['record_mesgs'][i] for i in expected_indexes]
+        assert messages['hr_mesgs'] == expected_messages['hr_mesgs']
+
+    def test_max_records_file_larger_than_a_slice(self):
+        '''Tests that the records of a file larger than the slices they are counted in are all counted for max_records.'''
+        expected_messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read()
+        num_records = len(expected_messages['record_mesgs'])
+        max_records = num_records // 4
+
+        messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read(max_records=max_records)
+
+        assert len(errors) == 0
+        record_step = -(-num_records // max_records)
+        assert messages['record_mesgs'] == expected_messages['record_mesgs'][::record_step]
+
+    def test_record_min_interval(self):
+        '''Tests keeping only the records at least the minimum interval apart, with accumulated values tracked through the dropped records.'''
+        encoder = Encoder()
+        encoder.write_mesg({'mesg_num': Profile['mesg_num']['FILE_ID'], 'type': 'activity'})
+        for i in range(10):
+            encoder.write_mesg({'mesg_num': Profile['mesg_num']['RECORD'], 'timestamp': 1000 + i, 'cycles': (i * 100) % 256})
+        fit_data = encoder.close()
+
+        messages, errors = Decoder(Stream.from_byte_array(fit_data)).read(convert_datetimes_to_dates=False, record_min_interval=4)
+
+        assert len(errors) == 0
+        assert [record['timestamp'] for record in messages['record_mesgs']] == [1000, 1004, 1008]
+        assert [record['total_cycles'] for record in messages['record_mesgs']] == [0, 400, 800]
+
+    @pytest.mark.parametrize(
+        "read_options",
+        [
+            ({'record_step': 0}),
+            ({'max_records': 0}),
+        ], ids=["Record Step", "Max Records"]
+    )
+    def test_invalid_downsampling_options(self, read_options):
+        '''Tests that downsampling options less than one return an error.'''
+        messages, errors = Decoder(Stream.from_byte_array(Data.fit_file_short)).read(**read_options)
+
+        assert len(errors) == 1
+        assert isinstance(errors[0], RuntimeError)
+
+    def test_max_records_truncated_definition(self):
+        '''Tests that max_records decodes the same messages as a full decode when the file ends inside a message definition.'''
+        data = open('tests/fits/HrmPluginTestActivity.fit', 'rb').read()
+        raw_records = list(Decoder(Stream.from_byte_array(bytearray(data))).iter_raw_records())
+        definition_offset = 14 + sum(len(raw_record.data) for raw_record in raw_records[:6])
+        truncated_data = bytearray(data[:definition_offset + 3])
+
+        expected_messages, expected_errors = Decoder(Stream.from_byte_array(truncated_data)).read()
+        messages, errors = Decoder(Stream.from_byte_array(truncated_data)).read(max_records=10)
+
+        assert raw_records[6].is_definition is True
+        assert messages == expected_messages
+        assert [str(error) for error in errors] == [str(error) for error in expected_errors]
+
+class TestRetainMessages:
+    '''Set of tests which verify decoding without retaining the decoded messages.'''
+    @pytest.mark.parametrize(
+        "file_path",
+        [
+            ('tests/fits/ActivityDevFields.fit'),
+            ('tests/fits/HrmPluginTestActivity.fit'),
+        ], ids=["Developer Fields", "Merged Heart Rates"]
+    )
+    def test_listener_gets_same_messages(self, file_path):
+        '''Tests that the messages passed to the listener are the same as the retained messages, and that none are returned.'''
+        expected_messages, errors = Decoder(Stream.from_file(file_path)).read()
+
+        messages_by_type = {}
+        def mesg_listener(mesg_num, message):
+            messages_by_type.setdefault(mesg_num, []).append(message)
+
+        messages, errors = Decoder(Stream.from_file(file_path)).read(mesg_listener=mesg_listener, retain_messages=False)
+
+        assert len(errors) == 0
+        assert messages == {}
+        assert {Profile['messages'][mesg_num]['messages_key'] if mesg_num in Profile['messages'] else str(mesg_num): mesgs
+                for mesg_num, mesgs in messages_by_type.items()} == expected_messages
+
+    def test_listener_gets_merged_heart_rates(self):
+        '''Tests that the records passed to the listener have their merged heart rates when the messages are not retained.'''
+        expected_messages, errors = Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read()
+
+        records = []
+        def mesg_listener(mesg_num, message):
+            if mesg_num == Profile['mesg_num']['RECORD']:
+                records.append(dict(message))
+
+        messages, errors = Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read(
+            mesg_listener=mesg_listener, retain_messages=False)
+
+        assert len(errors) == 0
+        assert all('heart_rate' in record for record in records)
+        assert records == expected_messages['record_mesgs']
+
+    def test_field_description_keys(self):
+        '''Tests that the field description keys and developer fields are the same when the messages are not retained.'''
+        keys = []
+        def field_description_listener(key, developer_data_id_mesg, field_description_mesg):
+            keys.append(key)
+
+        records = []
+        def mesg_listener(mesg_num, message):
+            if mesg_num == Profile['mesg_num']['RECORD']:
+                records.append(message)
+
+        Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read(
+            mesg_listener=mesg_listener, field_description_listener=field_description_listener, retain_messages=False)
+
+        assert keys == [0, 1, 2, 3]
+        assert records[0]['developer_fields'] == {1: 126}
+
+class TestDecoderReset:
+    '''Set of tests which verify that a decoder can be reused for multiple streams without leaking state.'''
+    @pytest.mark.parametrize(
+        "first_data,second_data",
+        [
+            (Data.fit_file_short_multibyte_dev_data, Data.fit_file_dev_data_missing_field_description),
+            (Data.fit_file_accumulated_components, Data.fit_file_accumulated_components),
+            (Data.fit_file_chained, Data.fit_file_short_new),
+        ], ids=["Developer Data Definitions", "Accumulated Fields", "Chained File"]
+    )
+    def test_reset_matches_new_decoder(self, first_data, second_data):
+        '''Tests that decoding after reset() gives the same result as decoding with a new decoder.'''
+        decoder = Decoder(Stream.from_byte_array(first_data))
+        messages, errors = decoder.read()
+        assert len(errors) == 0
+
+        decoder.reset(Stream.from_byte_array(second_data))
+        messages, errors = decoder.read()
+
+        expected_messages, expected_errors = Decoder(Stream.from_byte_array(second_data)).read()
+
+        assert len(errors) == len(expected_errors)
+        assert messages == expected_messages
+        assert decoder.get_num_messages() == sum(len(mesgs) for mesgs in expected_messages.values())
+
+    def test_reset_keeps_caches(self):
+        '''Tests that caches warmed by a previous read are kept after reset().'''
+        decoder = Decoder(Stream.from_byte_array(Data.fit_file_short_new))
+        decoder.read()
+        type_cache = decoder._type_cache
+        assert len(type_cache) > 0
+
+        decoder.reset(Stream.from_byte_array(Data.fit_file_short_new))
+        assert decoder._type_cache is type_cache
+
+    def test_reset_fails_if_stream_is_none(self):
+        '''Tests that reset() raises an error if the stream is None.'''
+        decoder = Decoder(Stream.from_byte_array(Data.fit_file_short_new))
+        with pytest.raises(RuntimeError):
+            decoder.reset(None)
+
 class TestDecoderExceptions:
     '''Set of tests which verifies behavior of the decoder when various exceptions are raised'''
     @pytest.mark.parametrize(
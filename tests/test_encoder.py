@@ -210,6 +210,63 @@ class TestEncoderLocalMesgDefinitions:
         assert len(messages['file_id_mesgs']) == 1
         assert len(messages['file_creator_mesgs']) == 1
 
+# MARK: Raw Records
+
+class TestEncoderWriteRawRecord:
+    '''Tests for copying raw records from a decoder into an encoder.'''
+
+    def test_copy_all_raw_records(self):
+        '''Copying every raw record produces a file that decodes to the same messages.'''
+        decoder = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit'))
+        encoder = Encoder()
+        for raw_record in decoder.iter_raw_records():
+            encoder.write_raw_record(raw_record)
+        fit_data = encoder.close()
+
+        expected_messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read()
+        assert Decoder(Stream.from_byte_array(bytearray(fit_data))).check_integrity() is True
+
+        messages, errors = Decoder(Stream.from_byte_array(bytearray(fit_data))).read()
+        assert len(errors) == 0
+        assert messages == expected_messages
+
+    def test_filter_raw_records(self):
+        '''Leaving out data records and their definitions removes the message type from the file.'''
+        record_mesg_num = Profile['mesg_num']['RECORD']
+        decoder = Decoder(Stream.from_file('tests/fits/WithGearChangeData.fit'))
+        encoder = Encoder()
+        for raw_record in decoder.iter_raw_records():
+            if raw_record.is_definition is False and raw_record.global_mesg_num != record_mesg_num:
+                encoder.write_raw_record(raw_record)
+        fit_data = encoder.close()
+
+        expected_messages, errors = Decoder(Stream.from_file('tests/fits/WithGearChangeData.fit')).read()
+        messages, errors = Decoder(Stream.from_byte_array(bytearray(fit_data))).read()
+
+        assert len(errors) == 0
+        assert 'record_mesgs' not in messages
+        for key in messages:
+            assert messages[key] == expected_messages[key]
+
+    def test_raw_records_and_messages_share_local_mesg_nums(self):
+        '''Raw records and encoded messages can be mixed, each rewriting definitions they replaced.'''
+        source = Encoder()
+        source.on_mesg(0, {'type': 4})
+        source.on_mesg(49, {'software_version': 100})
+        raw_records = list(Decoder(Stream.from_byte_array(bytearray(source.close()))).iter_raw_records())
+
+        encoder = Encoder()
+        encoder.on_mesg(49, {'software_version': 200})
+        for raw_record in raw_records:
+            encoder.write_raw_record(raw_record)
+        encoder.on_mesg(49, {'software_version': 300})
+        fit_data = encoder.close()
+
+        messages, errors = Decoder(Stream.from_byte_array(bytearray(fit_data))).read(**DEFAULT_DECODER_OPTS)
+        assert len(errors) == 0
+        assert messages['file_id_mesgs'] == [{'type': 4}]
+        assert [mesg['software_version'] for mesg in messages['file_creator_mesgs']] == [200, 100, 300]
+
 # MARK: On Mesg Chaining
 
 class TestEncoderOnMesgChaining:
@@ -8,7 +8,8 @@
 ###########################################################################################
 
 
-from garmin_fit_sdk import hr_mesg_utils
+import pytest
+from garmin_fit_sdk import Profile, hr_mesg_utils
 from garmin_fit_sdk.decoder import Decoder
 from garmin_fit_sdk.stream import Stream
 
@@ -49,3 +50,103 @@ def test_hr_mesgs_to_record_mesgs():
         assert message['timestamp'] == expected['timestamp']
         assert message['heart_rate'] == expected['heart_rate']
         index += 1
+
+def test_merge_heart_rates_windows():
+    '''Tests merging heart rates into records, including repeated record timestamps and records past the last heart rate.'''
+    hr_mesgs = [
+        {'timestamp': 100, 'fractional_timestamp': 0.0, 'event_timestamp': 0.0, 'filtered_bpm': 60},
+        {'event_timestamp': [0.5, 1.0, 1.5, 2.0, 2.5], 'filtered_bpm': [62, 64, 66, 68, 70]},
+    ]
+    record_mesgs = [{'timestamp': 101}, {'timestamp': 101}, {'timestamp': 102}, {'timestamp': 103}]
+
+    hr_mesg_utils.merge_heart_rates(hr_mesgs, record_mesgs)
+
+    assert [message.get('heart_rate') for message in record_mesgs] == [62, 64, 66, None]
+
+def test_heart_rate_merger_in_decode_order():
+    '''Tests that merging heart rates incrementally, in the order messages are decoded, matches the expected records.'''
+    merger = hr_mesg_utils.HeartRateMerger()
+
+    def mesg_listener(mesg_num, message):
+        if mesg_num == Profile['mesg_num']['HR']:
+            merger.add_hr_mesg(message)
+        elif mesg_num == Profile['mesg_num']['RECORD']:
+            merger.add_record_mesg(message)
+
+    stream = Stream.from_file("tests/fits/HrmPluginTestActivity.fit")
+    decoder = Decoder(stream)
+    messages, errors = decoder.read(merge_heart_rates=False, convert_datetimes_to_dates=False, mesg_listener=mesg_listener)
+    merger.flush()
+
+    assert len(errors) == 0
+    assert len(messages['record_mesgs']) == len(data_expand_hr_mesgs.merged_record_messages)
+
+    for message, expected in zip(messages['record_mesgs'], data_expand_hr_mesgs.merged_record_messages):
+        assert message['timestamp'] == expected['timestamp']
+        assert message['heart_rate'] == expected['heart_rate']
+
+def test_heart_rate_merger_records_before_heart_rates():
+    '''Tests that records are held until a later heart rate closes their window.'''
+    merger = hr_mesg_utils.HeartRateMerger()
+    record_mesgs = [{'timestamp': 101}, {'timestamp': 102}]
+    for message in record_mesgs:
+        merger.add_record_mesg(message)
+
+    merger.add_hr_mesg({'timestamp': 100, 'fractional_timestamp': 0.0, 'event_timestamp': 0.0, 'filtered_bpm': 60})
+    assert 'heart_rate' not in record_mesgs[0]
+
+    merger.add_hr_mesg({'event_timestamp': [1.5], 'filtered_bpm': [80]})
+    assert record_mesgs[0]['heart_rate'] == 60
+    assert 'heart_rate' not in record_mesgs[1]
+
+    merger.flush()
+    assert 'heart_rate' not in record_mesgs[1]
+
+def test_heart_rate_merger_record_listener():
+    '''Tests that the record listener is called with each record once its heart rate is merged, and not for records added without notify.'''
+    merged = []
+    merger = hr_mesg_utils.HeartRateMerger(lambda message: merged.append(dict(message)))
+    merger.add_record_mesg({'timestamp': 100}, notify=False)
+    merger.add_record_mesg({'timestamp': 101})
+    merger.add_record_mesg({'timestamp': 102})
+
+    merger.add_hr_mesg({'timestamp': 100, 'fractional_timestamp': 0.0, 'event_timestamp': 0.0, 'filtered_bpm': 60})
+    merger.add_hr_mesg({'event_timestamp': [1.5], 'filtered_bpm': [80]})
+    assert merged == [{'timestamp': 101, 'heart_rate': 60}]
+
+    merger.flush()
+    assert merged == [{'timestamp': 101, 'heart_rate': 60}, {'timestamp': 102}]
+
+def test_heart_rate_merger_record_listener_after_error():
+    '''Tests that records are still passed to the record listener after an invalid heart rate message.'''
+    merged = []
+    merger = hr_mesg_utils.HeartRateMerger(merged.append)
+    merger.add_hr_mesg({'event_timestamp': [1.0], 'filtered_bpm': [60]})
+    merger.add_record_mesg({'timestamp': 101})
+
+    with pytest.raises(RuntimeError):
+        merger.flush()
+    assert merged == [{'timestamp': 101}]
+
+def test_heart_rate_merger_window_stays_bounded():
+    '''Tests that the heart rate window is trimmed while records wait for a later heart rate, so a long stream uses bounded memory.'''
+    merger = hr_mesg_utils.HeartRateMerger()
+    max_window_size = 0
+    for second in range(100, 20100):
+        # Each heart rate reaches the latest record time without passing it, so a record is always waiting
+        merger.add_record_mesg({'timestamp': second})
+        merger.add_hr_mesg({'timestamp': second, 'fractional_timestamp': 0.0, 'event_timestamp': float(second), 'filtered_bpm': 60})
+        max_window_size = max(max_window_size, len(merger._expander.timestamps))
+
+    merger.flush()
+
+    assert max_window_size < 2 * hr_mesg_utils._TRIM_THRESHOLD
+
+def test_heart_rate_merger_flush_raises_deferred_error():
+    '''Tests that an invalid heart rate message does not interrupt decoding and is raised by flush().'''
+    merger = hr_mesg_utils.HeartRateMerger()
+    merger.add_hr_mesg({'event_timestamp': [1.0], 'filtered_bpm': [60]})
+    merger.add_record_mesg({'timestamp': 101})
+
+    with pytest.raises(RuntimeError):
+        merger.flush()
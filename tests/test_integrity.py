@@ -0,0 +1,87 @@
+'''test_integrity.py: Contains the set of tests for checking the integrity of many fit files in the Python FIT SDK'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import pytest
+from garmin_fit_sdk import Decoder, IntegrityCheck, Stream, check_integrity_many
+from garmin_fit_sdk.integrity import check_buffer_integrity, check_file_integrity
+
+from tests.data import Data
+
+
+def _with_invalid_header_crc(data):
+    data = bytearray(data)
+    data[12] ^= 0xFF
+    return data
+
+
+@pytest.mark.parametrize(
+    "data,expected_check",
+    [
+        (bytearray(), IntegrityCheck.HEADER_SIZE),
+        (Data.fit_file_short_invalid_header, IntegrityCheck.HEADER_SIZE),
+        (Data.fit_file_minimum[:14], IntegrityCheck.HEADER_SIZE),
+        (Data.fit_file_invalid, IntegrityCheck.DATA_TYPE),
+        (Data.fit_file_incorrect_data_size, IntegrityCheck.DATA_SIZE),
+        (_with_invalid_header_crc(Data.fit_file_short_new), IntegrityCheck.HEADER_CRC),
+        (Data.fit_file_short_invalid_CRC, IntegrityCheck.FILE_CRC),
+        (Data.fit_file_minimum, None),
+        (Data.fit_file_short, None),
+        (Data.fit_file_chained, None),
+    ], ids=["Empty File", "Invalid Header Size", "Shorter Than Header", "Invalid Data Type",
+            "Incorrect Data Size", "Invalid Header CRC", "Invalid File CRC",
+            "Minimum Size Fit File", "Fit File with Messages", "Chained Fit File"]
+)
+def test_check_buffer_integrity(data, expected_check):
+    '''Tests which check fails for a fit file, and that the result agrees with Decoder.check_integrity().'''
+    failed_check, error = check_buffer_integrity(data)
+
+    assert failed_check == expected_check
+    assert (error is None) == (expected_check is None)
+    assert Decoder(Stream.from_byte_array(data)).check_integrity() == (expected_check is None)
+
+
+def test_check_file_integrity(tmp_path):
+    '''Tests checking the integrity of fit files on disk, including files which can not be read.'''
+    valid_path = tmp_path / "valid.fit"
+    valid_path.write_bytes(Data.fit_file_short)
+    empty_path = tmp_path / "empty.fit"
+    empty_path.write_bytes(b'')
+
+    result = check_file_integrity(valid_path)
+    assert result.is_valid is True
+    assert result.path == valid_path
+
+    assert check_file_integrity(empty_path).failed_check == IntegrityCheck.HEADER_SIZE
+
+    result = check_file_integrity(tmp_path / "missing.fit")
+    assert result.is_valid is False
+    assert result.failed_check == IntegrityCheck.FILE_READ
+    assert result.error is not None
+
+
+@pytest.mark.parametrize("workers", [(1), (2)], ids=["In Process", "Worker Processes"])
+def test_check_integrity_many(tmp_path, workers):
+    '''Tests that the results are returned in the same order as the paths.'''
+    files = [
+        Data.fit_file_short,
+        Data.fit_file_short_invalid_CRC,
+        Data.fit_file_incorrect_data_size,
+        Data.fit_file_short_new,
+    ]
+    paths = []
+    for i, data in enumerate(files):
+        path = tmp_path / f"{i}.fit"
+        path.write_bytes(data)
+        paths.append(str(path))
+
+    results = check_integrity_many(paths, workers=workers)
+
+    assert [result.path for result in results] == paths
+    assert [result.failed_check for result in results] == [None, IntegrityCheck.FILE_CRC, IntegrityCheck.DATA_SIZE, None]
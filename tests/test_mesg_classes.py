@@ -0,0 +1,89 @@
+'''test_mesg_classes.py: Contains the set of tests for the message classes in the Python FIT SDK'''
+
+###########################################################################################
+# Copyright 2026 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import pickle
+import sys
+
+import pytest
+from garmin_fit_sdk import Decoder, FitMesg, Profile, Stream, get_mesg_type
+
+from tests.data import Data
+
+
+class TestMesgObjects:
+    '''Set of tests which verify decoding messages as message objects.'''
+    @pytest.mark.parametrize(
+        "file_path",
+        [
+            ('tests/fits/ActivityDevFields.fit'),
+            ('tests/fits/HrmPluginTestActivity.fit'),
+            ('tests/fits/WithGearChangeData.fit'),
+        ], ids=["Developer Fields", "Merged Heart Rates", "Components And Sub Fields"]
+    )
+    def test_mesg_objects_match_dicts(self, file_path):
+        '''Tests that the message objects have the same fields and values as the decoded dictionaries.'''
+        expected_messages, errors = Decoder(Stream.from_file(file_path)).read()
+        messages, errors = Decoder(Stream.from_file(file_path)).read(mesg_objects=True)
+
+        assert len(errors) == 0
+        assert messages == expected_messages
+        assert all(isinstance(message, FitMesg) for mesgs in messages.values() for message in mesgs)
+
+    def test_mesg_types(self):
+        '''Tests that each message is an instance of the class of its message type.'''
+        messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read(mesg_objects=True)
+
+        record_mesg_type = get_mesg_type(Profile['mesg_num']['RECORD'])
+        assert record_mesg_type.__name__ == 'RecordMesg'
+        assert record_mesg_type.global_mesg_num == Profile['mesg_num']['RECORD']
+        assert all(isinstance(message, record_mesg_type) for message in messages['record_mesgs'])
+        assert isinstance(messages['file_id_mesgs'][0], get_mesg_type(Profile['mesg_num']['FILE_ID']))
+
+    def test_field_access(self):
+        '''Tests reading fields as items and attributes, where a profile field without a value is None.'''
+        messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read(mesg_objects=True)
+        record = messages['record_mesgs'][0]
+
+        assert record.heart_rate == record['heart_rate']
+        assert record.developer_fields == record['developer_fields']
+        assert 'grade' not in record
+        assert record.grade is None
+        assert record.get('grade', 0) == 0
+        with pytest.raises(KeyError):
+            record['grade']
+        with pytest.raises(AttributeError):
+            record.not_a_field
+
+    def test_fields_without_slots(self):
+        '''Tests that fields which are not in the profile are kept alongside the slots.'''
+        messages, errors = Decoder(Stream.from_byte_array(Data.fit_file_short)).read(mesg_objects=True)
+        message = messages['file_id_mesgs'][0]
+
+        message[100] = 'not in the profile'
+        assert message[100] == 'not in the profile'
+        assert message.to_dict()[100] == 'not in the profile'
+
+        del message[100]
+        assert 100 not in message
+
+    def test_smaller_than_dicts(self):
+        '''Tests that a record message object is smaller than the same message as a dictionary.'''
+        messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read(mesg_objects=True)
+        record = messages['record_mesgs'][0]
+
+        assert sys.getsizeof(record) < sys.getsizeof(record.to_dict())
+
+    def test_pickle(self):
+        '''Tests that the message objects can be pickled, such as when returned from worker processes.'''
+        messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read(mesg_objects=True)
+        unpickled_messages = pickle.loads(pickle.dumps(messages))
+
+        assert unpickled_messages == messages
+        assert type(unpickled_messages['record_mesgs'][0]) is type(messages['record_mesgs'][0])
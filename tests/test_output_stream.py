@@ -37,6 +37,12 @@ class TestOutputStreamBasic:
         stream.set_bytes(bytes([0, 1, 2, 3]), 1)
         assert list(stream.data) == [0, 0, 1, 2, 3]
 
+    def test_write_bytes(self):
+        stream = _OutputStream()
+        stream.write_uint8(0x01)
+        stream.write_bytes(memoryview(bytes([0x02, 0x03])))
+        assert stream.data == bytes([0x01, 0x02, 0x03])
+
 
 # MARK: Write Single Values
 
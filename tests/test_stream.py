@@ -11,7 +11,7 @@
 import io
 
 import pytest
-from garmin_fit_sdk import Stream, util
+from garmin_fit_sdk import CrcCalculator, Stream, stream as stream_module, util
 
 
 def test_stream_from_buffered_reader():
@@ -94,6 +94,16 @@ class TestParametrizedByBytes:
         assert stream.peek_bytes(num_bytes) == stream.read_bytes(num_bytes)
 
 
+def test_slice_larger_than_buffered_reader_buffer():
+    '''Tests that slices and peeks larger than the buffer of the buffered reader return the exact range.'''
+    data = bytes(range(256)) * 400
+    stream = Stream.from_buffered_reader(io.BufferedReader(io.BytesIO(data), buffer_size=64))
+
+    assert stream.slice(10, 99_000) == data[10:99_000]
+    assert stream.peek_bytes(90_000) == data[0:90_000]
+    assert stream.position() == 0
+
+
 @pytest.mark.parametrize(
     "given_bytes,start,end,expected_value",
     [
@@ -111,6 +121,112 @@ def test_slice(given_bytes, start, end, expected_value):
     assert stream.position() == starting_position
 
 
+class TestBlockReads:
+    '''Set of tests which verify reads served from the blocks read from the buffered reader.'''
+    data = bytes(range(256)) * 4
+
+    @pytest.fixture(autouse=True)
+    def small_blocks(self, monkeypatch):
+        '''Uses small blocks, so the reads cross the ends of the blocks.'''
+        monkeypatch.setattr(stream_module, '_BLOCK_SIZE', 10)
+
+    def test_reads_across_blocks(self):
+        '''Tests that reads, peeks and unpacks across the ends of the blocks return the same bytes as the data.'''
+        stream = Stream.from_byte_array(bytearray(self.data))
+        position = 0
+        for num_bytes in [1, 3, 9, 10, 11, 25, 0, 4]:
+            assert stream.peek_bytes(num_bytes) == self.data[position : position + num_bytes]
+            assert stream.read_bytes(num_bytes) == self.data[position : position + num_bytes]
+            position += num_bytes
+            assert stream.position() == position
+
+            assert stream.peek_byte() == self.data[position]
+            assert stream.read_byte() == self.data[position]
+            position += 1
+
+            assert stream.read_and_unpack(4, '=4B') == list(self.data[position : position + 4])
+            position += 4
+            assert stream.position() == position
+
+    def test_seek_outside_block(self):
+        '''Tests reading after seeking backwards and forwards past the block.'''
+        stream = Stream.from_byte_array(bytearray(self.data))
+        stream.seek(500)
+        assert stream.read_bytes(4) == self.data[500:504]
+        stream.seek(3)
+        assert stream.read_byte() == self.data[3]
+        stream.reset()
+        assert stream.read_bytes(20) == self.data[0:20]
+
+    def test_position_does_not_use_buffered_reader(self, mocker):
+        '''Tests that the stream tracks its own position instead of asking the buffered reader.'''
+        stream = Stream.from_byte_array(bytearray(self.data))
+        spy_tell = mocker.spy(stream.get_buffered_reader(), 'tell')
+        for _ in range(100):
+            stream.read_byte()
+
+        assert stream.position() == 100
+        assert spy_tell.call_count == 0
+
+    def test_get_buffered_reader_at_stream_position(self):
+        '''Tests that the buffered reader returned by the stream is at the stream position, not the end of the block.'''
+        stream = Stream.from_file('tests/fits/HrmPluginTestActivity.fit')
+        stream.read_bytes(14)
+
+        assert stream.get_buffered_reader().tell() == 14
+        assert stream.read_byte() == open('tests/fits/HrmPluginTestActivity.fit', 'rb').read()[14]
+
+    def test_starts_at_buffered_reader_position(self):
+        '''Tests that the stream starts at the position of the given buffered reader.'''
+        buffered_reader = io.BufferedReader(io.BytesIO(self.data))
+        buffered_reader.seek(100)
+        stream = Stream.from_buffered_reader(buffered_reader)
+        assert stream.position() == 100
+        assert stream.read_byte() == self.data[100]
+
+    def test_crc_of_reads(self):
+        '''Tests that the CRC of reads across blocks is the CRC of the data.'''
+        stream = Stream.from_byte_array(bytearray(self.data))
+        stream.set_crc_calculator(CrcCalculator())
+        stream.read_byte()
+        stream.read_bytes(13)
+        stream.read_and_unpack(8, '=2I')
+        stream.read_bytes(200)
+
+        assert stream.get_crc_caclulator().get_crc() == CrcCalculator.calculate_crc(self.data, 0, 222)
+
+    def test_slice_larger_than_block(self):
+        '''Tests that slices and peeks larger than a block return the exact range without moving the stream position.'''
+        stream = Stream.from_byte_array(bytearray(self.data))
+        stream.seek(7)
+        assert stream.slice(3, 900) == self.data[3:900]
+        assert stream.peek_bytes(500) == self.data[7:507]
+        assert stream.slice(1000, 2000) == self.data[1000:]
+        assert stream.slice(5, 5) == b''
+        assert stream.position() == 7
+        assert stream.read_bytes(3) == self.data[7:10]
+
+    def test_iter_slices(self):
+        '''Tests that iter_slices yields the range in consecutive slices without moving the stream position.'''
+        stream = Stream.from_byte_array(bytearray(self.data))
+        stream.seek(11)
+        slices = list(stream.iter_slices(3, 1000, slice_size=64))
+
+        assert b''.join(slices) == self.data[3:1000]
+        assert max(len(slice) for slice in slices) == 64
+        assert b''.join(stream.iter_slices(1000, 5000)) == self.data[1000:]
+        assert stream.position() == 11
+
+    def test_read_past_stream_length(self):
+        '''Tests that reads past the length of the stream raise, even when the data is longer.'''
+        stream = Stream.from_byte_array(bytearray(self.data), stream_length=5)
+        assert stream.read_bytes(5) == self.data[0:5]
+        with pytest.raises(IndexError):
+            stream.read_byte()
+        with pytest.raises(IndexError):
+            stream.read_and_unpack(1, '=B')
+
+
 class TestReadValues:
     '''Set of tests which validate correct reading of numeric values and strings from the stream.'''
     @pytest.mark.parametrize(
@@ -29,6 +29,14 @@ def test_convert_datetime(given_timestamp, expected_datetime):
     actual_datetime = util.convert_timestamp_to_datetime(given_timestamp)
     assert str(actual_datetime) == str(expected_datetime)
 
+def test_convert_timestamps_to_datetimes():
+    '''Tests converting a column of FIT timestamps matches converting each timestamp'''
+    timestamps = [1029086357, 1029086358, 0, None, 1029086359.5]
+
+    actual_datetimes = util.convert_timestamps_to_datetimes(timestamps)
+    assert actual_datetimes == [util.convert_timestamp_to_datetime(timestamp) for timestamp in timestamps]
+    assert all(actual_datetime.tzinfo == timezone.utc for actual_datetime in actual_datetimes)
+
 @pytest.mark.parametrize(
     "given_datetime,expected_timestamp",
     [